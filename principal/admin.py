@@ -1,3 +1,17 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Prediccion, Trabajo
+
+
+@admin.register(Trabajo)
+class TrabajoAdmin(admin.ModelAdmin):
+    list_display = ("id", "tipo", "estado", "filas", "creado", "terminado")
+    list_filter = ("tipo", "estado")
+    readonly_fields = ("creado", "iniciado", "terminado")
+
+
+@admin.register(Prediccion)
+class PrediccionAdmin(admin.ModelAdmin):
+    list_display = ("id", "creado", "etiqueta", "probabilidad", "fuente", "version_modelo", "latencia_ms")
+    list_filter = ("etiqueta", "fuente", "tipo_entrenamiento")
+    date_hierarchy = "creado"
@@ -1,6 +1,40 @@
 from django.apps import AppConfig
 
 
+def _calentar():
+    from principal.ml import warm_up
+    warm_up()
+
+
+def esperar_calentamiento() -> None:
+    """Espera al hilo de calentamiento, si lo hay.
+
+    Llamar antes de un ``fork``: el hijo no debe heredar un lock tomado por ese
+    hilo (el de importación de numpy/pandas o el del predictor).
+    """
+    import threading
+
+    for hilo in threading.enumerate():
+        if hilo.name == "calentamiento":
+            hilo.join()
+
+
 class PrincipalConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "principal"
+
+    def ready(self):
+        from django.conf import settings
+        from django.utils.autoreload import file_changed
+        from .paginas import plantilla_cambiada
+
+        file_changed.connect(plantilla_cambiada, dispatch_uid="principal.paginas")
+        modo = getattr(settings, "MODEL_WARMUP", True)
+        if not modo:
+            return
+        if modo == "fondo":
+            # el worker arranca ya; /api/salud/ responde "frio" hasta que termine
+            import threading
+            threading.Thread(target=_calentar, name="calentamiento", daemon=True).start()
+        else:
+            _calentar()
@@ -0,0 +1,253 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from pathlib import Path
+import json, os, platform, shutil, statistics, tempfile, threading, time
+import numpy as np
+import pandas as pd
+
+from django.conf import settings
+
+TAMANOS_DEFECTO = (20_000, 200_000)
+
+_CAMPOS_FORM = dict(
+    edad=30, genero="M", peso=70.0, altura=1.7, reposo_latidos=60, promedio_latidos=130,
+    duracion_sesion=1.0, calorias_quemadas=500, tipo_entrenamiento="Cardio",
+    porcentaje_grasa=20.0, agua_litros=2.0, frecuencia=4, nivel_experiencia="Intermedio",
+)
+
+
+def medir(fn, repeticiones: int = 200, calentamiento: int = 5) -> dict:
+    for _ in range(calentamiento):
+        fn()
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter_ns()
+        fn()
+        tiempos.append((time.perf_counter_ns() - t0) / 1e6)
+    tiempos.sort()
+    return {
+        "n": repeticiones,
+        "media_ms": statistics.fmean(tiempos),
+        "p50_ms": tiempos[len(tiempos) // 2],
+        "p95_ms": tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))],
+        "min_ms": tiempos[0],
+    }
+
+
+def registros_sinteticos(n: int, seed: int = 0) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            **_CAMPOS_FORM,
+            "genero": "F" if g else "M",
+            "peso": round(float(p), 1),
+            "altura": round(float(a), 2),
+            "reposo_latidos": int(r),
+            "agua_litros": round(float(w), 1),
+            "frecuencia": int(f),
+            "porcentaje_grasa": round(float(b), 1),
+        }
+        for g, p, a, r, w, f, b in zip(
+            rng.integers(0, 2, n), rng.uniform(45, 120, n), rng.uniform(1.5, 2.0, n),
+            rng.integers(45, 90, n), rng.uniform(0.5, 3.5, n), rng.integers(1, 6, n),
+            rng.uniform(10, 35, n),
+        )
+    ]
+
+
+def generar_dataset(ruta: Path, filas: int, seed: int = 0, bloque: int = 100_000) -> Path:
+    """CSV con la forma de Final_data.csv: coma decimal entre comillas y porcentajes rotos."""
+    rng = np.random.default_rng(seed)
+    coma = lambda x, d: np.char.replace(np.round(x, d).astype(str), ".", ",")
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        for inicio in range(0, filas, bloque):
+            n = min(bloque, filas - inicio)
+            peso = rng.uniform(40, 130, n)
+            altura = rng.uniform(1.5, 2.0, n)
+            grasa = rng.uniform(10, 35, n)
+            df = pd.DataFrame({
+                "Edad": rng.integers(18, 60, n),
+                "Genero": rng.choice(["Female", "Male"], n),
+                "Peso (kg)": coma(peso, 1),
+                "Altura (m)": coma(altura, 2),
+                "Maximo_LATIDOS_POR_MINUTO": rng.integers(160, 200, n),
+                "Promedio_LATIDOS_POR_MINUTO": rng.integers(120, 170, n),
+                "Reposo_LATIDOS_POR_MINUTO": rng.integers(50, 75, n),
+                "Duracion_Sesion (horas)": coma(rng.uniform(0.5, 2, n), 2),
+                "Calorias_Quemadas": coma(rng.uniform(300, 2900, n), 1),
+                "Tipo_Entrenamiento": rng.choice(["Cardio", "Strength", "HIIT", "Yoga"], n),
+                "Porcentaje_Grasa": [f"{int(g * 1e17)}%" for g in grasa],
+                "Agua (litros)": coma(rng.uniform(1.5, 3.7, n), 2),
+                "Frecuencia (dias/semanal)": rng.integers(2, 6, n),
+                "Nivel_Experiencia": rng.integers(1, 4, n),
+                "Indice_De_Masa_Corporal": coma(peso / altura ** 2, 1),
+            })
+            df.to_csv(f, index=False, header=inicio == 0)
+    return Path(ruta)
+
+
+@contextmanager
+def _modelo_de_prueba(directorio: Path, dataset: Path):
+    """Entrena un modelo chico si no hay uno real, y lo deja activo mientras dure el bloque."""
+    from principal.ml import predictor
+    from principal.ml.entrenamiento import entrenar
+
+    if predictor.MODEL_PATH.exists() or predictor.COMPACT_PATH.exists():
+        predictor.warm_up()
+        yield "real"
+        return
+    rutas = (predictor.MODEL_PATH, predictor.META_PATH, predictor.COMPACT_PATH)
+    predictor.MODEL_PATH = directorio / "clf.joblib"
+    predictor.META_PATH = directorio / "metadata.json"
+    predictor.COMPACT_PATH = directorio / "clf.npz"
+    try:
+        entrenar(dataset, predictor.MODEL_PATH, predictor.META_PATH, n_estimators=50)
+        predictor.warm_up()
+        yield "sintetico"
+    finally:
+        predictor.MODEL_PATH, predictor.META_PATH, predictor.COMPACT_PATH = rutas
+        predictor.warm_up()
+
+
+def _bench_prediccion(resultados: dict, repeticiones: int) -> None:
+    from principal.ml import predict_batch, predict_estado_salud, calcular_saludable_lote
+    from principal.ml.predictor import _build_input_row, _registro
+    from principal.views import _calcular_saludable
+
+    distintos = iter(registros_sinteticos(repeticiones + 10, seed=1))
+    resultados["predict_estado_salud.sin_cache"] = medir(
+        lambda: predict_estado_salud(next(distintos)), repeticiones
+    )
+    resultados["predict_estado_salud.con_cache"] = medir(
+        lambda: predict_estado_salud(_CAMPOS_FORM), repeticiones
+    )
+    resultados["predict_estado_salud.concurrente.32"] = _medir_concurrente(
+        registros_sinteticos(32 * 20, seed=4), hilos=32
+    )
+    for n in (100, 1000, 10_000):
+        lote = registros_sinteticos(n, seed=2)
+        resultados[f"predict_batch.{n}"] = medir(lambda: predict_batch(lote), max(3, repeticiones // 50))
+    reg = _registro()
+    resultados["_build_input_row"] = medir(lambda: _build_input_row(_CAMPOS_FORM, reg), repeticiones)
+    resultados["_calcular_saludable"] = medir(lambda: _calcular_saludable(_CAMPOS_FORM), repeticiones * 5)
+    df = pd.DataFrame.from_records(registros_sinteticos(10_000, seed=3))
+    resultados["calcular_saludable_lote.10000"] = medir(lambda: calcular_saludable_lote(df), 20)
+
+
+def _bench_remoto(resultados: dict, repeticiones: int) -> None:
+    """Las mismas predicciones vía ``serve_model`` (servidor en un hilo de este proceso)."""
+    from django.test.utils import override_settings
+    from principal.ml import predict_batch, predict_estado_salud
+    from principal.ml.servidor import crear_servidor
+
+    servidor = crear_servidor("127.0.0.1:0")
+    threading.Thread(target=servidor.serve_forever, name="bench-servidor", daemon=True).start()
+    try:
+        with override_settings(MODEL_SERVIDOR="%s:%d" % servidor.server_address):
+            distintos = iter(registros_sinteticos(repeticiones + 10, seed=5))
+            resultados["predict_estado_salud.remoto"] = medir(
+                lambda: predict_estado_salud(next(distintos)), repeticiones
+            )
+            lote = registros_sinteticos(1000, seed=2)
+            resultados["predict_batch.remoto.1000"] = medir(
+                lambda: predict_batch(lote), max(3, repeticiones // 50)
+            )
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def _medir_concurrente(registros: list[dict], hilos: int) -> dict:
+    """Tiempo por predicción con ``hilos`` llamadores simultáneos (sin caché: registros distintos)."""
+    from concurrent.futures import ThreadPoolExecutor
+    from principal.ml import predict_estado_salud
+
+    with ThreadPoolExecutor(hilos) as pool:
+        t0 = time.perf_counter()
+        list(pool.map(predict_estado_salud, registros))
+        total = (time.perf_counter() - t0) * 1000
+    por_llamada = total / len(registros)
+    return {"n": len(registros), "media_ms": por_llamada, "p50_ms": por_llamada,
+            "p95_ms": por_llamada, "min_ms": por_llamada}
+
+
+def _bench_lectura(resultados: dict, directorio: Path, tamanos) -> None:
+    from principal.datos import construir_columnar, leer_columnar, leer_csv_con_fallback
+
+    for filas in tamanos:
+        ruta = generar_dataset(directorio / f"bench_{filas}.csv", filas)
+        rep = 5 if filas <= 200_000 else 1
+        resultados[f"leer_csv_con_fallback.{filas}"] = medir(
+            lambda: leer_csv_con_fallback(ruta), rep, calentamiento=1 if rep > 1 else 0
+        )
+        construir_columnar(ruta)
+        resultados[f"leer_columnar.{filas}"] = medir(lambda: leer_columnar(ruta), rep)
+        ruta.unlink()
+
+
+def _bench_paginas(resultados: dict, directorio: Path, dataset: Path, repeticiones: int) -> None:
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    datos = directorio / "data"
+    datos.mkdir(exist_ok=True)
+    shutil.copy(dataset, datos / "Final_data.csv")
+    with override_settings(DATA_DIR=datos, MEDIA_ROOT=str(directorio / "media")):
+        c = Client()
+        form = {k: str(v) for k, v in _CAMPOS_FORM.items()}
+        resultados["GET /prediccion/"] = medir(lambda: c.get("/prediccion/"), repeticiones // 2)
+        resultados["POST /prediccion/"] = medir(lambda: c.post("/prediccion/", form), repeticiones // 2)
+        resultados["GET /dataset/"] = medir(lambda: c.get("/dataset/"), repeticiones // 2)
+        resultados["GET /"] = medir(lambda: c.get("/"), repeticiones // 2)
+        resultados["GET /consejos/"] = medir(lambda: c.get("/consejos/"), repeticiones // 2)
+
+
+def entorno() -> dict:
+    import django, sklearn
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "django": django.get_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def ejecutar(tamanos=TAMANOS_DEFECTO, repeticiones: int = 200, paginas: bool = True) -> dict:
+    """Corre toda la suite sin red y devuelve ``{"entorno": ..., "resultados": ...}``."""
+    resultados: dict[str, dict] = {}
+    directorio = Path(tempfile.mkdtemp(prefix="salud-bench-"))
+    try:
+        dataset = generar_dataset(directorio / "Final_data.csv", 20_000)
+        with _modelo_de_prueba(directorio, dataset) as origen:
+            _bench_prediccion(resultados, repeticiones)
+            _bench_remoto(resultados, repeticiones)
+            if paginas:
+                _bench_paginas(resultados, directorio, dataset, repeticiones)
+        _bench_lectura(resultados, directorio, tamanos)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    return {"entorno": {**entorno(), "modelo": origen}, "resultados": resultados}
+
+
+def comparar(base: dict, actual: dict, tolerancia: float = 0.2) -> list[dict]:
+    """Casos cuyo p50 empeoró más que ``tolerancia`` (0.2 = 20 %) respecto de ``base``."""
+    regresiones = []
+    for nombre, r in actual["resultados"].items():
+        previo = base.get("resultados", {}).get(nombre)
+        if not previo or not previo.get("p50_ms"):
+            continue
+        cambio = r["p50_ms"] / previo["p50_ms"] - 1
+        if cambio > tolerancia:
+            regresiones.append({
+                "caso": nombre, "base_ms": previo["p50_ms"], "actual_ms": r["p50_ms"], "cambio": cambio,
+            })
+    return regresiones
+
+
+def guardar(reporte: dict, ruta: Path) -> None:
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,28 @@
+from django.conf import settings
+
+from .lotes import EscritorPorLotes, registrar
+from .models import MensajeContacto
+
+_ESCRITOR = None
+
+
+def escritor_contacto() -> EscritorPorLotes:
+    global _ESCRITOR
+    if _ESCRITOR is None:
+        _ESCRITOR = registrar(EscritorPorLotes(
+            MensajeContacto,
+            tamano=int(getattr(settings, "CONTACTO_LOTE", 50)),
+            intervalo=float(getattr(settings, "CONTACTO_INTERVALO", 1.0)),
+        ))
+    return _ESCRITOR
+
+
+def guardar_mensaje(cleaned_data: dict) -> MensajeContacto:
+    mensaje = MensajeContacto(
+        nombre=cleaned_data["nombre"],
+        correo=cleaned_data["correo"],
+        asunto=cleaned_data["asunto"],
+        mensaje=cleaned_data["mensaje"].strip(),
+    )
+    escritor_contacto().agregar(mensaje)
+    return mensaje
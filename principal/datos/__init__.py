@@ -0,0 +1,47 @@
+"""Lectura, ingesta y resumen del dataset. pandas se importa al primer uso."""
+import importlib
+
+_EXPORTS = {
+    "DATASET_PATH": ".resumen",
+    "ResumenDataset": ".resumen",
+    "leer_csv_con_fallback": ".resumen",
+    "resumen_dataset": ".resumen",
+    "registrar_resumen": ".resumen",
+    "invalidar_resumen": ".resumen",
+    "estado_resumen": ".resumen",
+    "cargar_dataset": ".columnar",
+    "leer_columnar": ".columnar",
+    "construir_columnar": ".columnar",
+    "Dialecto": ".lectura",
+    "LecturaCSV": ".lectura",
+    "detectar_dialecto": ".lectura",
+    "leer_csv": ".lectura",
+    "leer_primeras": ".lectura",
+    "Analitica": ".analitica",
+    "analitica_dataset": ".analitica",
+    "posicion_poblacion": ".analitica",
+    "ErrorIngesta": ".ingesta",
+    "ResultadoIngesta": ".ingesta",
+    "leer_bloques": ".ingesta",
+    "ingerir": ".ingesta",
+    "anexar": ".ingesta",
+    "MODOS": ".particiones",
+    "manifest_particiones": ".particiones",
+    "asegurar_particiones": ".particiones",
+    "verificar_particiones": ".particiones",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    modulo = _EXPORTS.get(name)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    valor = getattr(importlib.import_module(modulo, __name__), name)
+    globals()[name] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,389 @@
+from __future__ import annotations
+from pathlib import Path
+import json, logging, os, tempfile, threading
+import numpy as np
+import pandas as pd
+
+from .columnar import _firma, cargar_dataset
+from .particiones import bloqueo
+
+logger = logging.getLogger(__name__)
+
+# data/Final_data.csv -> data/Final_data.analitica.json
+_SUFIJO = ".analitica.json"
+_VERSION = 1
+
+# variable -> (etiqueta, rango de los histogramas); fuera del rango cae en el primer/último bin
+VARIABLES = {
+    "imc": ("IMC", (10.0, 60.0)),
+    "reposo_latidos": ("Frecuencia cardiaca en reposo", (30.0, 120.0)),
+    "porcentaje_grasa": ("Porcentaje de grasa", (0.0, 60.0)),
+}
+BINS = 240
+CUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+# con menos filas que esto en un grupo se compara contra uno más amplio
+_MIN_GRUPO = 30
+_TODOS = "todos"
+
+
+def _ruta(ruta_csv: Path) -> Path:
+    ruta_csv = Path(ruta_csv)
+    return ruta_csv.with_name(ruta_csv.stem + _SUFIJO)
+
+
+def _valores(df: pd.DataFrame, variable: str) -> np.ndarray | None:
+    def num(col):
+        return df[col].to_numpy(dtype="float64", na_value=np.nan) if col in df else None
+
+    if variable == "imc":
+        peso, altura, imc = num("Peso (kg)"), num("Altura (m)"), num("Indice_De_Masa_Corporal")
+        calculado = peso / altura ** 2 if peso is not None and altura is not None else None
+        if calculado is None:
+            return imc
+        return calculado if imc is None else np.where(np.isnan(calculado), imc, calculado)
+    if variable == "reposo_latidos":
+        return num("Reposo_LATIDOS_POR_MINUTO")
+    return num("Porcentaje_Grasa")
+
+
+def _grupos(df: pd.DataFrame) -> list[tuple[str, np.ndarray]]:
+    """(clave, máscara) por población: todos, por género, por tipo y por género+tipo."""
+    n = len(df)
+    grupos = [(_TODOS, np.ones(n, dtype=bool))]
+    genero = df["Genero"].astype("string") if "Genero" in df else None
+    tipo = df["Tipo_Entrenamiento"].astype("string") if "Tipo_Entrenamiento" in df else None
+    por_genero = _por_valor(genero, "genero")
+    por_tipo = _por_valor(tipo, "tipo")
+    grupos += por_genero + por_tipo
+    for kg, mg in por_genero:
+        for kt, mt in por_tipo:
+            grupos.append((f"{kg},{kt}", mg & mt))
+    return grupos
+
+
+def _por_valor(serie, nombre: str) -> list[tuple[str, np.ndarray]]:
+    if serie is None:
+        return []
+    valores = serie.to_numpy(dtype=object, na_value=None)
+    return [
+        (f"{nombre}={v}", valores == v)
+        for v in pd.unique(valores) if v is not None and v != ""
+    ]
+
+
+def clave_grupo(genero=None, tipo=None) -> list[str]:
+    """Claves de la más específica a la más amplia."""
+    claves = []
+    if genero and tipo:
+        claves.append(f"genero={genero},tipo={tipo}")
+    if genero:
+        claves.append(f"genero={genero}")
+    if tipo:
+        claves.append(f"tipo={tipo}")
+    return claves + [_TODOS]
+
+
+_GENEROS = {"F": "mujeres", "M": "hombres"}
+
+
+def describir_grupo(clave: str) -> str:
+    """``"genero=F,tipo=Cardio"`` -> ``"mujeres, Cardio"``."""
+    if clave == _TODOS:
+        return "todo el dataset"
+    partes = dict(p.split("=", 1) for p in clave.split(","))
+    texto = [_GENEROS.get(partes["genero"], partes["genero"])] if "genero" in partes else []
+    if "tipo" in partes:
+        texto.append(partes["tipo"])
+    return ", ".join(texto)
+
+
+class Analitica:
+    """Agregados del dataset que se pueden sumar bloque a bloque o entre particiones.
+
+    Por columna: conteo, nulos, suma, suma de cuadrados, mínimo y máximo (o
+    conteo por categoría). Para ``VARIABLES``: histogramas de ``BINS`` bins
+    por grupo, de los que salen cuantiles y percentiles sin volver al CSV.
+    """
+
+    def __init__(self):
+        self.filas = 0
+        self.columnas: dict[str, dict] = {}
+        self.histogramas: dict[str, dict[str, np.ndarray]] = {v: {} for v in VARIABLES}
+        self._acumulados: dict = {}
+
+    def agregar(self, df: pd.DataFrame) -> "Analitica":
+        """Suma un bloque ya tipado (salida de ``normalizar_dataset``)."""
+        self.filas += len(df)
+        for col in df.columns:
+            serie = df[col]
+            if pd.api.types.is_float_dtype(serie):
+                v = serie.to_numpy(dtype="float64", na_value=np.nan)
+                ok = v[~np.isnan(v)]
+                a = self.columnas.setdefault(col, {
+                    "tipo": "numerica", "n": 0, "nulos": 0, "suma": 0.0, "suma2": 0.0,
+                    "min": None, "max": None,
+                })
+                a["n"] += int(len(ok))
+                a["nulos"] += int(len(v) - len(ok))
+                if len(ok):
+                    a["suma"] += float(ok.sum())
+                    a["suma2"] += float((ok * ok).sum())
+                    a["min"] = float(ok.min()) if a["min"] is None else min(a["min"], float(ok.min()))
+                    a["max"] = float(ok.max()) if a["max"] is None else max(a["max"], float(ok.max()))
+            else:
+                a = self.columnas.setdefault(col, {"tipo": "categoria", "nulos": 0, "conteos": {}})
+                conteos = serie.astype("string").value_counts(dropna=False)
+                for valor, n in conteos.items():
+                    if pd.isna(valor) or valor == "":
+                        a["nulos"] += int(n)
+                    else:
+                        a["conteos"][str(valor)] = a["conteos"].get(str(valor), 0) + int(n)
+
+        grupos = _grupos(df)
+        for variable, (_, (lo, hi)) in VARIABLES.items():
+            valores = _valores(df, variable)
+            if valores is None:
+                continue
+            validos = ~np.isnan(valores)
+            escalados = (np.where(validos, valores, lo) - lo) / (hi - lo) * BINS
+            idx = np.clip(escalados, 0, BINS - 1).astype("int64")
+            for clave, mascara in grupos:
+                sel = idx[mascara & validos]
+                conteos = np.bincount(sel, minlength=BINS)
+                actual = self.histogramas[variable].get(clave)
+                self.histogramas[variable][clave] = conteos if actual is None else actual + conteos
+        self._acumulados.clear()
+        return self
+
+    def combinar(self, otra: "Analitica") -> "Analitica":
+        """Suma ``otra`` (p. ej. una partición nueva) sobre esta."""
+        self.filas += otra.filas
+        for col, b in otra.columnas.items():
+            a = self.columnas.get(col)
+            if a is None:
+                self.columnas[col] = json.loads(json.dumps(b))
+            elif a["tipo"] == "numerica" and b["tipo"] == "numerica":
+                for k in ("n", "nulos", "suma", "suma2"):
+                    a[k] += b[k]
+                for k, f in (("min", min), ("max", max)):
+                    vals = [x for x in (a[k], b[k]) if x is not None]
+                    a[k] = f(vals) if vals else None
+            elif a["tipo"] == "categoria" and b["tipo"] == "categoria":
+                a["nulos"] += b["nulos"]
+                for valor, n in b["conteos"].items():
+                    a["conteos"][valor] = a["conteos"].get(valor, 0) + n
+        for variable, grupos in otra.histogramas.items():
+            destino = self.histogramas.setdefault(variable, {})
+            for clave, conteos in grupos.items():
+                destino[clave] = conteos.copy() if clave not in destino else destino[clave] + conteos
+        self._acumulados.clear()
+        return self
+
+    def _acumulado(self, variable: str, clave: str) -> np.ndarray | None:
+        acumulado = self._acumulados.get((variable, clave))
+        if acumulado is None:
+            conteos = self.histogramas.get(variable, {}).get(clave)
+            if conteos is None:
+                return None
+            acumulado = np.concatenate(([0], np.cumsum(conteos)))
+            self._acumulados[(variable, clave)] = acumulado
+        return acumulado
+
+    def percentil(self, variable: str, valor: float, genero=None, tipo=None) -> dict | None:
+        """Porcentaje de la población (del grupo más específico con datos) por debajo de ``valor``."""
+        lo, hi = VARIABLES[variable][1]
+        for clave in clave_grupo(genero, tipo):
+            acumulado = self._acumulado(variable, clave)
+            if acumulado is None or acumulado[-1] < _MIN_GRUPO:
+                continue
+            pos = min(max((valor - lo) / (hi - lo) * BINS, 0.0), float(BINS))
+            i = min(int(pos), BINS - 1)
+            # interpolación lineal dentro del bin
+            debajo = acumulado[i] + (acumulado[i + 1] - acumulado[i]) * (pos - i)
+            return {
+                "percentil": float(100 * debajo / acumulado[-1]),
+                "grupo": clave,
+                "descripcion": describir_grupo(clave),
+                "n": int(acumulado[-1]),
+            }
+        return None
+
+    def cuantiles(self, variable: str, clave: str = _TODOS, qs=CUANTILES) -> dict[str, float] | None:
+        acumulado = self._acumulado(variable, clave)
+        if acumulado is None or acumulado[-1] == 0:
+            return None
+        lo, hi = VARIABLES[variable][1]
+        bordes = np.linspace(lo, hi, BINS + 1)
+        # inversa de la acumulada, interpolando dentro de cada bin
+        return {f"p{int(q * 100)}": float(np.interp(q * acumulado[-1], acumulado, bordes)) for q in qs}
+
+    def resumen(self) -> dict:
+        columnas = {}
+        for col, a in self.columnas.items():
+            if a["tipo"] == "numerica":
+                media = a["suma"] / a["n"] if a["n"] else None
+                var = a["suma2"] / a["n"] - media ** 2 if a["n"] else None
+                columnas[col] = {
+                    "tipo": "numerica", "n": a["n"], "nulos": a["nulos"], "media": media,
+                    "desviacion": float(np.sqrt(max(var, 0.0))) if var is not None else None,
+                    "min": a["min"], "max": a["max"],
+                }
+            else:
+                columnas[col] = {"tipo": "categoria", "nulos": a["nulos"], "conteos": a["conteos"]}
+        variables = {}
+        for variable, (etiqueta, rango) in VARIABLES.items():
+            variables[variable] = {
+                "etiqueta": etiqueta,
+                "rango": list(rango),
+                "grupos": {
+                    clave: {"n": int(conteos.sum()), **(self.cuantiles(variable, clave) or {})}
+                    for clave, conteos in sorted(self.histogramas.get(variable, {}).items())
+                },
+            }
+        return {"filas": self.filas, "columnas": columnas, "variables": variables}
+
+    def a_dict(self) -> dict:
+        return {
+            "version": _VERSION,
+            "bins": BINS,
+            "rangos": {v: list(r) for v, (_, r) in VARIABLES.items()},
+            "filas": self.filas,
+            "columnas": self.columnas,
+            "histogramas": {
+                v: {k: c.tolist() for k, c in grupos.items()} for v, grupos in self.histogramas.items()
+            },
+        }
+
+    @classmethod
+    def desde_dict(cls, datos: dict) -> "Analitica":
+        if datos.get("version") != _VERSION or datos.get("bins") != BINS or datos.get("rangos") != {
+            v: list(r) for v, (_, r) in VARIABLES.items()
+        }:
+            raise ValueError("analítica con otro formato")
+        a = cls()
+        a.filas = datos["filas"]
+        a.columnas = datos["columnas"]
+        a.histogramas = {
+            v: {k: np.asarray(c, dtype="int64") for k, c in grupos.items()}
+            for v, grupos in datos["histogramas"].items()
+        }
+        return a
+
+
+def guardar_analitica(ruta_csv: Path, analitica: Analitica) -> None:
+    """Escribe la analítica junto al CSV, atada a su mtime/tamaño actual."""
+    destino = _ruta(ruta_csv)
+    datos = {**analitica.a_dict(), "firma_csv": _firma(ruta_csv)}
+    fd, tmp = tempfile.mkstemp(dir=destino.parent, prefix=f".{destino.name}.")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, destino)
+    with _LOCK:
+        _ANALITICAS[str(Path(ruta_csv))] = (tuple(datos["firma_csv"]), analitica)
+
+
+def _leer(ruta_csv: Path, firma: list[int]) -> Analitica | None:
+    try:
+        with open(_ruta(ruta_csv), "r", encoding="utf-8") as f:
+            datos = json.load(f)
+        if datos.get("firma_csv") != firma:
+            return None
+        return Analitica.desde_dict(datos)
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def construir_analitica(ruta_csv: Path) -> Analitica:
+    """Recalcula la analítica desde la copia columnar (sin parsear el CSV si está al día).
+
+    Solo se guarda si el bloqueo del CSV está libre: calculada durante una
+    escritura quedaría atada a una firma que no le corresponde.
+    """
+    with bloqueo(ruta_csv, esperar=False) as tomado:
+        analitica = Analitica().agregar(cargar_dataset(ruta_csv))
+        if tomado:
+            guardar_analitica(ruta_csv, analitica)
+    return analitica
+
+
+_LOCK = threading.RLock()
+_ANALITICAS: dict[str, tuple[tuple[int, int], Analitica]] = {}
+# CSV cuya analítica se está recalculando en segundo plano
+_EN_CURSO: set[str] = set()
+
+
+def _reconstruir(ruta: Path, firma: tuple) -> Analitica:
+    analitica = construir_analitica(ruta)
+    with _LOCK:
+        # aunque no se haya podido guardar, no se recalcula en cada solicitud
+        _ANALITICAS[str(ruta)] = (firma, analitica)
+    return analitica
+
+
+def _reconstruir_en_fondo(ruta: Path, firma: tuple) -> None:
+    try:
+        _reconstruir(ruta, firma)
+    except Exception:
+        logger.exception("No se pudo recalcular la analítica de %s", ruta)
+    finally:
+        with _LOCK:
+            _EN_CURSO.discard(str(ruta))
+
+
+def analitica_dataset(ruta: Path | None = None, esperar: bool = False) -> Analitica | None:
+    """Analítica vigente del CSV, leída del JSON que deja la ingesta.
+
+    Si falta o quedó vieja (el CSV cambió por fuera de ``ingerir``/``anexar``)
+    se recalcula en un hilo aparte y mientras tanto se devuelve la anterior,
+    o ``None`` si nunca hubo una. Con ``esperar`` se recalcula en el acto.
+    """
+    from .resumen import DATASET_PATH
+
+    ruta = Path(ruta or DATASET_PATH)
+    try:
+        firma = tuple(_firma(ruta))
+    except FileNotFoundError:
+        return None
+    actual = _ANALITICAS.get(str(ruta))
+    if actual is not None and actual[0] == firma:
+        return actual[1]
+    with _LOCK:
+        actual = _ANALITICAS.get(str(ruta))
+        if actual is not None and actual[0] == firma:
+            return actual[1]
+        analitica = _leer(ruta, list(firma))
+        if analitica is not None:
+            _ANALITICAS[str(ruta)] = (firma, analitica)
+            return analitica
+        if esperar:
+            return _reconstruir(ruta, firma)
+        if str(ruta) not in _EN_CURSO:
+            _EN_CURSO.add(str(ruta))
+            threading.Thread(
+                target=_reconstruir_en_fondo, args=(ruta, firma), name="analitica", daemon=True
+            ).start()
+    return actual[1] if actual is not None else None
+
+
+def posicion_poblacion(data: dict, ruta: Path | None = None) -> list[dict]:
+    """Dónde cae cada valor del formulario dentro de la población del dataset."""
+    analitica = analitica_dataset(ruta)
+    if analitica is None:
+        return []
+    valores = {
+        "reposo_latidos": data.get("reposo_latidos"),
+        "porcentaje_grasa": data.get("porcentaje_grasa"),
+    }
+    if data.get("peso") and data.get("altura"):
+        valores["imc"] = data["peso"] / data["altura"] ** 2
+    posiciones = []
+    for variable, (etiqueta, _) in VARIABLES.items():
+        valor = valores.get(variable)
+        if valor is None:
+            continue
+        p = analitica.percentil(variable, float(valor), data.get("genero"), data.get("tipo_entrenamiento"))
+        if p is not None:
+            posiciones.append({"variable": variable, "etiqueta": etiqueta, "valor": float(valor), **p})
+    return posiciones
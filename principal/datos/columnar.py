@@ -0,0 +1,227 @@
+from __future__ import annotations
+from pathlib import Path
+import json, os, shutil, tempfile
+import numpy as np
+import pandas as pd
+
+from .limpieza import normalizar_dataset
+
+# data/Final_data.csv -> data/Final_data.cols.json + data/.Final_data.cols-XXXX/<i>.bin
+_SUFIJO_MANIFEST = ".cols.json"
+_VERSION = 1
+
+
+def _ruta_manifest(ruta_csv: Path) -> Path:
+    ruta_csv = Path(ruta_csv)
+    return ruta_csv.with_name(ruta_csv.stem + _SUFIJO_MANIFEST)
+
+
+def _firma(ruta: Path) -> list[int]:
+    st = Path(ruta).stat()
+    return [st.st_mtime_ns, st.st_size]
+
+
+class EscritorColumnar:
+    """Copia tipada de un CSV, escrita bloque a bloque como columnas binarias.
+
+    Las numéricas quedan en float64 y el texto con codificación de diccionario
+    (int32 + categorías en el manifest). Todo se lee luego con ``np.memmap``.
+    """
+
+    def __init__(self, ruta_csv: Path):
+        self.ruta_csv = Path(ruta_csv)
+        self.ruta_csv.parent.mkdir(parents=True, exist_ok=True)
+        self.dir = Path(tempfile.mkdtemp(
+            dir=self.ruta_csv.parent, prefix=f".{self.ruta_csv.stem}.cols-"
+        ))
+        self.columnas: list[str] | None = None
+        self.numericas: set[str] = set()
+        self.categorias: dict[str, dict[str, int]] = {}
+        self.filas = 0
+        self._archivos = []
+        self._base: int | None = None
+
+    @classmethod
+    def continuar(cls, ruta_csv: Path, manifest: dict) -> "EscritorColumnar":
+        """Escritor que agrega filas al final de la copia ya publicada en ``manifest``."""
+        escritor = cls.__new__(cls)
+        escritor.ruta_csv = Path(ruta_csv)
+        escritor.dir = escritor.ruta_csv.parent / manifest["dir"]
+        escritor.columnas = [c["nombre"] for c in manifest["columnas"]]
+        escritor.numericas = {c["nombre"] for c in manifest["columnas"] if c["tipo"] == "float64"}
+        escritor.categorias = {
+            c["nombre"]: {v: i for i, v in enumerate(c["categorias"])}
+            for c in manifest["columnas"] if c["tipo"] != "float64"
+        }
+        escritor.filas = escritor._base = manifest["filas"]
+        # restos de un intento anterior que no llegó a publicar su manifest
+        escritor._truncar(escritor._base)
+        escritor._archivos = [
+            open(escritor.dir / f"{i}.bin", "ab") for i in range(len(escritor.columnas))
+        ]
+        return escritor
+
+    def _truncar(self, filas: int) -> None:
+        for i, col in enumerate(self.columnas):
+            ancho = 8 if col in self.numericas else 4
+            os.truncate(self.dir / f"{i}.bin", filas * ancho)
+
+    def agregar(self, bloque: pd.DataFrame, tipado: pd.DataFrame | None = None) -> pd.DataFrame:
+        """Normaliza ``bloque`` (texto crudo), lo escribe y devuelve la versión tipada.
+
+        Si ya se tiene ``tipado`` (normalizado con ``self.numericas``) se usa tal cual.
+        """
+        if self.columnas is None:
+            tipado = normalizar_dataset(bloque)
+            self.columnas = list(tipado.columns)
+            self.numericas = {c for c in self.columnas if tipado[c].dtype == "float64"}
+            self._archivos = [open(self.dir / f"{i}.bin", "wb") for i in range(len(self.columnas))]
+        elif tipado is None:
+            tipado = normalizar_dataset(bloque, self.numericas)
+
+        for i, col in enumerate(self.columnas):
+            serie = tipado[col]
+            if col in self.numericas:
+                datos = serie.to_numpy(dtype="float64", na_value=np.nan)
+            else:
+                tabla = self.categorias.setdefault(col, {})
+                locales, unicos = pd.factorize(serie)
+                globales = np.array(
+                    [tabla.setdefault(u, len(tabla)) for u in unicos] + [-1], dtype="int32"
+                )
+                # factorize marca los faltantes con -1, que cae en el centinela final
+                datos = globales[locales]
+            datos.tofile(self._archivos[i])
+        self.filas += len(tipado)
+        return tipado
+
+    def _cerrar_archivos(self) -> None:
+        for f in self._archivos:
+            f.close()
+        self._archivos = []
+
+    def abortar(self) -> None:
+        self._cerrar_archivos()
+        if self._base is None:
+            shutil.rmtree(self.dir, ignore_errors=True)
+        else:
+            # los lectores siguen con el manifest anterior: basta con recortar
+            self._truncar(self._base)
+
+    def cerrar(self) -> dict:
+        """Publica la copia; llamar después de dejar el CSV definitivo en su lugar."""
+        self._cerrar_archivos()
+        os.chmod(self.dir, 0o755)
+        manifest = {
+            "version": _VERSION,
+            "csv": self.ruta_csv.name,
+            "firma_csv": _firma(self.ruta_csv),
+            "dir": self.dir.name,
+            "filas": self.filas,
+            "columnas": [
+                {
+                    "nombre": col,
+                    "tipo": "float64" if col in self.numericas else "categoria",
+                    "categorias": list(self.categorias.get(col, {})) if col not in self.numericas else None,
+                }
+                for col in (self.columnas or [])
+            ],
+        }
+        destino = _ruta_manifest(self.ruta_csv)
+        fd, tmp = tempfile.mkstemp(dir=destino.parent, prefix=f".{destino.name}.")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, destino)
+        _limpiar_versiones(self.ruta_csv, conservar=self.dir.name)
+        return manifest
+
+
+def _limpiar_versiones(ruta_csv: Path, conservar: str) -> None:
+    for d in ruta_csv.parent.glob(f".{ruta_csv.stem}.cols-*"):
+        if d.name != conservar and d.is_dir():
+            shutil.rmtree(d, ignore_errors=True)
+
+
+def manifest_vigente(ruta_csv: Path) -> dict | None:
+    """El manifest de la copia columnar si corresponde al CSV actual; si no, ``None``."""
+    ruta_csv = Path(ruta_csv)
+    try:
+        with open(_ruta_manifest(ruta_csv), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != _VERSION or manifest["firma_csv"] != _firma(ruta_csv):
+            return None
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+    if not (ruta_csv.parent / manifest["dir"]).is_dir():
+        return None
+    return manifest
+
+
+def leer_columnar(ruta_csv: Path, columnas=None, filas: int | None = None) -> pd.DataFrame | None:
+    """Carga la copia tipada vía memory-map, o ``None`` si no existe o está vieja."""
+    manifest = manifest_vigente(ruta_csv)
+    if manifest is None:
+        return None
+    base = Path(ruta_csv).parent / manifest["dir"]
+    n = manifest["filas"] if filas is None else min(filas, manifest["filas"])
+    datos = {}
+    try:
+        for i, col in enumerate(manifest["columnas"]):
+            nombre = col["nombre"]
+            if columnas is not None and nombre not in columnas:
+                continue
+            if col["tipo"] == "float64":
+                datos[nombre] = _mapear(base / f"{i}.bin", "float64", manifest["filas"])[:n]
+            else:
+                codigos = _mapear(base / f"{i}.bin", "int32", manifest["filas"])[:n]
+                datos[nombre] = pd.Categorical.from_codes(codigos, categories=col["categorias"])
+    except (FileNotFoundError, ValueError):
+        # una escritura reemplazó o recortó esta copia entre medio
+        return None
+    return pd.DataFrame(datos, copy=False)
+
+
+def _mapear(ruta: Path, dtype: str, filas: int) -> np.ndarray:
+    if filas == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(ruta, dtype=dtype, mode="r", shape=(filas,))
+
+
+def construir_columnar(ruta_csv: Path) -> dict:
+    """Genera la copia columnar de un CSV existente, leyéndolo por bloques."""
+    from .ingesta import leer_bloques
+    from .particiones import bloqueo
+
+    with bloqueo(ruta_csv):
+        escritor = EscritorColumnar(ruta_csv)
+        try:
+            for bloque in leer_bloques(ruta_csv):
+                escritor.agregar(bloque)
+        except BaseException:
+            escritor.abortar()
+            raise
+        return escritor.cerrar()
+
+
+def cargar_dataset(ruta_csv: Path, columnas=None) -> pd.DataFrame:
+    """Dataset tipado: de la copia columnar si está al día; si no, se reconstruye.
+
+    Solo se reconstruye si el bloqueo del CSV está libre; con una escritura en
+    curso se lee el CSV directamente, sin dejar copia.
+    """
+    from .ingesta import leer_bloques
+    from .particiones import bloqueo
+
+    df = leer_columnar(ruta_csv, columnas)
+    if df is not None:
+        return df
+    with bloqueo(ruta_csv, esperar=False) as tomado:
+        if tomado:
+            df = leer_columnar(ruta_csv, columnas)
+            if df is None:
+                construir_columnar(ruta_csv)
+                df = leer_columnar(ruta_csv, columnas)
+            return df
+    df = normalizar_dataset(pd.concat(leer_bloques(ruta_csv), ignore_index=True))
+    return df if columnas is None else df[[c for c in df.columns if c in columnas]]
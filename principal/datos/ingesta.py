@@ -0,0 +1,282 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator
+import hashlib, os, tempfile
+import numpy as np
+import pandas as pd
+
+from .analitica import Analitica, analitica_dataset, guardar_analitica
+from .columnar import EscritorColumnar, construir_columnar, manifest_vigente
+from .lectura import detectar_separador, leer_primeras
+from .limpieza import normalizar_dataset
+from .particiones import (
+    AGREGAR, FUSIONAR, agregar_particion, asegurar_particiones, bloqueo, cargar_claves,
+    guardar_claves, hash_filas, reiniciar_particiones, restaurar_particiones,
+)
+
+CHUNK_FILAS = 50_000
+
+
+class ErrorIngesta(ValueError):
+    pass
+
+
+@dataclass
+class ResultadoIngesta:
+    ruta: str
+    filas: int
+    columnas: list[str]
+    preview: pd.DataFrame
+    descartadas: int = 0
+    duplicadas: int = 0
+    total: int = 0
+    huella: str | None = None
+
+    @property
+    def cols(self) -> int:
+        return len(self.columnas)
+
+
+def _bloques_csv(ruta: Path, chunksize: int, usecols) -> Iterator[pd.DataFrame]:
+    yield from pd.read_csv(
+        ruta, sep=detectar_separador(ruta), dtype=str, keep_default_na=False,
+        chunksize=chunksize, usecols=usecols,
+    )
+
+
+def _bloques_xlsx(ruta: Path, chunksize: int, usecols) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezado = next(filas, None)
+        if encabezado is None:
+            return
+        columnas = [str(c).strip() if c is not None else f"Unnamed: {i}"
+                    for i, c in enumerate(encabezado)]
+        buffer = []
+        for fila in filas:
+            buffer.append(["" if v is None else str(v) for v in fila])
+            if len(buffer) >= chunksize:
+                yield _bloque_xlsx(buffer, columnas, usecols)
+                buffer = []
+        if buffer:
+            yield _bloque_xlsx(buffer, columnas, usecols)
+    finally:
+        libro.close()
+
+
+def _bloque_xlsx(buffer, columnas, usecols) -> pd.DataFrame:
+    df = pd.DataFrame(buffer, columns=columnas, dtype=str)
+    if usecols is not None:
+        df = df[[c for c in df.columns if usecols(c)]]
+    return df
+
+
+def _termina_en_salto(ruta: Path) -> bool:
+    with open(ruta, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def leer_bloques(ruta: Path, chunksize: int = CHUNK_FILAS, usecols=None) -> Iterator[pd.DataFrame]:
+    """Itera el archivo (CSV con ``,`` o ``;``, o XLSX) en bloques de texto sin convertir."""
+    ruta = Path(ruta)
+    if ruta.suffix.lower() == ".xlsx":
+        return _bloques_xlsx(ruta, chunksize, usecols)
+    return _bloques_csv(ruta, chunksize, usecols)
+
+
+def _respaldar(destino: Path) -> Path | None:
+    """Enlace al CSV actual para devolverlo a su lugar si el reemplazo no se completa."""
+    if not destino.exists():
+        return None
+    respaldo = destino.with_name(f".{destino.name}.anterior")
+    respaldo.unlink(missing_ok=True)
+    os.link(destino, respaldo)
+    return respaldo
+
+
+def _normalizar_bloque(bloque: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+    bloque = bloque.rename(columns=lambda c: str(c).strip())
+    bloque = bloque.apply(lambda s: s.str.strip())
+    vacias = (bloque == "").all(axis=1)
+    return bloque[~vacias], int(vacias.sum())
+
+
+def ingerir(
+    origen: Path,
+    destino: Path,
+    chunksize: int = CHUNK_FILAS,
+    progreso: Callable[[int], None] | None = None,
+) -> ResultadoIngesta:
+    """Copia ``origen`` a ``destino`` como CSV con ``,`` bloque a bloque.
+
+    Se escribe en un temporal junto a ``destino`` y se renombra al final, así
+    nadie lee un archivo a medias. La vista previa sale del primer bloque. En
+    la misma pasada se genera la copia columnar tipada (ver ``columnar``), la
+    analítica (ver ``analitica``) y el SHA-1 con el que se reinicia el
+    manifest de particiones.
+    """
+    destino = Path(destino)
+    with bloqueo(destino):
+        return _ingerir(Path(origen), destino, chunksize, progreso)
+
+
+def _ingerir(origen, destino, chunksize, progreso) -> ResultadoIngesta:
+    fd, tmp = tempfile.mkstemp(dir=destino.parent, prefix=f".{destino.name}.", suffix=".tmp")
+    os.close(fd)
+    columnar = EscritorColumnar(destino)
+    analitica = Analitica()
+    sha1 = hashlib.sha1()
+
+    columnas = None
+    preview = None
+    respaldo = None
+    filas = descartadas = 0
+    try:
+        with open(tmp, "wb") as out:
+            for bloque in leer_bloques(origen, chunksize):
+                bloque, vacias = _normalizar_bloque(bloque)
+                descartadas += vacias
+                if columnas is None:
+                    columnas = list(bloque.columns)
+                    if len(columnas) < 2:
+                        raise ErrorIngesta(
+                            "El archivo tiene una sola columna; revisa el separador."
+                        )
+                    preview = bloque.head(10)
+                texto = bloque.to_csv(index=False, header=out.tell() == 0).encode("utf-8")
+                sha1.update(texto)
+                out.write(texto)
+                analitica.agregar(columnar.agregar(bloque))
+                filas += len(bloque)
+                if progreso is not None:
+                    progreso(filas)
+        if columnas is None:
+            raise ErrorIngesta("El archivo está vacío.")
+        os.chmod(tmp, 0o644)
+        respaldo = _respaldar(destino)
+        os.replace(tmp, destino)
+        # si algo de aquí falla se vuelve al CSV anterior
+        columnar.cerrar()
+        guardar_analitica(destino, analitica)
+        manifest = reiniciar_particiones(destino, filas, sha1.hexdigest(), str(origen))
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        if respaldo is not None:
+            os.replace(respaldo, destino)
+        columnar.abortar()
+        raise
+    if respaldo is not None:
+        respaldo.unlink(missing_ok=True)
+
+    return ResultadoIngesta(
+        ruta=str(destino), filas=filas, columnas=columnas,
+        preview=preview, descartadas=descartadas,
+        total=filas, huella=manifest["huella"],
+    )
+
+
+def anexar(
+    origen: Path,
+    destino: Path,
+    modo: str = AGREGAR,
+    clave=None,
+    chunksize: int = CHUNK_FILAS,
+    progreso: Callable[[int], None] | None = None,
+) -> ResultadoIngesta:
+    """Agrega las filas de ``origen`` al final de ``destino`` como una partición nueva.
+
+    Nada de lo existente se reescribe: el CSV y la copia columnar crecen por el
+    final y la analítica se combina con la de las filas nuevas. Con ``modo=
+    FUSIONAR`` se descartan las filas cuya ``clave`` (columnas; por defecto la
+    fila entera) ya está en el dataset o se repite en el propio archivo.
+    """
+    destino = Path(destino)
+    if not destino.exists():
+        return ingerir(origen, destino, chunksize, progreso)
+    with bloqueo(destino):
+        return _anexar(Path(origen), destino, modo, clave, chunksize, progreso)
+
+
+def _anexar(origen, destino, modo, clave, chunksize, progreso) -> ResultadoIngesta:
+    manifest_cols = manifest_vigente(destino) or construir_columnar(destino)
+    columnas = [c["nombre"] for c in manifest_cols["columnas"]]
+    particiones = previo = asegurar_particiones(destino)
+    # el bloqueo del CSV es de este hilo: la analítica base se arma aquí mismo
+    base = analitica_dataset(destino, esperar=True)
+    clave = list(clave or columnas)
+    faltan_clave = [c for c in clave if c not in columnas]
+    if faltan_clave:
+        raise ErrorIngesta(f"Columnas de la clave que no están en el dataset: {', '.join(faltan_clave)}")
+    existentes = cargar_claves(destino, clave) if modo == FUSIONAR else None
+
+    columnar = EscritorColumnar.continuar(destino, manifest_cols)
+    nuevas = Analitica()
+    sha1 = hashlib.sha1()
+    sep = detectar_separador(destino)
+    inicio = destino.stat().st_size
+    filas = descartadas = duplicadas = 0
+    try:
+        with open(destino, "ab") as out:
+            salto = b"" if _termina_en_salto(destino) else os.linesep.encode()
+            desde = inicio + len(salto)
+            for bloque in leer_bloques(origen, chunksize):
+                bloque, vacias = _normalizar_bloque(bloque)
+                descartadas += vacias
+                faltan = [c for c in columnas if c not in bloque.columns]
+                sobran = [c for c in bloque.columns if c not in columnas]
+                if faltan or sobran:
+                    raise ErrorIngesta(
+                        "Las columnas no coinciden con el dataset actual"
+                        + (f"; faltan: {', '.join(faltan)}" if faltan else "")
+                        + (f"; sobran: {', '.join(sobran)}" if sobran else "")
+                    )
+                bloque = bloque[columnas]
+                tipado = normalizar_dataset(bloque, columnar.numericas)
+                if existentes is not None:
+                    hashes = hash_filas(tipado, clave)
+                    nueva = ~np.isin(hashes, existentes) & ~pd.Series(hashes).duplicated().to_numpy()
+                    duplicadas += int((~nueva).sum())
+                    bloque, tipado = bloque[nueva], tipado[nueva]
+                    existentes = np.union1d(existentes, hashes[nueva])
+                if len(bloque):
+                    texto = bloque.to_csv(index=False, header=False, sep=sep).encode("utf-8")
+                    sha1.update(texto)
+                    out.write(salto + texto)
+                    salto = b""
+                    nuevas.agregar(columnar.agregar(bloque, tipado))
+                    filas += len(bloque)
+                if progreso is not None:
+                    progreso(filas)
+        if filas:
+            # el CSV ya cambió: se publican las copias derivadas con su nueva firma
+            columnar.cerrar()
+            guardar_analitica(destino, Analitica().combinar(base).combinar(nuevas))
+            particiones = agregar_particion(
+                destino, particiones, desde, destino.stat().st_size, filas, sha1.hexdigest(),
+                modo, str(origen),
+            )
+        else:
+            columnar.abortar()
+        if existentes is not None:
+            guardar_claves(destino, clave, existentes)
+    except BaseException:
+        # el CSV vuelve a su largo anterior; lo que alcanzó a publicarse queda viejo
+        os.truncate(destino, inicio)
+        columnar.abortar()
+        # salvo el manifest: las lecturas no lo rehacen y describe justo ese contenido
+        restaurar_particiones(destino, previo)
+        raise
+
+    return ResultadoIngesta(
+        ruta=str(destino), filas=filas, columnas=columnas,
+        preview=leer_primeras(destino), descartadas=descartadas,
+        duplicadas=duplicadas, total=columnar.filas, huella=particiones["huella"],
+    )
@@ -0,0 +1,161 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+import csv, io, re
+import pandas as pd
+
+from .limpieza import a_numero, reparar_porcentaje
+
+MUESTRA_BYTES = 16 * 1024
+_UMBRAL_NUMERICO = 0.9
+
+_RE_PORCENTAJE = re.compile(r"^-?[\d.,]+\s*%$")
+_RE_COMA_DECIMAL = re.compile(r"^-?\d+,\d+$")
+_RE_PUNTO_DECIMAL = re.compile(r"^-?\d+\.\d+$")
+_RE_MILES_PUNTO = re.compile(r"^-?\d{1,3}(\.\d{3})+(,\d+)?$")
+_RE_MILES_COMA = re.compile(r"^-?\d{1,3}(,\d{3})+(\.\d+)?$")
+
+
+@dataclass
+class Dialecto:
+    sep: str = ","
+    decimal: str = "."
+    miles: str | None = None
+    tipos: dict[str, str] = field(default_factory=dict)  # "numero" | "porcentaje" | "texto"
+
+    def columnas(self, tipo: str) -> list[str]:
+        return [c for c, t in self.tipos.items() if t == tipo]
+
+
+@dataclass
+class LecturaCSV:
+    df: pd.DataFrame
+    dialecto: Dialecto
+    cuarentena: pd.DataFrame  # fila, columna, valor de las celdas que no se pudieron convertir
+
+
+def _muestra(ruta: Path, muestra_bytes: int) -> str:
+    with open(ruta, "r", encoding="utf-8", errors="replace", newline="") as f:
+        texto = f.read(muestra_bytes)
+        completo = len(texto) < muestra_bytes
+    if not completo and "\n" in texto:
+        texto = texto[: texto.rindex("\n") + 1]
+    return texto
+
+
+def detectar_separador(ruta: Path) -> str:
+    return _separador(_muestra(Path(ruta), MUESTRA_BYTES))
+
+
+def _separador(muestra: str) -> str:
+    # el Sniffer es lento con muestras grandes; unas pocas líneas bastan
+    primeras = "".join(muestra.splitlines(keepends=True)[:20])
+    try:
+        return csv.Sniffer().sniff(primeras, delimiters=",;\t|").delimiter
+    except csv.Error:
+        encabezado = muestra.split("\n", 1)[0]
+        return ";" if encabezado.count(";") > encabezado.count(",") else ","
+
+
+def leer_primeras(ruta: Path, filas: int = 10) -> pd.DataFrame:
+    """Las primeras ``filas`` tal como están escritas en el CSV, sin convertir."""
+    ruta = Path(ruta)
+    df = pd.read_csv(
+        ruta, sep=detectar_separador(ruta), nrows=filas, dtype=str, keep_default_na=False,
+    )
+    df.columns = [str(c).strip() for c in df.columns]
+    return df
+
+
+def _patron_numero(decimal: str, miles: str | None) -> re.Pattern:
+    d = re.escape(decimal)
+    entero = r"\d+" if miles is None else rf"(\d{{1,3}}({re.escape(miles)}\d{{3}})+|\d+)"
+    return re.compile(rf"^-?{entero}({d}\d+)?([eE][-+]?\d+)?$")
+
+
+def detectar_dialecto(ruta: Path, muestra_bytes: int = MUESTRA_BYTES) -> Dialecto:
+    """Decide separador, marca decimal, marca de miles y tipo de cada columna
+    leyendo solo los primeros ``muestra_bytes`` del archivo."""
+    muestra = _muestra(Path(ruta), muestra_bytes)
+    sep = _separador(muestra)
+    filas = list(csv.reader(io.StringIO(muestra), delimiter=sep))
+    if not filas:
+        return Dialecto(sep=sep)
+    encabezado = [c.strip() for c in filas[0]]
+    valores = {c: [] for c in encabezado}
+    for fila in filas[1:]:
+        for c, v in zip(encabezado, fila):
+            v = v.strip()
+            if v:
+                valores[c].append(v)
+
+    todos = [v for vs in valores.values() for v in vs if not v.endswith("%")]
+    coma = sum(1 for v in todos if _RE_COMA_DECIMAL.match(v))
+    punto = sum(1 for v in todos if _RE_PUNTO_DECIMAL.match(v))
+    decimal = "," if coma > punto else "."
+    miles = None
+    if decimal == "," and any(_RE_MILES_PUNTO.match(v) for v in todos):
+        miles = "."
+    elif decimal == "." and sep != "," and any(_RE_MILES_COMA.match(v) for v in todos):
+        miles = ","
+
+    patron = _patron_numero(decimal, miles)
+    tipos = {}
+    for c, vs in valores.items():
+        if vs and sum(1 for v in vs if _RE_PORCENTAJE.match(v)) >= _UMBRAL_NUMERICO * len(vs):
+            tipos[c] = "porcentaje"
+        elif vs and sum(1 for v in vs if patron.match(v)) >= _UMBRAL_NUMERICO * len(vs):
+            tipos[c] = "numero"
+        else:
+            tipos[c] = "texto"
+    return Dialecto(sep=sep, decimal=decimal, miles=miles, tipos=tipos)
+
+
+def _celdas_fallidas(original: pd.Series, convertida: pd.Series, columna: str) -> pd.DataFrame:
+    texto = original.astype("string").str.strip()
+    malas = convertida.isna() & texto.notna() & (texto != "")
+    return pd.DataFrame({
+        "fila": original.index[malas.to_numpy()],
+        "columna": columna,
+        "valor": texto[malas].astype(object).to_numpy(),
+    })
+
+
+def leer_csv(ruta: Path, dialecto: Dialecto | None = None) -> LecturaCSV:
+    """Lee el CSV en una sola pasada con el dialecto detectado.
+
+    Las columnas numéricas terminan en int64/float64 y los porcentajes reparados;
+    las celdas que no se pueden convertir quedan NaN y se listan en ``cuarentena``.
+    """
+    ruta = Path(ruta)
+    dialecto = dialecto or detectar_dialecto(ruta)
+    como_texto = {c: str for c, t in dialecto.tipos.items() if t != "numero"}
+    df = pd.read_csv(
+        ruta, sep=dialecto.sep, decimal=dialecto.decimal, thousands=dialecto.miles,
+        dtype=como_texto or None,
+    )
+    df.columns = [str(c).strip() for c in df.columns]
+
+    cuarentena = []
+    for c in dialecto.columnas("numero"):
+        if c in df.columns and not pd.api.types.is_numeric_dtype(df[c]):
+            # alguna celda fuera de la muestra no es número: se convierte lo que se pueda
+            texto = df[c].astype("string")
+            if dialecto.miles:
+                texto = texto.str.replace(dialecto.miles, "", regex=False)
+            convertida = a_numero(texto)
+            cuarentena.append(_celdas_fallidas(df[c], convertida, c))
+            df[c] = convertida
+    for c in dialecto.columnas("porcentaje"):
+        if c in df.columns:
+            convertida = reparar_porcentaje(df[c])
+            cuarentena.append(_celdas_fallidas(df[c], convertida, c))
+            df[c] = convertida
+
+    cuarentena = [q for q in cuarentena if len(q)]
+    return LecturaCSV(
+        df=df,
+        dialecto=dialecto,
+        cuarentena=(pd.concat(cuarentena, ignore_index=True) if cuarentena
+                    else pd.DataFrame(columns=["fila", "columna", "valor"])),
+    )
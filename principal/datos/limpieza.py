@@ -0,0 +1,106 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+# columna del CSV -> nombre usado por el modelo (metadata.json)
+COLUMNAS_MODELO = {
+    "Genero": "Genero",
+    "Peso (kg)": "Peso_kg",
+    "Altura (m)": "Altura_m",
+    "Promedio_LATIDOS_POR_MINUTO": "Promedio_Latidos",
+    "Reposo_LATIDOS_POR_MINUTO": "Reposo_Latidos",
+    "Duracion_Sesion (horas)": "Duracion_Sesion_horas",
+    "Agua (litros)": "Agua_Litros",
+    "Frecuencia (dias/semanal)": "Frecuencia",
+    "Porcentaje_Grasa": "Porcentaje_Grasa",
+    "Tipo_Entrenamiento": "Tipo_Entrenamiento",
+}
+CATEGORICAS = ["Genero", "Tipo_Entrenamiento", "Nivel_Experiencia"]
+PORCENTAJES = ["Porcentaje_Grasa"]
+
+# valores del CSV -> opciones de PredictionForm
+GENERO = {"Female": "F", "Male": "M", "F": "F", "M": "M"}
+TIPO_ENTRENAMIENTO = {
+    "Cardio": "Cardio",
+    "Strength": "Fuerza",
+    "HIIT": "Mixto",
+    "Yoga": "Movilidad",
+    "Fuerza": "Fuerza",
+    "Mixto": "Mixto",
+    "Movilidad": "Movilidad",
+}
+
+_RANGO_PORCENTAJE = (3.0, 60.0)
+
+
+def a_numero(serie: pd.Series) -> pd.Series:
+    """Convierte texto con coma decimal (``"64,0"``) a float64; lo inválido queda NaN."""
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype("float64")
+    if not pd.api.types.is_string_dtype(serie):
+        serie = serie.astype("string")
+    # to_numeric ya ignora espacios alrededor del número
+    texto = serie.str.replace(",", ".", regex=False)
+    return pd.to_numeric(texto, errors="coerce").astype("float64")
+
+
+def reparar_porcentaje(serie: pd.Series) -> pd.Series:
+    """Recupera porcentajes que perdieron el separador decimal al pasar por Excel.
+
+    ``"2684321536060490000%"`` era ``26.84...`` y ``"3500%"`` era ``35.00``: se
+    reinsertan dos dígitos enteros (o uno si así no cae en 3–60).
+    """
+    if not pd.api.types.is_string_dtype(serie):
+        serie = serie.astype("string")
+    texto = serie.str.strip().str.rstrip("%")
+    valores = a_numero(texto).to_numpy(copy=True)
+    largo = texto.str.len().to_numpy(dtype="float64", na_value=np.nan)
+    con_separador = texto.str.contains(r"[.,]", regex=True).to_numpy(dtype=bool, na_value=True)
+    sin_separador = ~con_separador & (largo >= 3) & ~np.isnan(valores)
+    if sin_separador.any():
+        digitos = valores[sin_separador]
+        n = largo[sin_separador]
+        dos = digitos / 10.0 ** (n - 2)
+        uno = digitos / 10.0 ** (n - 1)
+        bajo, alto = _RANGO_PORCENTAJE
+        valores[sin_separador] = np.where((dos >= bajo) & (dos <= alto), dos, uno)
+    return pd.Series(valores, index=serie.index, name=serie.name)
+
+
+def _normalizar_texto(col: str, serie: pd.Series) -> pd.Series:
+    valores = serie.astype("string").str.strip().replace("", pd.NA)
+    if col == "Genero":
+        valores = valores.map(lambda v: GENERO.get(v, v), na_action="ignore")
+    elif col == "Tipo_Entrenamiento":
+        valores = valores.map(lambda v: TIPO_ENTRENAMIENTO.get(v, v), na_action="ignore")
+    return valores.astype("string")
+
+
+def _normalizar_numero(col: str, serie: pd.Series) -> pd.Series:
+    return reparar_porcentaje(serie) if col in PORCENTAJES else a_numero(serie)
+
+
+def normalizar_dataset(df: pd.DataFrame, numericas: set[str] | None = None) -> pd.DataFrame:
+    """Devuelve una copia tipada: numéricas a float64, porcentajes reparados y
+    categorías traducidas a las opciones del formulario.
+
+    ``numericas`` fija qué columnas son numéricas (para que todos los bloques de
+    un archivo tengan los mismos tipos); sin él se infiere del propio ``df``.
+    """
+    out = {}
+    for col in df.columns:
+        if numericas is not None:
+            es_numero = col in numericas
+        elif col in PORCENTAJES:
+            es_numero = True
+        elif col in CATEGORICAS:
+            es_numero = False
+        else:
+            numero = a_numero(df[col])
+            # columnas de texto libre se conservan como texto
+            es_numero = numero.notna().sum() >= df[col].replace("", pd.NA).notna().sum()
+        if es_numero:
+            out[col] = _normalizar_numero(col, df[col])
+        else:
+            out[col] = _normalizar_texto(col, df[col])
+    return pd.DataFrame(out, index=df.index)
@@ -0,0 +1,259 @@
+"""Particiones del CSV del dataset y su índice de claves.
+
+Una carga en modo ``agregar`` o ``fusionar`` no reescribe ``Final_data.csv``:
+sus filas se añaden al final como una partición nueva (rango de bytes, filas
+y SHA-1). El manifest queda en ``Final_data.particiones.json`` y, como las
+demás copias derivadas, está atado al mtime/tamaño del CSV.
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+import hashlib, json, os, tempfile, threading
+import numpy as np
+import pandas as pd
+
+from .columnar import _firma, cargar_dataset, manifest_vigente
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se serializa dentro del proceso
+    fcntl = None
+
+REEMPLAZAR = "reemplazar"
+AGREGAR = "agregar"
+FUSIONAR = "fusionar"
+MODOS = (REEMPLAZAR, AGREGAR, FUSIONAR)
+
+_SUFIJO = ".particiones.json"
+_SUFIJO_CLAVES = ".claves.npz"
+_VERSION = 1
+_LOCK = threading.RLock()
+_TOMADOS: dict[str, int] = {}  # CSV -> profundidad del bloqueo en el hilo que lo tiene
+
+
+def _ruta(ruta_csv: Path, sufijo: str = _SUFIJO) -> Path:
+    ruta_csv = Path(ruta_csv)
+    return ruta_csv.with_name(ruta_csv.stem + sufijo)
+
+
+def sha1_rango(ruta: Path, inicio: int = 0, fin: int | None = None) -> str:
+    h = hashlib.sha1()
+    with open(ruta, "rb") as f:
+        f.seek(inicio)
+        restante = None if fin is None else fin - inicio
+        while restante is None or restante > 0:
+            bloque = f.read(1 << 20 if restante is None else min(1 << 20, restante))
+            if not bloque:
+                break
+            h.update(bloque)
+            if restante is not None:
+                restante -= len(bloque)
+    return h.hexdigest()
+
+
+def _encadenar(huella: str, sha1: str) -> str:
+    # la huella del dataset cambia con cada partición sin releer las anteriores
+    return hashlib.sha1(f"{huella}:{sha1}".encode()).hexdigest()
+
+
+def _ahora() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _escribir_json(destino: Path, datos: dict) -> None:
+    fd, tmp = tempfile.mkstemp(dir=destino.parent, prefix=f".{destino.name}.")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, destino)
+
+
+def _leer(ruta_csv: Path) -> dict | None:
+    try:
+        with open(_ruta(ruta_csv), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != _VERSION or manifest["firma_csv"] != _firma(ruta_csv):
+            return None
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+    return manifest
+
+
+def _manifest_unico(ruta_csv: Path, filas: int | None, sha1: str, origen: str = "") -> dict:
+    tamano = ruta_csv.stat().st_size
+    return {
+        "version": _VERSION,
+        "csv": ruta_csv.name,
+        "firma_csv": _firma(ruta_csv),
+        "huella": sha1,
+        "filas": filas,
+        "bytes": tamano,
+        "particiones": [{
+            "id": 0, "modo": REEMPLAZAR, "origen": Path(origen).name if origen else ruta_csv.name,
+            "inicio": 0, "fin": tamano, "filas": filas, "sha1": sha1, "creado": _ahora(),
+        }],
+    }
+
+
+def reiniciar_particiones(ruta_csv: Path, filas: int | None, sha1: str, origen: str = "") -> dict:
+    """Manifest con una sola partición que cubre todo el CSV (tras reemplazarlo)."""
+    ruta_csv = Path(ruta_csv)
+    manifest = _manifest_unico(ruta_csv, filas, sha1, origen)
+    _escribir_json(_ruta(ruta_csv), manifest)
+    return manifest
+
+
+def agregar_particion(
+    ruta_csv: Path, previo: dict, inicio: int, fin: int, filas: int, sha1: str,
+    modo: str, origen: str = "",
+) -> dict:
+    """Añade al manifest ``previo`` la partición recién escrita en ``[inicio, fin)``."""
+    ruta_csv = Path(ruta_csv)
+    particion = {
+        "id": previo["particiones"][-1]["id"] + 1, "modo": modo, "origen": Path(origen).name,
+        "inicio": inicio, "fin": fin, "filas": filas, "sha1": sha1, "creado": _ahora(),
+    }
+    manifest = {
+        **previo,
+        "firma_csv": _firma(ruta_csv),
+        "huella": _encadenar(previo["huella"], sha1),
+        "filas": None if previo["filas"] is None else previo["filas"] + filas,
+        "bytes": fin,
+        "particiones": previo["particiones"] + [particion],
+    }
+    _escribir_json(_ruta(ruta_csv), manifest)
+    return manifest
+
+
+def restaurar_particiones(ruta_csv: Path, previo: dict) -> dict:
+    """Vuelve a publicar ``previo`` tras recortar el CSV a su largo anterior.
+
+    El contenido es el mismo que describe ``previo``; solo cambió la firma.
+    """
+    ruta_csv = Path(ruta_csv)
+    manifest = {**previo, "firma_csv": _firma(ruta_csv)}
+    _escribir_json(_ruta(ruta_csv), manifest)
+    return manifest
+
+
+def manifest_particiones(ruta_csv: Path) -> dict | None:
+    """Manifest vigente, o ``None`` si falta o el CSV cambió por fuera.
+
+    Solo lee: el manifest lo escriben la ingesta y ``asegurar_particiones``
+    (desde la migración 0006 o al anexar), nunca una lectura.
+    """
+    return _leer(Path(ruta_csv))
+
+
+def asegurar_particiones(ruta_csv: Path) -> dict:
+    """Manifest vigente; si falta, uno con una sola partición que cubre todo el CSV.
+
+    Crearlo relee el CSV entero para su SHA-1: es para caminos de escritura y
+    toma el bloqueo del CSV (reentrante si quien llama ya lo tiene).
+    """
+    ruta_csv = Path(ruta_csv)
+    with bloqueo(ruta_csv):
+        manifest = _leer(ruta_csv)
+        if manifest is not None:
+            return manifest
+        columnar = manifest_vigente(ruta_csv)
+        filas = columnar["filas"] if columnar is not None else None
+        return reiniciar_particiones(ruta_csv, filas, sha1_rango(ruta_csv))
+
+
+def huella_dataset(ruta_csv: Path) -> str | None:
+    """Huella del contenido según el manifest vigente; ``None`` si no hay (no relee el CSV)."""
+    manifest = _leer(Path(ruta_csv))
+    return manifest["huella"] if manifest is not None else None
+
+
+def verificar_particiones(ruta_csv: Path) -> list[dict]:
+    """Recalcula el SHA-1 de cada partición y lo compara con el del manifest."""
+    manifest = _leer(ruta_csv)
+    if manifest is None:
+        return []
+    resultado = []
+    for p in manifest["particiones"]:
+        sha1 = sha1_rango(ruta_csv, p["inicio"], p["fin"])
+        resultado.append({"id": p["id"], "ok": sha1 == p["sha1"], "sha1": sha1})
+    return resultado
+
+
+@contextmanager
+def bloqueo(ruta_csv: Path, esperar: bool = True):
+    """Serializa las escrituras del CSV entre hilos y, donde se puede, entre procesos.
+
+    Es reentrante dentro del mismo hilo. Con ``esperar=False`` no se queda
+    esperando: entrega ``False`` si otra escritura lo tiene y ``True`` si lo tomó.
+    """
+    ruta_csv = Path(ruta_csv)
+    if not _LOCK.acquire(blocking=esperar):
+        yield False
+        return
+    clave = str(ruta_csv.absolute())
+    try:
+        if clave in _TOMADOS:
+            _TOMADOS[clave] += 1
+            try:
+                yield True
+            finally:
+                _TOMADOS[clave] -= 1
+            return
+        ruta_csv.parent.mkdir(parents=True, exist_ok=True)
+        with open(ruta_csv.with_name(f".{ruta_csv.name}.lock"), "a") as f:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX if esperar else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield False
+                    return
+            _TOMADOS[clave] = 1
+            try:
+                yield True
+            finally:
+                del _TOMADOS[clave]
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+    finally:
+        _LOCK.release()
+
+
+def hash_filas(df: pd.DataFrame, columnas) -> np.ndarray:
+    """Hash uint64 por fila de ``columnas`` sobre el dataset tipado.
+
+    Texto y categorías se comparan por su valor, así da lo mismo que el bloque
+    venga de ``normalizar_dataset`` o de la copia columnar.
+    """
+    partes = {}
+    for col in columnas:
+        serie = df[col]
+        if pd.api.types.is_float_dtype(serie):
+            partes[col] = serie.to_numpy(dtype="float64", na_value=np.nan)
+        else:
+            partes[col] = serie.astype(object).where(serie.notna(), "").astype(str).to_numpy()
+    return pd.util.hash_pandas_object(pd.DataFrame(partes), index=False).to_numpy()
+
+
+def cargar_claves(ruta_csv: Path, columnas) -> np.ndarray:
+    """Hashes ordenados de las claves ya presentes en el dataset."""
+    columnas = list(columnas)
+    try:
+        with np.load(_ruta(ruta_csv, _SUFIJO_CLAVES)) as npz:
+            if list(npz["firma"]) == _firma(ruta_csv) and list(npz["columnas"]) == columnas:
+                return npz["hashes"]
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+    return np.unique(hash_filas(cargar_dataset(ruta_csv, columnas), columnas))
+
+
+def guardar_claves(ruta_csv: Path, columnas, hashes: np.ndarray) -> None:
+    destino = _ruta(ruta_csv, _SUFIJO_CLAVES)
+    fd, tmp = tempfile.mkstemp(dir=destino.parent, prefix=f".{destino.stem}.", suffix=".npz")
+    with os.fdopen(fd, "wb") as f:
+        np.savez(
+            f, hashes=hashes, firma=np.asarray(_firma(ruta_csv), dtype="int64"),
+            columnas=np.asarray(list(columnas), dtype=str),
+        )
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, destino)
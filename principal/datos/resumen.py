@@ -0,0 +1,161 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+import threading
+import pandas as pd
+from django.conf import settings
+
+from principal.metricas import span
+
+from .columnar import manifest_vigente
+from .lectura import leer_csv, leer_primeras
+from .particiones import huella_dataset
+
+DATASET_PATH = Path(settings.DATA_DIR) / "Final_data.csv"
+
+_CACHE_PREFIX = "principal:dataset_resumen:"
+_LOCK = threading.Lock()
+_RESUMENES: dict[str, tuple[tuple[int, int], "ResumenDataset"]] = {}
+
+
+@dataclass(frozen=True)
+class ResumenDataset:
+    ruta: str
+    filas: int
+    cols: int
+    columnas: tuple[str, ...]
+    preview_html: str
+    preview_texto: str
+    sha1: str
+
+    @property
+    def cols_str(self) -> str:
+        return ", ".join(self.columnas[:15])
+
+
+def leer_csv_con_fallback(ruta: Path) -> pd.DataFrame:
+    # el dialecto (separador, decimales) se detecta antes: una sola pasada
+    return leer_csv(ruta).df
+
+
+def _firma(ruta: Path) -> tuple[int, int]:
+    st = ruta.stat()
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _leer_resumen(ruta: Path) -> tuple[int, list, pd.DataFrame]:
+    """Forma, columnas y primeras filas.
+
+    Filas y columnas salen de la copia columnar si está al día (leer no la
+    reconstruye: si está vieja se lee el CSV); la vista previa siempre del
+    CSV, con los valores tal como están escritos.
+    """
+    manifest = manifest_vigente(ruta)
+    if manifest is not None:
+        return (manifest["filas"], [c["nombre"] for c in manifest["columnas"]], leer_primeras(ruta))
+    df = leer_csv_con_fallback(ruta)
+    return (df.shape[0], list(df.columns), leer_primeras(ruta))
+
+
+def _huella(ruta: Path, firma: tuple[int, int]) -> str:
+    # sin manifest al día no se relee el CSV: mtime y tamaño hacen de clave
+    return huella_dataset(ruta) or "firma-{}-{}".format(*firma)
+
+
+def _usar_cache_django() -> bool:
+    return bool(getattr(settings, "DATASET_RESUMEN_CACHE", False))
+
+
+def _cache_django():
+    from django.core.cache import cache
+    return cache
+
+
+def _construir(ruta: Path, filas: int, columnas, head: pd.DataFrame, sha1: str) -> ResumenDataset:
+    return ResumenDataset(
+        ruta=str(ruta),
+        filas=int(filas),
+        cols=len(columnas),
+        columnas=tuple(map(str, columnas)),
+        preview_html=head.head(10).to_html(
+            classes="table table-sm table-striped", index=False
+        ),
+        preview_texto=head.head(5).to_string(index=False),
+        sha1=sha1,
+    )
+
+
+def resumen_dataset(ruta: Path | None = None) -> ResumenDataset | None:
+    """Resumen (forma, columnas y vista previa) del CSV, cacheado por mtime/tamaño/huella.
+
+    Devuelve ``None`` si el archivo no existe. Los errores de lectura se propagan.
+    """
+    ruta = Path(ruta or DATASET_PATH)
+    try:
+        firma = _firma(ruta)
+    except FileNotFoundError:
+        return None
+
+    clave = str(ruta)
+    actual = _RESUMENES.get(clave)
+    if actual is not None and actual[0] == firma:
+        return actual[1]
+
+    with _LOCK:
+        actual = _RESUMENES.get(clave)
+        if actual is not None and actual[0] == firma:
+            return actual[1]
+
+        sha1 = _huella(ruta, firma)
+        resumen = None
+        if _usar_cache_django():
+            resumen = _cache_django().get(_CACHE_PREFIX + sha1)
+        if resumen is None:
+            with span("leer_csv"):
+                resumen = _construir(ruta, *_leer_resumen(ruta), sha1)
+            if _usar_cache_django():
+                _cache_django().set(_CACHE_PREFIX + sha1, resumen, None)
+        _RESUMENES[clave] = (firma, resumen)
+        return resumen
+
+
+def registrar_resumen(
+    ruta: Path, filas: int, columnas, head: pd.DataFrame, sha1: str | None = None,
+) -> ResumenDataset:
+    """Guarda el resumen de un archivo recién escrito en ``ruta`` sin volver a leerlo."""
+    ruta = Path(ruta)
+    with _LOCK:
+        sha1 = sha1 or _huella(ruta, _firma(ruta))
+        resumen = _construir(ruta, filas, columnas, head, sha1)
+        _RESUMENES[str(ruta)] = (_firma(ruta), resumen)
+        if _usar_cache_django():
+            _cache_django().set(_CACHE_PREFIX + sha1, resumen, None)
+        return resumen
+
+
+def estado_resumen(ruta: Path | None = None) -> dict:
+    """Si el resumen en memoria corresponde al archivo actual, sin leerlo."""
+    ruta = Path(ruta or DATASET_PATH)
+    try:
+        firma = _firma(ruta)
+    except FileNotFoundError:
+        firma = None
+    actual = _RESUMENES.get(str(ruta))
+    return {
+        "ruta": str(ruta),
+        "existe": firma is not None,
+        "en_cache": actual is not None,
+        "vigente": actual is not None and actual[0] == firma,
+        "sha1": actual[1].sha1 if actual is not None else None,
+        "filas": actual[1].filas if actual is not None else None,
+        "columnar": firma is not None and manifest_vigente(ruta) is not None,
+        "modificado": firma[0] / 1e9 if firma is not None else None,
+    }
+
+
+def invalidar_resumen(ruta: Path | None = None) -> None:
+    with _LOCK:
+        if ruta is None:
+            _RESUMENES.clear()
+        else:
+            _RESUMENES.pop(str(Path(ruta)), None)
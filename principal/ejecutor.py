@@ -0,0 +1,72 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio, contextvars, threading
+
+from django.conf import settings
+
+from .metricas import REGISTRO as METRICAS
+
+
+class ColaLlena(RuntimeError):
+    """No hay cupo en el pool de inferencia; la vista responde 503."""
+
+
+_LOCK = threading.Lock()
+_EJECUTOR: ThreadPoolExecutor | None = None
+_CUPOS: threading.BoundedSemaphore | None = None
+_CAPACIDAD = 0
+_EN_USO = 0
+
+
+def _ejecutor() -> tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+    global _EJECUTOR, _CUPOS, _CAPACIDAD
+    if _EJECUTOR is None:
+        with _LOCK:
+            if _EJECUTOR is None:
+                hilos = max(1, int(getattr(settings, "INFERENCIA_HILOS", 16)))
+                _CAPACIDAD = hilos + max(0, int(getattr(settings, "INFERENCIA_COLA", 64)))
+                _CUPOS = threading.BoundedSemaphore(_CAPACIDAD)
+                _EJECUTOR = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="inferencia")
+    return (_EJECUTOR, _CUPOS)
+
+
+async def fuera_del_loop(fn, *args, **kwargs):
+    """Ejecuta ``fn`` en el pool de inferencia sin bloquear el event loop.
+
+    El pool admite ``INFERENCIA_HILOS`` tareas corriendo más ``INFERENCIA_COLA``
+    esperando; por encima de eso lanza ``ColaLlena`` en vez de encolar. Las
+    etapas de ``metricas.span`` se siguen sumando a la solicitud que llamó.
+    """
+    ejecutor, cupos = _ejecutor()
+    if not cupos.acquire(blocking=False):
+        METRICAS.incrementar("salud_rechazos_total", "cola_llena")
+        raise ColaLlena("El pool de inferencia está lleno.")
+    _contar(1)
+    ctx = contextvars.copy_context()
+    try:
+        futuro = ejecutor.submit(partial(ctx.run, fn, *args, **kwargs))
+    except BaseException:
+        _liberar(cupos)
+        raise
+    # el cupo se libera cuando termina el hilo, aunque el cliente se haya ido
+    futuro.add_done_callback(lambda _: _liberar(cupos))
+    return await asyncio.wrap_future(futuro)
+
+
+def _contar(delta: int) -> None:
+    global _EN_USO
+    with _LOCK:
+        _EN_USO += delta
+
+
+def _liberar(cupos: threading.BoundedSemaphore) -> None:
+    _contar(-1)
+    cupos.release()
+
+
+def ocupacion() -> dict:
+    if _CUPOS is None:
+        return {"en_uso": 0, "capacidad": None}
+    with _LOCK:
+        return {"en_uso": _EN_USO, "capacidad": _CAPACIDAD}
@@ -2,10 +2,24 @@ from django import forms
 
 
 class DatasetUploadForm(forms.Form):
+    MODO_CHOICES = [
+        ('reemplazar', 'Reemplazar el dataset'),
+        ('agregar', 'Agregar las filas al final'),
+        ('fusionar', 'Agregar solo las filas nuevas (sin duplicados)'),
+    ]
+
     archivo = forms.FileField(
         label="Selecciona tu dataset (CSV o XLSX)",
         help_text="Se guardará como data/Final_data.csv"
     )
+    modo = forms.ChoiceField(
+        choices=MODO_CHOICES, initial='reemplazar', label="Modo", required=False,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    reentrenar = forms.BooleanField(
+        label="Reentrenar el modelo al terminar",
+        required=False
+    )
 
     def clean_archivo(self):
         f = self.cleaned_data['archivo']
@@ -15,6 +29,17 @@ class DatasetUploadForm(forms.Form):
         return f
 
 
+def _errores_latidos(cleaned) -> dict[str, str]:
+    prom = cleaned.get('promedio_latidos')
+    rep = cleaned.get('reposo_latidos')
+    if prom is not None and rep is not None and prom <= rep:
+        return {
+            'promedio_latidos':
+                'El promedio de latidos debe ser mayor que los latidos en reposo.'
+        }
+    return {}
+
+
 class PredictionForm(forms.Form):
     GENERO_CHOICES = [('M', 'Masculino'), ('F', 'Femenino')]
     TIPO_CHOICES = [
@@ -84,13 +109,8 @@ class PredictionForm(forms.Form):
 
     def clean(self):
         cleaned = super().clean()
-        prom = cleaned.get('promedio_latidos')
-        rep = cleaned.get('reposo_latidos')
-        if prom is not None and rep is not None and prom <= rep:
-            self.add_error(
-                'promedio_latidos',
-                'El promedio de latidos debe ser mayor que los latidos en reposo.'
-            )
+        for campo, mensaje in _errores_latidos(cleaned).items():
+            self.add_error(campo, mensaje)
         return cleaned
     
     def to_dataset_row(self):
@@ -139,3 +159,33 @@ class ContactForm(forms.Form):
         label="Acepto ser contactad@ para recibir respuesta",
         required=True
     )
+
+
+def validar_lote(registros) -> tuple[list[dict], dict[int, dict]]:
+    """Valida cada registro con los campos de ``PredictionForm``.
+
+    Devuelve los ``cleaned_data`` válidos (en orden) y los errores por índice
+    del registro original, con el formato de ``form.errors.get_json_data()``.
+    Se llama a ``clean()`` de cada campo en vez de construir un formulario por
+    registro: construirlo copia todos los campos y con lotes grandes eso es lo
+    que más cuesta.
+    """
+    campos = PredictionForm.base_fields
+    validos, errores = [], {}
+    for i, registro in enumerate(registros):
+        limpio, fallas = {}, {}
+        for nombre, campo in campos.items():
+            try:
+                limpio[nombre] = campo.clean(registro.get(nombre))
+            except forms.ValidationError as e:
+                fallas[nombre] = [
+                    {"message": next(iter(error)), "code": error.code or ""}
+                    for error in e.error_list
+                ]
+        for nombre, mensaje in _errores_latidos(limpio).items():
+            fallas.setdefault(nombre, []).append({"message": mensaje, "code": ""})
+        if fallas:
+            errores[i] = fallas
+        else:
+            validos.append(limpio)
+    return validos, errores
@@ -0,0 +1,179 @@
+from __future__ import annotations
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .lotes import EscritorPorLotes, registrar
+from .models import Prediccion, ResumenPredicciones
+
+SALUDABLE = "Saludable"
+
+_ESCRITOR = None
+
+
+class EscritorHistorial(EscritorPorLotes):
+    """Guarda las predicciones y suma el lote a ``ResumenPredicciones`` en la misma transacción."""
+
+    def _persistir(self, lote: list) -> None:
+        super()._persistir(lote)
+        acumular_resumen(lote)
+
+
+def acumular_resumen(predicciones) -> None:
+    grupos: dict[tuple, list] = {}
+    for p in predicciones:
+        clave = (timezone.localdate(p.creado), p.tipo_entrenamiento, p.version_modelo)
+        g = grupos.setdefault(clave, [0, 0, 0, 0.0, 0.0])
+        g[0] += 1
+        g[1] += p.etiqueta == SALUDABLE
+        if p.probabilidad is not None:
+            g[2] += 1
+            g[3] += p.probabilidad
+        g[4] += p.latencia_ms
+    for (dia, tipo, version), (total, saludables, con_p, suma_p, suma_lat) in grupos.items():
+        clave = {"dia": dia, "tipo_entrenamiento": tipo, "version_modelo": version}
+        actualizados = ResumenPredicciones.objects.filter(**clave).update(
+            total=F("total") + total,
+            saludables=F("saludables") + saludables,
+            con_probabilidad=F("con_probabilidad") + con_p,
+            suma_probabilidad=F("suma_probabilidad") + suma_p,
+            suma_latencia_ms=F("suma_latencia_ms") + suma_lat,
+        )
+        if not actualizados:
+            # si otro proceso la crea antes, falla el lote entero y se reintenta
+            ResumenPredicciones.objects.create(
+                **clave, total=total, saludables=saludables, con_probabilidad=con_p,
+                suma_probabilidad=suma_p, suma_latencia_ms=suma_lat,
+            )
+
+
+def reconstruir_resumen() -> int:
+    """Recalcula ``ResumenPredicciones`` desde cero (p. ej. tras cargar predicciones a mano)."""
+    filas = (
+        Prediccion.objects.annotate(dia=TruncDate("creado"))
+        .values("dia", "tipo_entrenamiento", "version_modelo")
+        .annotate(
+            total=Count("id"),
+            saludables=Count("id", filter=Q(etiqueta=SALUDABLE)),
+            con_probabilidad=Count("probabilidad"),
+            suma_probabilidad=Sum("probabilidad", default=0.0),
+            suma_latencia_ms=Sum("latencia_ms", default=0.0),
+        )
+        .order_by()
+    )
+    with transaction.atomic():
+        ResumenPredicciones.objects.all().delete()
+        creados = ResumenPredicciones.objects.bulk_create(
+            [ResumenPredicciones(**f) for f in filas], batch_size=1000
+        )
+    return len(creados)
+
+
+def escritor_historial() -> EscritorPorLotes:
+    global _ESCRITOR
+    if _ESCRITOR is None:
+        _ESCRITOR = registrar(EscritorHistorial(
+            Prediccion,
+            tamano=int(getattr(settings, "HISTORIAL_LOTE", 200)),
+            intervalo=float(getattr(settings, "HISTORIAL_INTERVALO", 2.0)),
+        ))
+    return _ESCRITOR
+
+
+def registrar_prediccion(
+    fila: dict, etiqueta: str, probabilidad: float | None, fuente: str, segundos: float,
+) -> Prediccion | None:
+    """Encola la predicción para el historial; ``fila`` es ``PredictionForm.to_dataset_row()``."""
+    if not getattr(settings, "HISTORIAL_PREDICCIONES", True):
+        return None
+    from principal import ml
+
+    prediccion = Prediccion(
+        entrada=fila,
+        etiqueta=etiqueta,
+        probabilidad=probabilidad,
+        fuente=fuente,
+        version_modelo=(ml.model_version() or "") if fuente == Prediccion.MODELO else "",
+        latencia_ms=segundos * 1000,
+        genero=fila.get("Genero") or "",
+        tipo_entrenamiento=fila.get("Tipo_Entrenamiento") or "",
+    )
+    escritor_historial().agregar(prediccion)
+    return prediccion
+
+
+_TOTALES = {
+    "total": Sum("total"),
+    "saludables": Sum("saludables"),
+    "con_probabilidad": Sum("con_probabilidad"),
+    "suma_probabilidad": Sum("suma_probabilidad"),
+    "suma_latencia_ms": Sum("suma_latencia_ms"),
+}
+
+
+def _medias(fila: dict) -> dict:
+    total, con_p = fila.pop("total"), fila.pop("con_probabilidad")
+    saludables = fila.pop("saludables")
+    suma_p, suma_lat = fila.pop("suma_probabilidad"), fila.pop("suma_latencia_ms")
+    return {
+        **fila,
+        "total": total,
+        "saludables": saludables,
+        "proporcion_saludable": saludables / total if total else None,
+        "probabilidad_media": suma_p / con_p if con_p else None,
+        "latencia_media_ms": suma_lat / total if total else None,
+    }
+
+
+def _desde(dias: int):
+    return timezone.localdate() - timedelta(days=dias - 1)
+
+
+def saludables_por_dia(dias: int = 30, version: str | None = None) -> list[dict]:
+    """Predicciones y proporción de "Saludable" por día de los últimos ``dias``."""
+    qs = ResumenPredicciones.objects.filter(dia__gte=_desde(dias))
+    if version:
+        qs = qs.filter(version_modelo=version)
+    filas = qs.values("dia").annotate(**_TOTALES).order_by("dia")
+    return [_medias({**f, "dia": f["dia"].isoformat()}) for f in filas]
+
+
+def _por_tipo(qs) -> dict[str, dict]:
+    filas = qs.values("tipo_entrenamiento").annotate(**_TOTALES).order_by()
+    return {f.pop("tipo_entrenamiento"): _medias(f) for f in filas}
+
+
+def deriva_por_tipo(dias: int = 7, version: str | None = None) -> list[dict]:
+    """Por tipo de entrenamiento: últimos ``dias`` frente a los ``dias`` anteriores.
+
+    ``cambio`` es la diferencia en la proporción de "Saludable"; con ``version``
+    se comparan solo predicciones de esa versión del modelo.
+    """
+    qs = ResumenPredicciones.objects.all()
+    if version:
+        qs = qs.filter(version_modelo=version)
+    corte = _desde(dias)
+    reciente = _por_tipo(qs.filter(dia__gte=corte))
+    anterior = _por_tipo(qs.filter(dia__gte=corte - timedelta(days=dias), dia__lt=corte))
+    resultado = []
+    for tipo in sorted(set(reciente) | set(anterior)):
+        r, a = reciente.get(tipo), anterior.get(tipo)
+        cambio = None
+        if r and a and r["proporcion_saludable"] is not None and a["proporcion_saludable"] is not None:
+            cambio = r["proporcion_saludable"] - a["proporcion_saludable"]
+        resultado.append({"tipo_entrenamiento": tipo, "reciente": r, "anterior": a, "cambio": cambio})
+    return resultado
+
+
+def estado_historial() -> dict:
+    escritor = escritor_historial()
+    return {
+        "activo": bool(getattr(settings, "HISTORIAL_PREDICCIONES", True)),
+        "escritos": escritor.escritos,
+        "lotes": escritor.lotes,
+        "pendientes": escritor.pendientes,
+    }
@@ -0,0 +1,101 @@
+from __future__ import annotations
+import atexit, logging, threading
+
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_MAX_PENDIENTES = 10_000
+
+
+class EscritorPorLotes:
+    """Acumula instancias de ``modelo`` y las guarda con ``bulk_create``.
+
+    Se escribe cuando hay ``tamano`` pendientes o cada ``intervalo`` segundos,
+    desde un hilo propio. Con ``tamano <= 1`` cada ``agregar`` guarda en el acto.
+    """
+
+    def __init__(self, modelo, tamano: int = 50, intervalo: float = 1.0):
+        self.modelo = modelo
+        self.tamano = tamano
+        self.intervalo = intervalo
+        self._pendientes = []
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._hilo: threading.Thread | None = None
+        self.escritos = 0
+        self.lotes = 0
+
+    @property
+    def pendientes(self) -> int:
+        return len(self._pendientes)
+
+    def agregar(self, obj) -> None:
+        if self.tamano <= 1:
+            self._guardar([obj])
+            return
+        with self._lock:
+            if len(self._pendientes) >= _MAX_PENDIENTES:
+                logger.error("Buffer de %s lleno; se descarta un registro.", self.modelo.__name__)
+                return
+            self._pendientes.append(obj)
+            lleno = len(self._pendientes) >= self.tamano
+            self._iniciar_hilo()
+        if lleno:
+            self._despertar.set()
+
+    def _iniciar_hilo(self) -> None:
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(
+                target=self._bucle, name=f"lotes-{self.modelo.__name__}", daemon=True
+            )
+            self._hilo.start()
+
+    def _bucle(self) -> None:
+        while True:
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+            close_old_connections()
+            self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            lote, self._pendientes = self._pendientes, []
+        if lote:
+            self._guardar(lote)
+        return len(lote)
+
+    def _persistir(self, lote: list) -> None:
+        """Escribe ``lote`` dentro de la transacción; las subclases pueden sumar más."""
+        self.modelo.objects.bulk_create(lote)
+
+    def _guardar(self, lote: list) -> None:
+        try:
+            with transaction.atomic():
+                self._persistir(lote)
+        except Exception:
+            logger.exception("No se pudieron guardar %d %s", len(lote), self.modelo.__name__)
+            with self._lock:
+                # se reintenta en el próximo ciclo, sin pasar del límite
+                espacio = _MAX_PENDIENTES - len(self._pendientes)
+                self._pendientes[:0] = lote[:max(espacio, 0)]
+            return
+        self.escritos += len(lote)
+        self.lotes += 1
+
+
+_ESCRITORES: list[EscritorPorLotes] = []
+
+
+def registrar(escritor: EscritorPorLotes) -> EscritorPorLotes:
+    _ESCRITORES.append(escritor)
+    return escritor
+
+
+@atexit.register
+def _flush_todos() -> None:
+    for escritor in _ESCRITORES:
+        try:
+            escritor.flush()
+        except Exception:
+            logger.exception("Flush final de %s falló", escritor.modelo.__name__)
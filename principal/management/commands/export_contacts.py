@@ -0,0 +1,46 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from principal.models import MensajeContacto
+
+
+class Command(BaseCommand):
+    help = ("Exporta los mensajes de contacto a CSV (por defecto a la salida estándar). "
+            "Solo incluye lo ya guardado: los workers web escriben sus mensajes pendientes "
+            "cada CONTACTO_INTERVALO segundos y al terminar, no cuando se corre este comando.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--salida", default="-", help="Ruta del CSV o '-' para stdout.")
+        parser.add_argument("--desde", default=None, help="Solo mensajes desde esta fecha (ISO 8601).")
+
+    def handle(self, *args, **opts):
+        qs = MensajeContacto.objects.order_by("creado", "pk")
+        if opts["desde"]:
+            try:
+                desde = parse_datetime(opts["desde"]) or parse_datetime(opts["desde"] + "T00:00:00")
+            except ValueError:
+                desde = None
+            if desde is None:
+                raise CommandError(f"--desde no es una fecha ISO 8601 válida: {opts['desde']!r}")
+            if timezone.is_naive(desde):
+                desde = timezone.make_aware(desde)
+            qs = qs.filter(creado__gte=desde)
+
+        salida = sys.stdout if opts["salida"] == "-" else open(opts["salida"], "w", newline="", encoding="utf-8")
+        try:
+            writer = csv.writer(salida)
+            writer.writerow(["nombre", "correo", "asunto", "mensaje", "creado"])
+            total = 0
+            filas = qs.values_list("nombre", "correo", "asunto", "mensaje", "creado")
+            for nombre, correo, asunto, mensaje, creado in filas.iterator(chunk_size=2000):
+                writer.writerow([nombre, correo, asunto, mensaje, creado.isoformat()])
+                total += 1
+        finally:
+            if salida is not sys.stdout:
+                salida.close()
+        if opts["salida"] != "-":
+            self.stderr.write(self.style.SUCCESS(f"{total} mensajes exportados a {opts['salida']}"))
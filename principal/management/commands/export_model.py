@@ -0,0 +1,49 @@
+import json
+from pathlib import Path
+
+import joblib
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from principal.ml.entrenamiento import exportar_compacto, leer_features
+from principal.ml.predictor import MODEL_PATH, META_PATH, COMPACT_PATH
+
+
+class Command(BaseCommand):
+    help = "Exporta model/vida_saludable_clf.joblib a un .npz evaluable solo con NumPy y verifica la paridad"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model-path", default=str(MODEL_PATH))
+        parser.add_argument("--meta-path", default=str(META_PATH))
+        parser.add_argument("--salida", default=str(COMPACT_PATH))
+        parser.add_argument("--csv", default=str(Path(settings.DATA_DIR) / "Final_data.csv"),
+                            help="Filas contra las que se compara el modelo original.")
+        parser.add_argument("--filas", type=int, default=5000)
+
+    def handle(self, *args, **opts):
+        model_path = Path(opts["model_path"])
+        ruta = Path(opts["csv"])
+        if not model_path.exists():
+            raise CommandError(f"No existe {model_path}")
+        if not ruta.exists():
+            raise CommandError(f"No existe {ruta}; hace falta para verificar la paridad")
+
+        modelo = joblib.load(model_path)
+        origen = None
+        if Path(opts["meta_path"]).exists():
+            with open(opts["meta_path"], encoding="utf-8") as f:
+                origen = json.load(f).get("model_sha1")
+        X, _ = leer_features(ruta)
+        try:
+            paridad = exportar_compacto(modelo, Path(opts["salida"]), X.head(opts["filas"]), origen)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"Paridad sobre {paridad['filas']} filas: diferencia máxima {paridad['max_diferencia']:.2e},"
+            f" etiquetas iguales {paridad['etiquetas_iguales']:.2%}"
+        )
+        if not paridad["ok"]:
+            raise CommandError("El modelo compacto no reproduce al original; no se escribió.")
+        tamano = Path(opts["salida"]).stat().st_size / 2**20
+        self.stdout.write(self.style.SUCCESS(f"Modelo compacto guardado en {opts['salida']} ({tamano:.1f} MB)"))
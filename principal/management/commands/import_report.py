@@ -0,0 +1,94 @@
+import json, os, re, subprocess, sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+# línea de "python -X importtime": self [us] | cumulative [us] | módulo (sangría = anidamiento)
+_LINEA = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+_SCRIPT = """
+import os, resource, time
+t0 = time.perf_counter()
+import django
+from django.conf import settings
+settings.MODEL_WARMUP = {calentar!r}
+django.setup()
+import importlib
+for m in {modulos!r}:
+    importlib.import_module(m)
+print("__REPORTE__", time.perf_counter() - t0, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def _medir(modulos, calentar) -> tuple[list[tuple[str, int, int, int]], float, float]:
+    codigo = _SCRIPT.format(modulos=list(modulos), calentar=calentar)
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get(
+        "DJANGO_SETTINGS_MODULE", "vida_saludable.settings")}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        capture_output=True, text=True, env=env,
+    )
+    if proc.returncode != 0:
+        raise CommandError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "falló la importación")
+
+    filas = []
+    for linea in proc.stderr.splitlines():
+        m = _LINEA.match(linea)
+        if m:
+            propio, acumulado, sangria, modulo = m.groups()
+            filas.append((modulo, int(propio), int(acumulado), len(sangria) // 2))
+    segundos, maxrss = next(
+        l.split()[1:] for l in proc.stdout.splitlines() if l.startswith("__REPORTE__")
+    )
+    return (filas, float(segundos), int(maxrss) / 1024)
+
+
+class Command(BaseCommand):
+    help = "Resume `python -X importtime` del arranque de un worker: qué paquetes cuestan más"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modulo", action="append", default=None,
+                            help="Módulo a importar tras django.setup() (repetible). "
+                                 "Por defecto la URLconf, como en la primera solicitud.")
+        parser.add_argument("--calentar", action="store_true",
+                            help="Arrancar con MODEL_WARMUP=True (incluye cargar el modelo).")
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        modulos = opts["modulo"] or ["vida_saludable.urls"]
+        filas, segundos, rss = _medir(modulos, opts["calentar"])
+
+        # tiempo propio agrupado por paquete de primer nivel
+        por_paquete: dict[str, int] = {}
+        for modulo, propio, _, _ in filas:
+            raiz = modulo.split(".")[0]
+            por_paquete[raiz] = por_paquete.get(raiz, 0) + propio
+        ranking = sorted(por_paquete.items(), key=lambda kv: kv[1], reverse=True)[:opts["top"]]
+        pesados = sorted(
+            ((m, acum) for m, _, acum, nivel in filas if nivel == 0),
+            key=lambda kv: kv[1], reverse=True,
+        )[:opts["top"]]
+
+        if opts["json"]:
+            self.stdout.write(json.dumps({
+                "modulos": modulos,
+                "segundos": segundos,
+                "rss_pico_mb": rss,
+                "importados": len(filas),
+                "por_paquete_ms": {k: v / 1000 for k, v in ranking},
+                "importaciones_raiz_ms": {k: v / 1000 for k, v in pesados},
+            }, indent=2))
+            return
+
+        self.stdout.write(
+            f"{', '.join(modulos)}: {segundos * 1000:.0f} ms, {len(filas)} módulos, RSS pico {rss:.1f} MB"
+        )
+        self.stdout.write("\nTiempo propio por paquete:")
+        for paquete, us in ranking:
+            self.stdout.write(f"  {paquete:<28} {us / 1000:8.1f} ms")
+        self.stdout.write("\nImportaciones de primer nivel (acumulado):")
+        for modulo, us in pesados:
+            self.stdout.write(f"  {modulo:<40} {us / 1000:8.1f} ms")
+        for pesado in ("pandas", "numpy", "sklearn", "joblib"):
+            if pesado in por_paquete:
+                self.stdout.write(self.style.WARNING(f"\n{pesado} se importa al arrancar."))
@@ -0,0 +1,122 @@
+import json, os, subprocess, sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from principal.metricas import memoria_proceso
+
+_SCRIPT = """
+import json, sys
+from pathlib import Path
+import django
+from django.conf import settings
+settings.MODEL_WARMUP = False
+settings.MODEL_MMAP = {mmap!r}
+django.setup()
+from principal.metricas import memoria_proceso
+from principal.ml import predictor
+d = Path({directorio!r})
+predictor.MODEL_PATH = d / predictor.MODEL_PATH.name
+predictor.META_PATH = d / predictor.META_PATH.name
+predictor.COMPACT_PATH = d / predictor.COMPACT_PATH.name
+antes = memoria_proceso()
+ok = predictor.warm_up()
+estado = predictor.debug_ready()
+print(json.dumps({{"ok": ok, "backend": estado["backend"], "mmap": estado["mmap"], "antes": antes}}), flush=True)
+sys.stdin.read()
+"""
+
+
+def _medir(workers: int, mmap: bool, directorio: Path) -> list[dict]:
+    """Arranca ``workers`` procesos que cargan el modelo y mide a todos a la vez.
+
+    El PSS depende de cuántos procesos comparten cada página, por eso se lee
+    con todos vivos.
+    """
+    codigo = _SCRIPT.format(mmap=mmap, directorio=str(directorio))
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get(
+        "DJANGO_SETTINGS_MODULE", "vida_saludable.settings")}
+    procs = [
+        subprocess.Popen([sys.executable, "-c", codigo], stdin=subprocess.PIPE,
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env)
+        for _ in range(workers)
+    ]
+    try:
+        listos = []
+        for p in procs:
+            linea = p.stdout.readline()
+            if not linea:
+                p.kill()
+                error = p.stderr.read().strip().splitlines()
+                raise CommandError(error[-1] if error else "un worker terminó sin cargar el modelo")
+            listos.append(json.loads(linea))
+        return [
+            {**r, "pid": p.pid, "despues": memoria_proceso(p.pid)}
+            for p, r in zip(procs, listos)
+        ]
+    finally:
+        for p in procs:
+            if p.poll() is None:
+                p.stdin.close()
+                p.wait(timeout=30)
+
+
+def _mb(v) -> str:
+    return f"{v:8.1f}" if v is not None else "       -"
+
+
+def _suma(filas, momento, campo):
+    valores = [f[momento][campo] for f in filas if f[momento][campo] is not None]
+    return sum(valores) if valores else None
+
+
+class Command(BaseCommand):
+    help = "RSS y PSS por worker con el modelo copiado en cada proceso frente a mapeado (MODEL_MMAP)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--dir", default=None,
+                            help="Carpeta con vida_saludable_clf.joblib/.npz y metadata.json "
+                                 "(por defecto model/).")
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        from principal.ml.predictor import COMPACT_PATH, MODEL_DIR
+
+        directorio = Path(opts["dir"]) if opts["dir"] else MODEL_DIR
+        if not (directorio / COMPACT_PATH.name).exists():
+            raise CommandError(
+                f"No hay {directorio / COMPACT_PATH.name}: solo el exportado compacto se puede "
+                "mapear. Entrena con train_model o expórtalo con export_model."
+            )
+        if not sys.platform.startswith("linux"):
+            self.stderr.write(self.style.WARNING("PSS solo está disponible en Linux."))
+
+        reporte = {}
+        for nombre, mmap in (("copia", False), ("mmap", True)):
+            filas = _medir(opts["workers"], mmap, directorio)
+            reporte[nombre] = {
+                "workers": filas,
+                "pss_total_mb": _suma(filas, "despues", "pss_mb"),
+                "pss_modelo_mb": (
+                    _suma(filas, "despues", "pss_mb") - _suma(filas, "antes", "pss_mb")
+                    if _suma(filas, "antes", "pss_mb") is not None else None
+                ),
+            }
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(reporte, indent=2))
+            return
+
+        for nombre, r in reporte.items():
+            self.stdout.write(f"\n{nombre} ({opts['workers']} workers, backend {r['workers'][0]['backend']}, "
+                              f"mmap={r['workers'][0]['mmap']})")
+            self.stdout.write("       pid   RSS antes  RSS después   PSS antes  PSS después  compartida")
+            for f in r["workers"]:
+                a, d = f["antes"], f["despues"]
+                self.stdout.write(
+                    f"  {f['pid']:>8} {_mb(a['rss_mb'])} MB {_mb(d['rss_mb'])} MB  "
+                    f"{_mb(a['pss_mb'])} MB {_mb(d['pss_mb'])} MB {_mb(d['compartida_mb'])} MB"
+                )
+            self.stdout.write(f"  PSS total {_mb(r['pss_total_mb'])} MB; "
+                              f"atribuible al modelo {_mb(r['pss_modelo_mb'])} MB")
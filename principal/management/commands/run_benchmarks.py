@@ -0,0 +1,62 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.test.runner import DiscoverRunner
+
+from principal import benchmarks
+from principal.historial import escritor_historial
+
+
+class Command(BaseCommand):
+    help = "Mide predicción, lectura del dataset y render de páginas; guarda el resultado en JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--salida", default=None, help="Archivo JSON donde guardar los resultados.")
+        parser.add_argument("--comparar", default=None, help="JSON de una corrida anterior.")
+        parser.add_argument("--tolerancia", type=float, default=0.2,
+                            help="Empeoramiento admitido del p50 antes de marcar regresión (0.2 = 20%%).")
+        parser.add_argument("--filas", default=",".join(map(str, benchmarks.TAMANOS_DEFECTO)),
+                            help="Tamaños de dataset sintético, p. ej. 20000,200000,1000000,5000000")
+        parser.add_argument("--repeticiones", type=int, default=200)
+        parser.add_argument("--sin-paginas", action="store_true", help="No medir las vistas.")
+
+    def handle(self, *args, **opts):
+        try:
+            tamanos = [int(x) for x in opts["filas"].split(",") if x.strip()]
+        except ValueError:
+            raise CommandError("--filas debe ser una lista de enteros separada por comas")
+
+        # las vistas escriben sesiones e historial: se usa una BD de prueba desechable
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0)
+        bases = runner.setup_databases()
+        try:
+            reporte = benchmarks.ejecutar(tamanos, opts["repeticiones"], not opts["sin_paginas"])
+        finally:
+            # lo que quede en el buffer va a la BD de prueba, no al salir del proceso
+            escritor_historial().flush()
+            runner.teardown_databases(bases)
+            teardown_test_environment()
+
+        ancho = max(len(n) for n in reporte["resultados"])
+        for nombre, r in reporte["resultados"].items():
+            self.stdout.write(
+                f"{nombre:<{ancho}}  p50 {r['p50_ms']:10.3f} ms  p95 {r['p95_ms']:10.3f} ms  (n={r['n']})"
+            )
+        if opts["salida"]:
+            benchmarks.guardar(reporte, Path(opts["salida"]))
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {opts['salida']}"))
+
+        if opts["comparar"]:
+            with open(opts["comparar"], encoding="utf-8") as f:
+                base = json.load(f)
+            regresiones = benchmarks.comparar(base, reporte, opts["tolerancia"])
+            for r in regresiones:
+                self.stdout.write(self.style.ERROR(
+                    f"REGRESIÓN {r['caso']}: {r['base_ms']:.3f} -> {r['actual_ms']:.3f} ms (+{r['cambio']:.0%})"
+                ))
+            if regresiones:
+                raise CommandError(f"{len(regresiones)} regresiones sobre {opts['comparar']}")
+            self.stdout.write(self.style.SUCCESS("Sin regresiones."))
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from principal.ml.servidor import servir
+
+
+class Command(BaseCommand):
+    help = ("Servidor de inferencia (HTTP/JSON sobre TCP o socket Unix) para que los workers web "
+            "predigan vía MODEL_SERVIDOR sin cargar el modelo")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--direccion", default=None,
+                            help="host:puerto, http://host:puerto o unix:/ruta.sock "
+                                 "(por defecto MODEL_SERVIDOR, o 127.0.0.1:8765).")
+        parser.add_argument("--procesos", type=int, default=1,
+                            help="Procesos que atienden el mismo socket; uno por núcleo dedicado.")
+
+    def handle(self, *args, **opts):
+        direccion = opts["direccion"] or getattr(settings, "MODEL_SERVIDOR", None) or "127.0.0.1:8765"
+        if opts["procesos"] < 1:
+            raise CommandError("--procesos debe ser al menos 1")
+        self.stdout.write(f"Sirviendo el modelo en {direccion} con {opts['procesos']} proceso(s); Ctrl+C para salir.")
+        try:
+            servir(direccion, opts["procesos"])
+        except OSError as e:
+            raise CommandError(str(e))
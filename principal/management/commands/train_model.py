@@ -0,0 +1,52 @@
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from principal.ml.entrenamiento import entrenar
+from principal.ml.predictor import MODEL_PATH, META_PATH
+
+
+class Command(BaseCommand):
+    help = "Entrena el clasificador desde data/Final_data.csv y escribe model/vida_saludable_clf.joblib + metadata.json"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--csv", default=str(Path(settings.DATA_DIR) / "Final_data.csv"))
+        parser.add_argument("--objetivo", default=None,
+                            help="Columna con la etiqueta; sin ella se usan las reglas de salud.")
+        parser.add_argument("--n-estimators", type=int, default=100)
+        parser.add_argument("--n-jobs", type=int, default=-1)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--model-path", default=str(MODEL_PATH))
+        parser.add_argument("--meta-path", default=str(META_PATH))
+
+    def handle(self, *args, **opts):
+        ruta = Path(opts["csv"])
+        if not ruta.exists():
+            raise CommandError(f"No existe {ruta}")
+        try:
+            r = entrenar(
+                ruta,
+                model_path=Path(opts["model_path"]),
+                meta_path=Path(opts["meta_path"]),
+                objetivo=opts["objetivo"],
+                n_estimators=opts["n_estimators"],
+                n_jobs=opts["n_jobs"],
+                random_state=opts["seed"],
+            )
+        except (ValueError, KeyError) as e:
+            raise CommandError(str(e))
+
+        exactitud = r["exactitud_validacion"]
+        self.stdout.write(self.style.SUCCESS(f"Modelo guardado en {r['model_path']}"))
+        self.stdout.write(f"Filas: {r['filas']} | Clases: {', '.join(r['clases'])}")
+        if exactitud is not None:
+            self.stdout.write(f"Exactitud en validación: {exactitud:.4f}")
+        self.stdout.write(
+            f"Lectura: {r['segundos_lectura']:.2f}s | Entrenamiento: {r['segundos_entrenamiento']:.2f}s"
+            f" | Total: {r['segundos_total']:.2f}s"
+        )
+        self.stdout.write(f"Memoria pico: {r['memoria_pico_mb']:.1f} MB")
+        if r["compact_path"]:
+            self.stdout.write(f"Modelo compacto (NumPy) en {r['compact_path']}")
+        elif r["paridad_compacto"] is not None:
+            self.stdout.write(self.style.WARNING("El modelo compacto no pasó la verificación de paridad."))
@@ -0,0 +1,267 @@
+from __future__ import annotations
+from bisect import bisect_left
+from collections import deque
+from contextlib import nullcontext
+from contextvars import ContextVar
+import os, threading, time
+
+from django.conf import settings
+
+# límites (segundos) de los buckets Prometheus
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_FILAS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+CUANTILES = (0.5, 0.9, 0.99)
+
+# etapas de la solicitud en curso; None cuando no se está midiendo
+_ETAPAS: ContextVar[dict | None] = ContextVar("principal_etapas", default=None)
+_NULO = nullcontext()
+
+
+def activas() -> bool:
+    return bool(getattr(settings, "METRICAS_ACTIVAS", True))
+
+
+def _ventana() -> int:
+    return int(getattr(settings, "METRICAS_VENTANA", 1024))
+
+
+class Histograma:
+    """Histograma acumulado (para Prometheus) más las últimas ``ventana`` muestras (percentiles)."""
+
+    def __init__(self, ventana: int, limites: tuple = BUCKETS):
+        self.limites = limites
+        self.buckets = [0] * len(limites)
+        self.total = 0
+        self.suma = 0.0
+        self.recientes: deque[float] = deque(maxlen=ventana)
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float) -> None:
+        i = bisect_left(self.limites, valor)
+        with self._lock:
+            if i < len(self.buckets):
+                self.buckets[i] += 1
+            self.total += 1
+            self.suma += valor
+            self.recientes.append(valor)
+
+    def percentiles(self, cuantiles=CUANTILES) -> dict[float, float | None]:
+        with self._lock:
+            muestras = sorted(self.recientes)
+        if not muestras:
+            return {q: None for q in cuantiles}
+        return {q: muestras[min(len(muestras) - 1, int(q * len(muestras)))] for q in cuantiles}
+
+    def instantanea(self) -> tuple[list[int], int, float]:
+        with self._lock:
+            return (list(self.buckets), self.total, self.suma)
+
+
+class Registro:
+    """Histogramas y contadores por nombre de métrica y valor de etiqueta."""
+
+    def __init__(self):
+        self._hist: dict[tuple[str, str], Histograma] = {}
+        self._contadores: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def histograma(self, metrica: str, etiqueta: str) -> Histograma:
+        clave = (metrica, etiqueta)
+        h = self._hist.get(clave)
+        if h is None:
+            with self._lock:
+                h = self._hist.setdefault(
+                    clave, Histograma(_ventana(), _LIMITES.get(metrica, BUCKETS))
+                )
+        return h
+
+    def observar(self, metrica: str, etiqueta: str, valor: float) -> None:
+        self.histograma(metrica, etiqueta).observar(valor)
+
+    def incrementar(self, metrica: str, etiqueta: str, n: int = 1) -> None:
+        clave = (metrica, etiqueta)
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + n
+
+    def contadores(self, metrica: str) -> dict[str, int]:
+        with self._lock:
+            return {et: n for (m, et), n in self._contadores.items() if m == metrica}
+
+    def items(self):
+        with self._lock:
+            return sorted(self._hist.items())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._hist.clear()
+            self._contadores.clear()
+
+
+REGISTRO = Registro()
+
+# nombre Prometheus -> (etiqueta, ayuda)
+_METRICAS = {
+    "salud_solicitud_segundos": ("vista", "Duración total de la solicitud por vista."),
+    "salud_etapa_segundos": ("etapa", "Duración de cada etapa medida con span()."),
+    "salud_prediccion_segundos": ("fuente", "Duración de predict_estado_salud / predict_batch."),
+    "salud_microlote_filas": ("cola", "Filas por llamada a predict_proba del agrupador."),
+    "salud_microlote_espera_segundos": ("cola", "Espera de cada predicción hasta entrar a un lote."),
+}
+# métricas que no miden segundos
+_LIMITES = {"salud_microlote_filas": BUCKETS_FILAS}
+_CONTADORES = {
+    "salud_predicciones_total": ("fuente", "Registros predichos según quién respondió."),
+    "salud_rechazos_total": ("motivo", "Solicitudes rechazadas con 503."),
+    "salud_paginas_cache_total": ("resultado", "Páginas servidas desde caché (acierto, fallo, no_modificada)."),
+}
+
+
+class _Span:
+    __slots__ = ("nombre", "etapas", "inicio")
+
+    def __init__(self, nombre: str, etapas: dict):
+        self.nombre = nombre
+        self.etapas = etapas
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.etapas[self.nombre] = self.etapas.get(self.nombre, 0.0) + time.perf_counter() - self.inicio
+        return False
+
+
+def span(nombre: str):
+    """Mide el bloque como la etapa ``nombre`` de la solicitud en curso.
+
+    Fuera de una solicitud instrumentada (middleware apagado, comandos, workers)
+    devuelve un contexto vacío. Si la etapa se repite, las duraciones se suman.
+    """
+    etapas = _ETAPAS.get()
+    if etapas is None:
+        return _NULO
+    return _Span(nombre, etapas)
+
+
+def iniciar() -> tuple[dict, object]:
+    etapas: dict[str, float] = {}
+    return (etapas, _ETAPAS.set(etapas))
+
+
+def terminar(token) -> None:
+    _ETAPAS.reset(token)
+
+
+def registrar_solicitud(vista: str, total: float, etapas: dict[str, float]) -> None:
+    REGISTRO.observar("salud_solicitud_segundos", vista, total)
+    for nombre, segundos in etapas.items():
+        REGISTRO.observar("salud_etapa_segundos", nombre, segundos)
+
+
+def server_timing(total: float, etapas: dict[str, float]) -> str:
+    partes = [f"{nombre};dur={segundos * 1000:.2f}" for nombre, segundos in etapas.items()]
+    partes.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(partes)
+
+
+def percentiles(metrica: str, etiqueta: str) -> dict[str, float | None]:
+    """p50/p90/p99 en milisegundos de la ventana reciente."""
+    h = REGISTRO.histograma(metrica, etiqueta)
+    return {
+        f"p{int(q * 100)}_ms": None if v is None else v * 1000
+        for q, v in h.percentiles().items()
+    }
+
+
+def _smaps_rollup(pid) -> dict[str, float]:
+    # valores en kB: Rss, Pss, Shared_Clean, Private_Dirty, ...
+    campos = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for linea in f:
+                partes = linea.split()
+                if len(partes) == 3 and partes[2] == "kB":
+                    campos[partes[0].rstrip(":")] = int(partes[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return campos
+
+
+def memoria_proceso(pid="self") -> dict[str, float | None]:
+    """RSS, PSS y memoria compartida/privada en MB (solo Linux), y el pico de RSS.
+
+    El PSS reparte cada página compartida entre los procesos que la usan: la
+    suma del PSS de los workers es lo que ocupan de verdad en el nodo.
+    """
+    rss = None
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        pass
+    pico = None
+    if pid == "self":
+        try:
+            import resource
+            pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        except ImportError:
+            pass
+    smaps = _smaps_rollup(pid)
+    compartida = None
+    if "Shared_Clean" in smaps:
+        compartida = smaps["Shared_Clean"] + smaps.get("Shared_Dirty", 0.0)
+    privada = None
+    if "Private_Clean" in smaps:
+        privada = smaps["Private_Clean"] + smaps.get("Private_Dirty", 0.0)
+    return {
+        "rss_mb": rss,
+        "pss_mb": smaps.get("Pss"),
+        "compartida_mb": compartida,
+        "privada_mb": privada,
+        "pico_mb": pico,
+    }
+
+
+def _etiqueta(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def exposicion_prometheus() -> str:
+    """Formato de texto de Prometheus 0.0.4."""
+    lineas = []
+    por_metrica: dict[str, list] = {}
+    for (metrica, etiqueta), h in REGISTRO.items():
+        por_metrica.setdefault(metrica, []).append((etiqueta, h))
+
+    for metrica, (nombre_etiqueta, ayuda) in _METRICAS.items():
+        series = por_metrica.get(metrica, [])
+        lineas.append(f"# HELP {metrica} {ayuda}")
+        lineas.append(f"# TYPE {metrica} histogram")
+        for etiqueta, h in series:
+            buckets, total, suma = h.instantanea()
+            et = f'{nombre_etiqueta}="{_etiqueta(etiqueta)}"'
+            acumulado = 0
+            for limite, n in zip(h.limites, buckets):
+                acumulado += n
+                lineas.append(f'{metrica}_bucket{{{et},le="{limite}"}} {acumulado}')
+            lineas.append(f'{metrica}_bucket{{{et},le="+Inf"}} {total}')
+            lineas.append(f"{metrica}_sum{{{et}}} {suma:.6f}")
+            lineas.append(f"{metrica}_count{{{et}}} {total}")
+
+        # percentiles de la ventana reciente, como gauge aparte
+        nombre = f"{metrica}_reciente"
+        lineas.append(f"# HELP {nombre} Percentiles de las últimas {_ventana()} muestras.")
+        lineas.append(f"# TYPE {nombre} gauge")
+        for etiqueta, h in series:
+            et = f'{nombre_etiqueta}="{_etiqueta(etiqueta)}"'
+            for q, v in h.percentiles().items():
+                if v is not None:
+                    lineas.append(f'{nombre}{{{et},cuantil="{q}"}} {v:.6f}')
+
+    for metrica, (nombre_etiqueta, ayuda) in _CONTADORES.items():
+        lineas.append(f"# HELP {metrica} {ayuda}")
+        lineas.append(f"# TYPE {metrica} counter")
+        for etiqueta, n in sorted(REGISTRO.contadores(metrica).items()):
+            lineas.append(f'{metrica}{{{nombre_etiqueta}="{_etiqueta(etiqueta)}"}} {n}')
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,65 @@
+from __future__ import annotations
+import json, logging, time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metricas
+
+logger = logging.getLogger("principal.metricas")
+
+
+class InstrumentacionMiddleware:
+    """Mide cada solicitud y sus etapas (``metricas.span``).
+
+    Agrega la cabecera ``Server-Timing``, alimenta los histogramas de ``/metrics``
+    y deja una línea JSON en el logger ``principal.metricas``. Con
+    ``METRICAS_ACTIVAS = False`` Django lo quita de la cadena al arrancar.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not metricas.activas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        etapas, token = metricas.iniciar()
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metricas.terminar(token)
+        return self._registrar(request, response, time.perf_counter() - inicio, etapas)
+
+    async def __acall__(self, request):
+        etapas, token = metricas.iniciar()
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metricas.terminar(token)
+        return self._registrar(request, response, time.perf_counter() - inicio, etapas)
+
+    def _registrar(self, request, response, total, etapas):
+        match = getattr(request, "resolver_match", None)
+        vista = match.view_name if match is not None else "sin_ruta"
+        metricas.registrar_solicitud(vista, total, etapas)
+        response["Server-Timing"] = metricas.server_timing(total, etapas)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                "metodo": request.method,
+                "ruta": request.path,
+                "vista": vista,
+                "estado": response.status_code,
+                "total_ms": round(total * 1000, 3),
+                "etapas_ms": {k: round(v * 1000, 3) for k, v in etapas.items()},
+            }, ensure_ascii=False))
+        return response
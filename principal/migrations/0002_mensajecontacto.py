@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:13
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('principal', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MensajeContacto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('correo', models.EmailField(max_length=254)),
+                ('asunto', models.CharField(max_length=120)),
+                ('mensaje', models.TextField()),
+                ('creado', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'mensaje de contacto',
+                'verbose_name_plural': 'mensajes de contacto',
+                'ordering': ['creado'],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+import csv
+from pathlib import Path
+
+from django.conf import settings
+from django.db import migrations
+
+
+def importar(apps, schema_editor):
+    ruta = Path(settings.BASE_DIR) / "data" / "contacto.csv"
+    if not ruta.exists():
+        return
+    MensajeContacto = apps.get_model("principal", "MensajeContacto")
+    campos = ("nombre", "correo", "asunto", "mensaje")
+    # volver a aplicarla (la reversa no borra nada) no duplica los mensajes ya importados
+    vistos = set(MensajeContacto.objects.values_list(*campos))
+    filas = []
+    with open(ruta, newline="", encoding="utf-8") as f:
+        for fila in csv.DictReader(f):
+            valores = (
+                (fila.get("nombre") or "")[:100],
+                fila.get("correo") or "",
+                (fila.get("asunto") or "")[:120],
+                fila.get("mensaje") or "",
+            )
+            if valores in vistos:
+                continue
+            filas.append(MensajeContacto(**dict(zip(campos, valores))))
+    MensajeContacto.objects.bulk_create(filas, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("principal", "0002_mensajecontacto"),
+    ]
+
+    operations = [
+        migrations.RunPython(importar, migrations.RunPython.noop),
+    ]
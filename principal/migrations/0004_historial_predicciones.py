@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:44
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('principal', '0003_importar_contacto_csv'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Prediccion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creado', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('entrada', models.JSONField()),
+                ('etiqueta', models.CharField(max_length=20)),
+                ('probabilidad', models.FloatField(blank=True, null=True)),
+                ('fuente', models.CharField(choices=[('modelo', 'Modelo'), ('reglas', 'Reglas')], max_length=10)),
+                ('version_modelo', models.CharField(blank=True, max_length=64)),
+                ('latencia_ms', models.FloatField()),
+                ('genero', models.CharField(blank=True, max_length=1)),
+                ('tipo_entrenamiento', models.CharField(blank=True, max_length=20)),
+            ],
+            options={
+                'verbose_name': 'predicción',
+                'verbose_name_plural': 'predicciones',
+                'ordering': ['-creado'],
+                'indexes': [models.Index(fields=['etiqueta', 'creado'], name='prediccion_etiqueta_idx'), models.Index(fields=['version_modelo', 'creado'], name='prediccion_version_idx'), models.Index(fields=['tipo_entrenamiento', 'creado'], name='prediccion_tipo_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenPredicciones',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('tipo_entrenamiento', models.CharField(blank=True, max_length=20)),
+                ('version_modelo', models.CharField(blank=True, max_length=64)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('saludables', models.PositiveIntegerField(default=0)),
+                ('con_probabilidad', models.PositiveIntegerField(default=0)),
+                ('suma_probabilidad', models.FloatField(default=0.0)),
+                ('suma_latencia_ms', models.FloatField(default=0.0)),
+            ],
+            options={
+                'verbose_name': 'resumen diario de predicciones',
+                'verbose_name_plural': 'resúmenes diarios de predicciones',
+                'ordering': ['dia'],
+                'constraints': [models.UniqueConstraint(fields=('dia', 'tipo_entrenamiento', 'version_modelo'), name='resumen_predicciones_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('principal', '0004_historial_predicciones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajo',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
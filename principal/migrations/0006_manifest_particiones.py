@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.db import migrations
+
+
+def crear_manifest(apps, schema_editor):
+    # las lecturas ya no lo crean: se deja listo para el CSV que haya al migrar
+    from principal.datos import asegurar_particiones
+
+    ruta = Path(settings.DATA_DIR) / "Final_data.csv"
+    if ruta.exists():
+        asegurar_particiones(ruta)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("principal", "0005_trabajo_actualizado"),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_manifest, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,33 @@
-from .predictor import (
-    model_loaded,
-    predict_estado_salud,
-    debug_ready,
-)
-
-__all__ = [
-    "model_loaded",
-    "predict_estado_salud",
-    "debug_ready",
-]
\ No newline at end of file
+"""API de predicción. Los submódulos (numpy, pandas, joblib) se importan al primer uso."""
+import importlib
+
+_EXPORTS = {
+    "model_loaded": ".predictor",
+    "model_version": ".predictor",
+    "predict_estado_salud": ".predictor",
+    "predict_batch": ".predictor",
+    "debug_ready": ".predictor",
+    "estadisticas_prediccion": ".predictor",
+    "warm_up": ".predictor",
+    "observar_deriva": ".deriva",
+    "evaluar_deriva": ".deriva",
+    "estado_deriva": ".deriva",
+    "calcular_saludable_lote": ".reglas",
+    "cache_predicciones": ".cache",
+    "cliente_inferencia": ".cliente",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    modulo = _EXPORTS.get(name)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    valor = getattr(importlib.import_module(modulo, __name__), name)
+    globals()[name] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
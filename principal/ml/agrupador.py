@@ -0,0 +1,99 @@
+from __future__ import annotations
+from concurrent.futures import Future
+import logging, os, threading, time
+
+from principal.metricas import REGISTRO as METRICAS
+
+logger = logging.getLogger(__name__)
+
+
+class AgrupadorPredicciones:
+    """Junta predicciones individuales concurrentes en una sola llamada al modelo.
+
+    La primera solicitud que llega abre una ventana de ``ventana`` segundos; lo
+    que llegue mientras tanto (hasta ``maximo`` filas) se predice junto con
+    ``predecir_lote(reg, registros) -> (etiquetas, probas)`` desde un hilo propio
+    y cada llamador recibe su fila. Sin concurrencia solo se agrega la ventana.
+    """
+
+    def __init__(self, predecir_lote, ventana: float = 0.002, maximo: int = 64):
+        self.predecir_lote = predecir_lote
+        self.ventana = ventana
+        self.maximo = max(1, maximo)
+        self._pendientes: list[tuple[object, dict, Future, float]] = []
+        self._cond = threading.Condition()
+        self._hilo: threading.Thread | None = None
+        self._pid: int | None = None
+        self.lotes = 0
+        self.filas = 0
+
+    def predecir(self, reg, data: dict, timeout: float | None = 10.0) -> tuple[str, float | None]:
+        futuro: Future = Future()
+        with self._cond:
+            self._iniciar_hilo()
+            self._pendientes.append((reg, data, futuro, time.perf_counter()))
+            if len(self._pendientes) in (1, self.maximo):
+                self._cond.notify()
+        return futuro.result(timeout)
+
+    def _iniciar_hilo(self) -> None:
+        # tras un fork (pool de trabajos) el hilo del padre no existe en el hijo
+        if self._hilo is not None and self._pid == os.getpid() and self._hilo.is_alive():
+            return
+        self._pid = os.getpid()
+        self._hilo = threading.Thread(target=self._bucle, name="agrupador-predicciones", daemon=True)
+        self._hilo.start()
+
+    def _bucle(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pendientes:
+                    self._cond.wait()
+                limite = self._pendientes[0][3] + self.ventana
+                while len(self._pendientes) < self.maximo:
+                    resto = limite - time.perf_counter()
+                    if resto <= 0:
+                        break
+                    self._cond.wait(resto)
+                lote = self._pendientes[:self.maximo]
+                del self._pendientes[:self.maximo]
+            self._procesar(lote)
+
+    def _procesar(self, lote) -> None:
+        inicio = time.perf_counter()
+        for *_, encolado in lote:
+            METRICAS.observar("salud_microlote_espera_segundos", "prediccion", inicio - encolado)
+
+        # normalmente un solo grupo; hay dos solo si el modelo se recargó en medio
+        grupos: dict[int, list] = {}
+        for item in lote:
+            grupos.setdefault(id(item[0]), []).append(item)
+        for items in grupos.values():
+            METRICAS.observar("salud_microlote_filas", "prediccion", len(items))
+            self.lotes += 1
+            self.filas += len(items)
+            try:
+                etiquetas, probas = self.predecir_lote(items[0][0], [d for _, d, _, _ in items])
+                # se arman todas antes de entregar: un resultado mal formado no deja
+                # a nadie esperando ni mata el hilo
+                filas = [
+                    (str(etiquetas[i]), None if probas is None else float(probas[i]))
+                    for i in range(len(items))
+                ]
+            except Exception as e:
+                for _, _, futuro, _ in items:
+                    futuro.set_exception(e)
+                continue
+            for (_, _, futuro, _), fila in zip(items, filas):
+                futuro.set_result(fila)
+
+    def estadisticas(self) -> dict:
+        espera = METRICAS.histograma("salud_microlote_espera_segundos", "prediccion").percentiles()
+        return {
+            "ventana_ms": self.ventana * 1000,
+            "maximo": self.maximo,
+            "lotes": self.lotes,
+            "filas": self.filas,
+            "filas_por_lote": (self.filas / self.lotes) if self.lotes else None,
+            "espera_ms": {f"p{int(q * 100)}": None if v is None else v * 1000 for q, v in espera.items()},
+        }
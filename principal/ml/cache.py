@@ -0,0 +1,158 @@
+from __future__ import annotations
+from collections import OrderedDict
+import hashlib, threading, time
+
+from django.conf import settings
+
+# decimales según el ``step`` de cada campo en PredictionForm
+_DECIMALES = {
+    "edad": 0,
+    "peso": 1,
+    "altura": 2,
+    "reposo_latidos": 0,
+    "promedio_latidos": 0,
+    "duracion_sesion": 1,
+    "calorias_quemadas": 0,
+    "porcentaje_grasa": 1,
+    "agua_litros": 1,
+    "frecuencia": 0,
+}
+_DECIMALES_DEFECTO = 2
+_PREFIJO = "principal:prediccion:"
+
+
+def canonizar(data: dict, mapper) -> dict:
+    """Las features que ve el modelo, con los números redondeados al paso del formulario.
+
+    Se predice sobre este mismo diccionario: dos entradas con la misma clave
+    de caché reciben entonces la misma predicción, esté o no en caché.
+    """
+    valores = [None] * len(mapper.features)
+    for k, v in data.items():
+        idx = mapper.columna(k)
+        if idx < 0 or v is None or v == "":
+            continue
+        if mapper.es_numerica[idx]:
+            try:
+                v = round(float(v), _DECIMALES.get(k, _DECIMALES_DEFECTO)) + 0.0
+            except (TypeError, ValueError):
+                continue
+        else:
+            v = str(v)
+        valores[idx] = v
+    return {f: v for f, v in zip(mapper.features, valores) if v is not None}
+
+
+def clave_prediccion(canonico: dict, version: str) -> str:
+    """Hash de un diccionario de ``canonizar`` y la versión del modelo."""
+    crudo = repr((version, tuple(canonico.items()))).encode("utf-8")
+    return hashlib.blake2b(crudo, digest_size=16).hexdigest()
+
+
+class CacheLocal:
+    def __init__(self, maximo: int, ttl: float):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._datos: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            item = self._datos.get(clave)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return item[1]
+
+    def set(self, clave, valor) -> None:
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+
+class CacheDjango:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+
+    def _cache(self):
+        from django.core.cache import cache
+        return cache
+
+    def get(self, clave):
+        return self._cache().get(_PREFIJO + clave)
+
+    def set(self, clave, valor) -> None:
+        self._cache().set(_PREFIJO + clave, valor, self.ttl)
+
+    def clear(self) -> None:
+        pass
+
+
+class CachePredicciones:
+    """LRU/TTL delante del modelo, con contadores de aciertos y fallos."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.aciertos = 0
+        self.fallos = 0
+
+    def get(self, clave):
+        valor = self.backend.get(clave)
+        if valor is None:
+            self.fallos += 1
+        else:
+            self.aciertos += 1
+        return valor
+
+    def set(self, clave, valor) -> None:
+        self.backend.set(clave, valor)
+
+    def clear(self) -> None:
+        self.backend.clear()
+        self.aciertos = self.fallos = 0
+
+    def estadisticas(self) -> dict:
+        total = self.aciertos + self.fallos
+        return {
+            "backend": type(self.backend).__name__,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": (self.aciertos / total) if total else None,
+            # la caché de Django no expone cuántas entradas tiene
+            "entradas": len(self.backend) if hasattr(self.backend, "__len__") else None,
+        }
+
+
+_CACHE: CachePredicciones | None = None
+_CACHE_LOCK = threading.Lock()
+
+
+def cache_predicciones() -> CachePredicciones | None:
+    """La caché configurada en ``PREDICCION_CACHE_BACKEND`` ("local", "django" o None)."""
+    global _CACHE
+    if _CACHE is None:
+        backend = getattr(settings, "PREDICCION_CACHE_BACKEND", "local")
+        if not backend:
+            return None
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                ttl = float(getattr(settings, "PREDICCION_CACHE_TTL", 600))
+                if backend == "django":
+                    _CACHE = CachePredicciones(CacheDjango(ttl))
+                else:
+                    _CACHE = CachePredicciones(
+                        CacheLocal(int(getattr(settings, "PREDICCION_CACHE_MAX", 2048)), ttl)
+                    )
+    return _CACHE
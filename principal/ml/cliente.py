@@ -0,0 +1,236 @@
+"""Cliente del servidor de inferencia (``manage.py serve_model``).
+
+Con ``MODEL_SERVIDOR`` definido, los workers web no cargan el modelo: cada
+predicción va al servidor por un pool de conexiones keep-alive. Si el
+servidor no responde a tiempo, la predicción vuelve como ``(None, None)``
+(la vista responde con ``_calcular_saludable``) y durante
+``MODEL_SERVIDOR_REINTENTO`` segundos ni se intenta, para no pagar el
+timeout en cada solicitud.
+"""
+from __future__ import annotations
+from urllib.parse import urlsplit
+import http.client, json, logging, os, socket, threading, time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_LOCK = threading.Lock()
+_CLIENTES: dict[str, "ClienteInferencia"] = {}
+
+
+class ErrorInferencia(RuntimeError):
+    """El servidor respondió con un estado distinto de 200."""
+
+
+def destino(url: str) -> tuple[str, object]:
+    """``("unix", ruta)`` o ``("tcp", (host, puerto))`` a partir de la URL.
+
+    Acepta ``unix:/ruta.sock``, ``unix:///ruta.sock``, ``http://host:puerto`` y ``host:puerto``.
+    """
+    if url.startswith("unix:"):
+        return ("unix", urlsplit(url).path)
+    if "://" not in url:
+        url = f"http://{url}"
+    partes = urlsplit(url)
+    return ("tcp", (partes.hostname or "127.0.0.1", 8765 if partes.port is None else partes.port))
+
+
+class _ConexionUnix(http.client.HTTPConnection):
+    def __init__(self, ruta: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.ruta = ruta
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.ruta)
+
+
+class ClienteInferencia:
+    """Pool de conexiones HTTP/1.1 keep-alive al servidor.
+
+    Se guardan hasta ``conexiones`` libres para reutilizar; con más solicitudes
+    simultáneas se abren conexiones extra que se cierran al terminar (la
+    concurrencia ya la acota el pool de inferencia de las vistas).
+    """
+
+    def __init__(self, url: str, conexiones: int = 8, timeout: float = 1.0, reintento: float = 5.0):
+        self.url = url
+        self.tipo, self.direccion = destino(url)
+        self.conexiones = max(1, conexiones)
+        self.timeout = timeout
+        self.reintento = reintento
+        self._lock = threading.Lock()
+        self._libres: list[http.client.HTTPConnection] = []
+        self._pid = os.getpid()
+        self._caido_hasta = 0.0
+        self.version: str | None = None
+        self.solicitudes = 0
+        self.fallos = 0
+        self.abiertas = 0
+        self.ultimo_error: str | None = None
+        # última respuesta de /salud; la refresca un hilo aparte (ver salud_cacheada)
+        self._salud: dict | None = None
+        self._salud_en = float("-inf")
+        self._refrescando = False
+
+    def _nueva(self) -> http.client.HTTPConnection:
+        self.abiertas += 1
+        if self.tipo == "unix":
+            return _ConexionUnix(self.direccion, self.timeout)
+        host, puerto = self.direccion
+        return http.client.HTTPConnection(host, puerto, timeout=self.timeout)
+
+    def _tomar(self) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            # tras un fork los sockets del padre no sirven en el hijo
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._libres = []
+            if self._libres:
+                return (self._libres.pop(), True)
+        return (self._nueva(), False)
+
+    def _devolver(self, conexion: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if self._pid == os.getpid() and len(self._libres) < self.conexiones:
+                self._libres.append(conexion)
+                return
+        conexion.close()
+
+    def _enviar(self, conexion, metodo: str, ruta: str, cuerpo: bytes | None, timeout: float):
+        conexion.timeout = timeout
+        if conexion.sock is not None:
+            conexion.sock.settimeout(timeout)
+        cabeceras = {"Content-Type": "application/json"} if cuerpo is not None else {}
+        conexion.request(metodo, ruta, body=cuerpo, headers=cabeceras)
+        respuesta = conexion.getresponse()
+        return (respuesta, respuesta.read())
+
+    def pedir(self, metodo: str, ruta: str, datos=None, timeout: float | None = None) -> dict:
+        """Una solicitud JSON; lanza ``OSError``/``HTTPException``/``ErrorInferencia`` si falla."""
+        timeout = self.timeout if timeout is None else timeout
+        cuerpo = None if datos is None else json.dumps(datos).encode("utf-8")
+        conexion, reusada = self._tomar()
+        try:
+            respuesta, crudo = self._enviar(conexion, metodo, ruta, cuerpo, timeout)
+        except (OSError, http.client.HTTPException):
+            conexion.close()
+            if not reusada:
+                raise
+            # el servidor pudo cerrar la conexión guardada: se intenta una vez con una nueva
+            conexion = self._nueva()
+            try:
+                respuesta, crudo = self._enviar(conexion, metodo, ruta, cuerpo, timeout)
+            except (OSError, http.client.HTTPException):
+                conexion.close()
+                raise
+        if respuesta.will_close:
+            conexion.close()
+        else:
+            self._devolver(conexion)
+        if respuesta.status != 200:
+            raise ErrorInferencia(f"{respuesta.status} {crudo[:200].decode('utf-8', 'replace')}")
+        return json.loads(crudo)
+
+    def caido(self) -> bool:
+        return time.monotonic() < self._caido_hasta
+
+    def _fallo(self, error: Exception) -> None:
+        self.fallos += 1
+        self.ultimo_error = f"{type(error).__name__}: {error}"
+        if not self.caido():
+            logger.warning("Servidor de inferencia %s no disponible (%s); se usan las reglas por %.0fs.",
+                           self.url, self.ultimo_error, self.reintento)
+        self._caido_hasta = time.monotonic() + self.reintento
+
+    def predecir_lote(self, registros: list[dict], timeout: float | None = None) -> tuple[list | None, list | None, str]:
+        """``(etiquetas, probas, fuente)`` del servidor.
+
+        ``fuente`` es la que informa el servidor (``"modelo"`` o ``"cache"``);
+        si no hay modelo o no responde vuelve ``(None, None, "reglas")``.
+        """
+        if self.caido():
+            return (None, None, "reglas")
+        self.solicitudes += 1
+        try:
+            r = self.pedir("POST", "/predecir", {"registros": registros}, timeout)
+        except Exception as e:
+            self._fallo(e)
+            return (None, None, "reglas")
+        self.version = r.get("version")
+        resultados = r.get("resultados")
+        if not resultados:
+            return (None, None, "reglas")
+        return ([e for e, _ in resultados], [p for _, p in resultados], r.get("fuente") or "modelo")
+
+    def predecir(self, data: dict) -> tuple[str | None, float | None]:
+        etiquetas, probas, _ = self.predecir_lote([data])
+        if etiquetas is None or etiquetas[0] is None:
+            return (None, None)
+        return (etiquetas[0], probas[0])
+
+    def salud(self) -> dict | None:
+        """Estado del servidor (``GET /salud``); ``None`` si no responde."""
+        try:
+            r = self.pedir("GET", "/salud")
+        except Exception as e:
+            self._fallo(e)
+            r = None
+        else:
+            self._caido_hasta = 0.0
+            self.version = r.get("version")
+        self._salud, self._salud_en = r, time.monotonic()
+        return r
+
+    def salud_cacheada(self) -> dict | None:
+        """La última respuesta de ``salud()``, sin esperar al servidor.
+
+        Si tiene más de ``reintento`` segundos se pide otra en un hilo aparte;
+        mientras el cliente está caído devuelve ``None``.
+        """
+        with self._lock:
+            refrescar = not self._refrescando and time.monotonic() - self._salud_en >= self.reintento
+            if refrescar:
+                self._refrescando = True
+        if refrescar:
+            threading.Thread(target=self._refrescar_salud, name="salud-inferencia", daemon=True).start()
+        return None if self.caido() else self._salud
+
+    def _refrescar_salud(self) -> None:
+        try:
+            self.salud()
+        finally:
+            self._refrescando = False
+
+    def estadisticas(self) -> dict:
+        return {
+            "url": self.url,
+            "disponible": not self.caido(),
+            "version": self.version,
+            "solicitudes": self.solicitudes,
+            "fallos": self.fallos,
+            "conexiones": {"maximo": self.conexiones, "libres": len(self._libres), "abiertas": self.abiertas},
+            "timeout": self.timeout,
+            "ultimo_error": self.ultimo_error,
+        }
+
+
+def cliente_inferencia() -> ClienteInferencia | None:
+    """Cliente para ``MODEL_SERVIDOR``; ``None`` si el modelo se evalúa en este proceso."""
+    url = getattr(settings, "MODEL_SERVIDOR", None)
+    if not url:
+        return None
+    cliente = _CLIENTES.get(url)
+    if cliente is None:
+        with _LOCK:
+            cliente = _CLIENTES.get(url)
+            if cliente is None:
+                cliente = _CLIENTES[url] = ClienteInferencia(
+                    url,
+                    conexiones=int(getattr(settings, "MODEL_SERVIDOR_CONEXIONES", 8)),
+                    timeout=float(getattr(settings, "MODEL_SERVIDOR_TIMEOUT", 1.0)),
+                    reintento=float(getattr(settings, "MODEL_SERVIDOR_REINTENTO", 5.0)),
+                )
+    return cliente
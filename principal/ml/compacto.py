@@ -0,0 +1,266 @@
+from __future__ import annotations
+from pathlib import Path
+import json, struct, zipfile
+import numpy as np
+
+VERSION_FORMATO = 1
+
+
+class ModeloCompacto:
+    """Pipeline imputación + one-hot + bosque de árboles evaluado solo con NumPy.
+
+    Se arma con ``exportar`` a partir del ``Pipeline`` de ``construir_pipeline`` y
+    se guarda en un ``.npz``: los árboles quedan aplanados en arreglos
+    (feature, umbral, hijos, probabilidades por hoja) y se recorren para todas
+    las filas y árboles a la vez, un nivel por iteración.
+    """
+
+    def __init__(self, config: dict, arreglos: dict[str, np.ndarray], mapeado: bool = False):
+        self.config = config
+        self.mapeado = mapeado
+        self.classes_ = np.asarray(config["classes"])
+        self.columnas_num = list(config["num"]["columnas"])
+        self.medianas = np.asarray(config["num"]["relleno"], dtype=np.float64)
+        self.columnas_cat = [c["columna"] for c in config["cat"]]
+        # columna -> (relleno, {categoría: posición en el vector de entrada})
+        self._cat = [
+            (c["relleno"], {v: len(self.columnas_num) + c["inicio"] + i
+                            for i, v in enumerate(c["categorias"])})
+            for c in config["cat"]
+        ]
+        self.n_entradas = int(config["n_entradas"])
+        self.profundidad = int(config["profundidad"])
+        self.feature = arreglos["feature"]
+        self.umbral = arreglos["umbral"]
+        self.izquierda = arreglos["izquierda"]
+        self.derecha = arreglos["derecha"]
+        self.valor = arreglos["valor"]
+        self.raices = arreglos["raices"]
+
+    @property
+    def n_arboles(self) -> int:
+        return len(self.raices)
+
+    def transformar(self, X) -> np.ndarray:
+        """DataFrame con las columnas de la metadata -> matriz densa que ve el bosque."""
+        n = len(X)
+        M = np.zeros((n, self.n_entradas), dtype=np.float64)
+        if self.columnas_num:
+            num = np.column_stack([
+                np.asarray(X[c], dtype=np.float64) for c in self.columnas_num
+            ]) if n else np.empty((0, len(self.columnas_num)))
+            M[:, :len(self.columnas_num)] = np.where(np.isnan(num), self.medianas, num)
+        filas = np.arange(n)
+        for columna, (relleno, posiciones) in zip(self.columnas_cat, self._cat):
+            valores = X[columna].tolist()
+            pos = np.fromiter(
+                (posiciones.get(relleno if _falta(v) else str(v), -1) for v in valores),
+                dtype=np.int64, count=n,
+            )
+            # categoría desconocida: todo en cero, como handle_unknown="ignore"
+            ok = pos >= 0
+            M[filas[ok], pos[ok]] = 1.0
+        return M
+
+    def predict_proba(self, X) -> np.ndarray:
+        M = self.transformar(X)
+        # sklearn compara en float32 contra umbrales float64
+        M = M.astype(np.float32).astype(np.float64)
+        n, t = len(M), self.n_arboles
+        if n == 0:
+            return np.empty((0, len(self.classes_)))
+        plano = M.ravel()
+        # una posición por (fila, árbol); las hojas apuntan a sí mismas (umbral +inf)
+        base = np.repeat(np.arange(n, dtype=np.int64) * M.shape[1], t)
+        nodos = np.tile(self.raices, n).astype(np.int64)
+        activos = np.arange(n * t)
+        for _ in range(self.profundidad):
+            actuales = nodos[activos]
+            x = plano[base[activos] + self.feature[actuales]]
+            siguientes = np.where(
+                x <= self.umbral[actuales], self.izquierda[actuales], self.derecha[actuales]
+            )
+            nodos[activos] = siguientes
+            # solo siguen bajando las que no llegaron a una hoja
+            activos = activos[siguientes != actuales]
+            if not len(activos):
+                break
+        return self.valor[nodos].reshape(n, t, -1).mean(axis=1)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def guardar(self, destino) -> None:
+        np.savez(
+            destino,
+            config=np.array(json.dumps(self.config, ensure_ascii=False)),
+            feature=self.feature, umbral=self.umbral, izquierda=self.izquierda,
+            derecha=self.derecha, valor=self.valor, raices=self.raices,
+        )
+
+    @classmethod
+    def cargar(cls, ruta: Path, mmap: bool = False) -> "ModeloCompacto":
+        """Lee el ``.npz``; con ``mmap`` los arreglos quedan mapeados (solo lectura).
+
+        Mapeados, las páginas del archivo son las del page cache y se comparten
+        entre todos los procesos que cargan el mismo modelo. Reemplazar el
+        archivo con ``os.replace`` no afecta a quien ya lo tiene mapeado.
+        """
+        with np.load(ruta, allow_pickle=False) as z:
+            config = json.loads(str(z["config"]))
+            if config.get("version") != VERSION_FORMATO:
+                raise ValueError(f"{ruta}: formato {config.get('version')} no soportado")
+            mapeados = _mapear_npz(ruta) if mmap else None
+            if mapeados is not None:
+                return cls(config, mapeados, mapeado=True)
+            arreglos = {k: z[k] for k in z.files if k != "config"}
+        return cls(config, arreglos)
+
+
+_LECTORES_ENCABEZADO = {
+    (1, 0): np.lib.format.read_array_header_1_0,
+    (2, 0): np.lib.format.read_array_header_2_0,
+}
+
+
+def _mapear_npz(ruta: Path) -> dict[str, np.ndarray] | None:
+    """Arreglos numéricos de un ``.npz`` sin comprimir como vistas de un ``np.memmap``.
+
+    ``np.savez`` guarda cada ``.npy`` entero dentro del zip, así que basta con
+    ubicar dónde empiezan sus datos. ``None`` si algo no lo permite.
+    """
+    arreglos = {}
+    with zipfile.ZipFile(ruta) as zf, open(ruta, "rb") as f:
+        for info in zf.infolist():
+            nombre = info.filename.removesuffix(".npy")
+            if nombre == "config":
+                continue
+            if info.compress_type != zipfile.ZIP_STORED:
+                return None
+            f.seek(info.header_offset)
+            local = f.read(30)
+            if local[:4] != b"PK\x03\x04":
+                return None
+            largo_nombre, largo_extra = struct.unpack("<HH", local[26:30])
+            f.seek(info.header_offset + 30 + largo_nombre + largo_extra)
+            lector = _LECTORES_ENCABEZADO.get(np.lib.format.read_magic(f))
+            if lector is None:
+                return None
+            forma, fortran, dtype = lector(f)
+            if dtype.hasobject or fortran:
+                return None
+            if not int(np.prod(forma)):
+                arreglos[nombre] = np.empty(forma, dtype=dtype)
+                continue
+            arreglos[nombre] = np.memmap(
+                ruta, dtype=dtype, mode="r", offset=f.tell(), shape=forma
+            ).view(np.ndarray)
+    return arreglos
+
+
+def _falta(v) -> bool:
+    if v is None:
+        return True
+    try:
+        return bool(v != v)
+    except TypeError:
+        # pd.NA
+        return True
+
+
+def _arboles(clf):
+    if hasattr(clf, "estimators_"):
+        return list(clf.estimators_)
+    if hasattr(clf, "tree_"):
+        return [clf]
+    raise ValueError(f"{type(clf).__name__} no es un árbol ni un bosque de árboles")
+
+
+def exportar(modelo, origen_sha1: str | None = None) -> ModeloCompacto:
+    """Convierte el ``Pipeline`` entrenado (``pre`` + ``clf``) a ``ModeloCompacto``.
+
+    Soporta lo que arma ``construir_pipeline``: ``SimpleImputer`` para las
+    numéricas, ``SimpleImputer`` + ``OneHotEncoder`` para las categóricas y un
+    árbol o bosque de clasificación. Otra cosa lanza ``ValueError``.
+    """
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
+    pre, clf = modelo.named_steps["pre"], modelo.named_steps["clf"]
+    num = {"columnas": [], "relleno": []}
+    cat = []
+    inicio = 0
+    for nombre, paso, columnas in pre.transformers_:
+        if nombre == "remainder" and paso == "drop":
+            continue
+        pasos = paso.steps if isinstance(paso, Pipeline) else [(nombre, paso)]
+        imputador = next((p for _, p in pasos if isinstance(p, SimpleImputer)), None)
+        onehot = next((p for _, p in pasos if isinstance(p, OneHotEncoder)), None)
+        if imputador is None or len(pasos) != (2 if onehot is not None else 1):
+            raise ValueError(f"Transformador {nombre!r} no soportado para exportar")
+        if any(_falta(v) for v in imputador.statistics_):
+            # SimpleImputer descarta las columnas que vinieron vacías en el entrenamiento
+            raise ValueError(f"Transformador {nombre!r} tiene columnas sin valores de relleno")
+        if onehot is None:
+            if cat:
+                raise ValueError("Las columnas numéricas deben ir antes que las categóricas")
+            num["columnas"] += list(columnas)
+            num["relleno"] += [float(v) for v in imputador.statistics_]
+            continue
+        if onehot.handle_unknown != "ignore" or onehot.drop_idx_ is not None:
+            raise ValueError("OneHotEncoder debe usar handle_unknown='ignore' y drop=None")
+        for columna, relleno, categorias in zip(columnas, imputador.statistics_, onehot.categories_):
+            categorias = [str(c) for c in categorias]
+            cat.append({"columna": columna, "relleno": str(relleno),
+                        "categorias": categorias, "inicio": inicio})
+            inicio += len(categorias)
+
+    arboles = _arboles(clf)
+    feature, umbral, izquierda, derecha, valor, raices = [], [], [], [], [], []
+    desplazamiento = 0
+    for arbol in arboles:
+        t = arbol.tree_
+        hoja = t.children_left < 0
+        propio = np.arange(t.node_count) + desplazamiento
+        raices.append(desplazamiento)
+        feature.append(np.where(hoja, 0, t.feature))
+        umbral.append(np.where(hoja, np.inf, t.threshold))
+        izquierda.append(np.where(hoja, propio, t.children_left + desplazamiento))
+        derecha.append(np.where(hoja, propio, t.children_right + desplazamiento))
+        v = t.value[:, 0, :]
+        valor.append(v / v.sum(axis=1, keepdims=True))
+        desplazamiento += t.node_count
+
+    config = {
+        "version": VERSION_FORMATO,
+        "classes": [str(c) for c in clf.classes_],
+        "num": num,
+        "cat": cat,
+        "n_entradas": len(num["columnas"]) + inicio,
+        "profundidad": max(a.tree_.max_depth for a in arboles),
+        "origen_sha1": origen_sha1,
+    }
+    arreglos = {
+        "feature": np.concatenate(feature).astype(np.int32),
+        "umbral": np.concatenate(umbral).astype(np.float64),
+        "izquierda": np.concatenate(izquierda).astype(np.int32),
+        "derecha": np.concatenate(derecha).astype(np.int32),
+        "valor": np.concatenate(valor).astype(np.float64),
+        "raices": np.asarray(raices, dtype=np.int32),
+    }
+    return ModeloCompacto(config, arreglos)
+
+
+def verificar_paridad(modelo, compacto: ModeloCompacto, X, tolerancia: float = 1e-9) -> dict:
+    """Compara ``predict_proba`` del modelo original y del compacto sobre ``X``."""
+    esperado = np.asarray(modelo.predict_proba(X))
+    obtenido = compacto.predict_proba(X)
+    diferencia = float(np.abs(esperado - obtenido).max()) if len(X) else 0.0
+    iguales = float((esperado.argmax(axis=1) == obtenido.argmax(axis=1)).mean()) if len(X) else 1.0
+    return {
+        "filas": int(len(X)),
+        "max_diferencia": diferencia,
+        "etiquetas_iguales": iguales,
+        "ok": diferencia <= tolerancia and iguales == 1.0,
+    }
@@ -0,0 +1,289 @@
+"""Deriva de las entradas: lo que llega por ``PredictionForm`` frente a lo entrenado.
+
+Cada predicción deja su fila en una muestra de reservorio de tamaño fijo
+(O(1) por solicitud, sin numpy en el camino de la solicitud) y suma las
+categorías. Un hilo compara cada ``DERIVA_INTERVALO`` segundos esa muestra
+con los histogramas de referencia (PSI y KS) y deja el resultado listo para
+``/api/deriva/``. Los contadores son por proceso, como el resto de métricas.
+"""
+from __future__ import annotations
+from pathlib import Path
+import json, logging, math, os, random, threading, time
+import numpy as np
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# feature del modelo -> campo de PredictionForm
+NUMERICAS = {
+    "Peso_kg": "peso",
+    "Altura_m": "altura",
+    "Promedio_Latidos": "promedio_latidos",
+    "Reposo_Latidos": "reposo_latidos",
+    "Duracion_Sesion_horas": "duracion_sesion",
+    "Agua_Litros": "agua_litros",
+    "Frecuencia": "frecuencia",
+    "Porcentaje_Grasa": "porcentaje_grasa",
+}
+CATEGORICAS = {
+    "Genero": "genero",
+    "Tipo_Entrenamiento": "tipo_entrenamiento",
+}
+BINS = 20
+_EPS = 1e-4
+
+# umbrales habituales de PSI
+PSI_MODERADA = 0.1
+PSI_ALTA = 0.25
+
+
+def referencia_deriva(X, bins: int = BINS) -> dict:
+    """Histogramas de referencia de ``X`` (features del modelo) para guardar en metadata.json.
+
+    Numéricas: bordes en los cuantiles de ``X`` y proporción por bin.
+    Categóricas: proporción por valor.
+    """
+    numericas = {}
+    for col in NUMERICAS:
+        if col not in X:
+            continue
+        v = X[col].to_numpy(dtype="float64", na_value=np.nan)
+        v = v[~np.isnan(v)]
+        if not len(v):
+            continue
+        bordes = np.unique(np.quantile(v, np.linspace(0, 1, bins + 1)[1:-1]))
+        conteos = np.bincount(np.searchsorted(bordes, v, side="right"), minlength=len(bordes) + 1)
+        numericas[col] = {
+            "bordes": bordes.tolist(),
+            "proporciones": (conteos / len(v)).tolist(),
+            "n": int(len(v)),
+        }
+    categoricas = {}
+    for col in CATEGORICAS:
+        if col not in X:
+            continue
+        conteos = X[col].astype("string").dropna().value_counts()
+        total = int(conteos.sum())
+        if total:
+            categoricas[col] = {
+                "proporciones": {str(k): int(n) / total for k, n in conteos.items()},
+                "n": total,
+            }
+    return {"numericas": numericas, "categoricas": categoricas}
+
+
+def psi(esperado, observado) -> float:
+    p = np.clip(np.asarray(esperado, dtype="float64"), _EPS, None)
+    q = np.clip(np.asarray(observado, dtype="float64"), _EPS, None)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def _nivel(valor: float) -> str:
+    if valor >= PSI_ALTA:
+        return "alta"
+    if valor >= PSI_MODERADA:
+        return "moderada"
+    return "estable"
+
+
+def comparar(referencia: dict, muestras: dict[str, np.ndarray], categorias: dict[str, dict]) -> dict:
+    """PSI y KS de cada feature frente a ``referencia``.
+
+    El KS se mide en los bordes de los bins de referencia (la referencia solo
+    guarda el histograma), así que es una cota inferior del KS exacto.
+    """
+    features = {}
+    for col, ref in referencia.get("numericas", {}).items():
+        v = muestras.get(col)
+        if v is None:
+            continue
+        v = v[~np.isnan(v)]
+        if not len(v):
+            continue
+        bordes = np.asarray(ref["bordes"])
+        p = np.asarray(ref["proporciones"])
+        q = np.bincount(np.searchsorted(bordes, v, side="right"), minlength=len(p)) / len(v)
+        valor = psi(p, q)
+        features[col] = {
+            "tipo": "numerica", "n": int(len(v)), "psi": valor, "nivel": _nivel(valor),
+            "ks": float(np.max(np.abs(np.cumsum(p)[:-1] - np.cumsum(q)[:-1]))) if len(p) > 1 else 0.0,
+            "media": float(v.mean()),
+        }
+    for col, ref in referencia.get("categoricas", {}).items():
+        conteos = categorias.get(col) or {}
+        total = sum(conteos.values())
+        if not total:
+            continue
+        valores = sorted(set(ref["proporciones"]) | set(conteos))
+        p = [ref["proporciones"].get(k, 0.0) for k in valores]
+        q = [conteos.get(k, 0) / total for k in valores]
+        valor = psi(p, q)
+        features[col] = {
+            "tipo": "categoria", "n": total, "psi": valor, "nivel": _nivel(valor),
+            "nuevas": [k for k in valores if k not in ref["proporciones"]],
+        }
+    return features
+
+
+class MonitorDeriva:
+    """Muestra de reservorio (algoritmo R) de las entradas, por fila, más conteos por categoría."""
+
+    def __init__(self, capacidad: int = 1024, seed: int | None = None):
+        self.capacidad = capacidad
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._reiniciar()
+        self.ultimo: dict | None = None
+        self._hilo: threading.Thread | None = None
+        self._pid: int | None = None
+
+    def _reiniciar(self) -> None:
+        self.vistas = 0
+        self.desde = time.time()
+        self._muestras = {col: [math.nan] * self.capacidad for col in NUMERICAS}
+        self._categorias: dict[str, dict[str, int]] = {col: {} for col in CATEGORICAS}
+
+    def observar(self, data: dict) -> None:
+        with self._lock:
+            self.vistas += 1
+            j = self.vistas - 1 if self.vistas <= self.capacidad else self._rng.randrange(self.vistas)
+            if j < self.capacidad:
+                for col, campo in NUMERICAS.items():
+                    valor = data.get(campo)
+                    self._muestras[col][j] = math.nan if valor is None else float(valor)
+            for col, campo in CATEGORICAS.items():
+                valor = data.get(campo)
+                if valor is not None:
+                    conteos = self._categorias[col]
+                    conteos[valor] = conteos.get(valor, 0) + 1
+
+    def tomar(self, reiniciar_desde: int | None = None) -> tuple[int, dict, dict]:
+        """Copia de la muestra actual.
+
+        Si ya juntó ``reiniciar_desde`` observaciones empieza una ventana nueva;
+        se decide bajo el lock, así no se pierde lo que llegue entre medio.
+        """
+        with self._lock:
+            n = min(self.vistas, self.capacidad)
+            vistas = self.vistas
+            muestras = {col: np.array(v[:n], dtype="float64") for col, v in self._muestras.items()}
+            categorias = {col: dict(c) for col, c in self._categorias.items()}
+            if reiniciar_desde is not None and vistas >= reiniciar_desde:
+                self._reiniciar()
+        return vistas, muestras, categorias
+
+    def iniciar(self, intervalo: float) -> None:
+        # tras un fork (pool de trabajos) el hilo del padre no existe en el hijo
+        if self._hilo is not None and self._pid == os.getpid() and self._hilo.is_alive():
+            return
+        self._pid = os.getpid()
+        self._hilo = threading.Thread(
+            target=self._bucle, args=(intervalo,), name="monitor-deriva", daemon=True
+        )
+        self._hilo.start()
+
+    def _bucle(self, intervalo: float) -> None:
+        while True:
+            time.sleep(intervalo)
+            try:
+                evaluar_deriva(self)
+            except Exception:
+                logger.exception("No se pudo calcular la deriva")
+
+
+_MONITOR: MonitorDeriva | None = None
+_LOCK = threading.Lock()
+_REFERENCIA: dict = {}
+
+
+def monitor() -> MonitorDeriva:
+    global _MONITOR
+    if _MONITOR is None:
+        with _LOCK:
+            if _MONITOR is None:
+                _MONITOR = MonitorDeriva(int(getattr(settings, "DERIVA_MUESTRA", 1024)))
+    return _MONITOR
+
+
+def observar_deriva(data: dict) -> None:
+    """Registra una entrada del formulario (``cleaned_data``); no hace nada si DERIVA_ACTIVA es False."""
+    if not getattr(settings, "DERIVA_ACTIVA", True):
+        return
+    m = monitor()
+    m.observar(data)
+    m.iniciar(float(getattr(settings, "DERIVA_INTERVALO", 300)))
+
+
+def _firma(ruta: Path):
+    try:
+        st = Path(ruta).stat()
+    except FileNotFoundError:
+        return None
+    return (str(ruta), st.st_mtime_ns, st.st_size)
+
+
+def referencia_actual() -> tuple[dict | None, str]:
+    """Referencia de metadata.json (la del entrenamiento); si no la trae, se calcula del dataset."""
+    from .predictor import META_PATH
+
+    firma = _firma(META_PATH)
+    if firma is not None and _REFERENCIA.get("firma") == firma:
+        return _REFERENCIA["referencia"], _REFERENCIA["origen"]
+    referencia, origen = None, "metadata"
+    if firma is not None:
+        try:
+            with open(META_PATH, "r", encoding="utf-8") as f:
+                referencia = json.load(f).get("deriva")
+        except (OSError, ValueError):
+            referencia = None
+    if referencia is None:
+        from principal.datos.resumen import DATASET_PATH
+        from .entrenamiento import leer_features
+
+        origen = "dataset"
+        firma = _firma(DATASET_PATH)
+        if firma is None:
+            return None, origen
+        if _REFERENCIA.get("firma") == firma:
+            return _REFERENCIA["referencia"], origen
+        X, _ = leer_features(DATASET_PATH)
+        referencia = referencia_deriva(X)
+    _REFERENCIA.update(firma=firma, referencia=referencia, origen=origen)
+    return referencia, origen
+
+
+def evaluar_deriva(m: MonitorDeriva | None = None) -> dict | None:
+    """Compara la ventana actual con la referencia y guarda el resultado en ``m.ultimo``.
+
+    La ventana se reinicia solo si juntó ``DERIVA_MIN_MUESTRAS``; si no, sigue acumulando.
+    """
+    m = m or monitor()
+    minimo = int(getattr(settings, "DERIVA_MIN_MUESTRAS", 100))
+    referencia, origen = referencia_actual()
+    if referencia is None:
+        return None
+    vistas, muestras, categorias = m.tomar(reiniciar_desde=minimo)
+    if vistas < minimo:
+        return m.ultimo
+    features = comparar(referencia, muestras, categorias)
+    peor = max(features.values(), key=lambda f: f["psi"], default=None)
+    m.ultimo = {
+        "calculado": time.time(),
+        "referencia": origen,
+        "observaciones": vistas,
+        "muestra": min(vistas, m.capacidad),
+        "nivel": peor["nivel"] if peor else "estable",
+        "features": features,
+    }
+    return m.ultimo
+
+
+def estado_deriva() -> dict:
+    m = monitor()
+    return {
+        "activa": bool(getattr(settings, "DERIVA_ACTIVA", True)),
+        "intervalo": float(getattr(settings, "DERIVA_INTERVALO", 300)),
+        "ventana": {"observaciones": m.vistas, "desde": m.desde},
+        "ultimo": m.ultimo,
+    }
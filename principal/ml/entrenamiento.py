@@ -0,0 +1,210 @@
+from __future__ import annotations
+from pathlib import Path
+import hashlib, json, logging, os, resource, sys, tempfile, time
+import numpy as np
+import pandas as pd
+import joblib
+
+from principal.datos.columnar import leer_columnar
+from principal.datos.ingesta import leer_bloques
+from principal.datos.limpieza import COLUMNAS_MODELO, normalizar_dataset
+from .compacto import exportar, verificar_paridad
+from .deriva import referencia_deriva
+from .predictor import MODEL_PATH, META_PATH
+from .reglas import calcular_saludable_lote
+
+logger = logging.getLogger(__name__)
+
+FEATURES = list(COLUMNAS_MODELO.values())
+CAT_COLS = ["Genero", "Tipo_Entrenamiento"]
+NUM_COLS = [f for f in FEATURES if f not in CAT_COLS]
+
+# nombres del modelo -> campos que espera calcular_saludable_lote
+_CAMPOS_REGLAS = {
+    "Genero": "genero",
+    "Peso_kg": "peso",
+    "Altura_m": "altura",
+    "Promedio_Latidos": "promedio_latidos",
+    "Reposo_Latidos": "reposo_latidos",
+    "Duracion_Sesion_horas": "duracion_sesion",
+    "Agua_Litros": "agua_litros",
+    "Frecuencia": "frecuencia",
+    "Porcentaje_Grasa": "porcentaje_grasa",
+}
+
+
+def leer_features(ruta: Path, objetivo: str | None = None, chunksize: int = 50_000):
+    """Lee el CSV por bloques y devuelve ``(X, y_texto_o_None)`` ya tipados."""
+    usar = list(COLUMNAS_MODELO) + ([objetivo] if objetivo else [])
+    tipado = leer_columnar(ruta, columnas=usar)
+    if tipado is not None and len(tipado):
+        y = tipado[objetivo].astype(str).to_numpy() if objetivo else None
+        X = tipado.rename(columns=COLUMNAS_MODELO).reindex(columns=FEATURES)
+        for c in CAT_COLS:
+            X[c] = X[c].astype("string")
+        return X, y
+
+    partes, etiquetas = [], []
+    for bloque in leer_bloques(ruta, chunksize, usecols=lambda c: c in usar):
+        if objetivo:
+            etiquetas.append(bloque.pop(objetivo).astype(str))
+        limpio = normalizar_dataset(bloque).rename(columns=COLUMNAS_MODELO)
+        partes.append(limpio.reindex(columns=FEATURES))
+    if not partes:
+        raise ValueError(f"{ruta} no tiene filas.")
+    X = pd.concat(partes, ignore_index=True)
+    y = pd.concat(etiquetas, ignore_index=True).to_numpy() if objetivo else None
+    return X, y
+
+
+def etiquetas_por_reglas(X: pd.DataFrame) -> np.ndarray:
+    estados, _, _ = calcular_saludable_lote(
+        X[list(_CAMPOS_REGLAS)].rename(columns=_CAMPOS_REGLAS)
+    )
+    return estados
+
+
+def construir_pipeline(n_estimators: int = 100, n_jobs: int = -1, random_state: int = 42):
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
+    preproceso = ColumnTransformer([
+        ("num", SimpleImputer(strategy="median"), NUM_COLS),
+        ("cat", Pipeline([
+            ("imputar", SimpleImputer(strategy="most_frequent")),
+            ("onehot", OneHotEncoder(handle_unknown="ignore")),
+        ]), CAT_COLS),
+    ])
+    clf = RandomForestClassifier(
+        n_estimators=n_estimators, n_jobs=n_jobs, random_state=random_state,
+        min_samples_leaf=2,
+    )
+    return Pipeline([("pre", preproceso), ("clf", clf)])
+
+
+def _memoria_pico_mb() -> float:
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def _escribir_atomico(destino: Path, escribir) -> None:
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=destino.parent, prefix=f".{destino.name}.")
+    os.close(fd)
+    try:
+        escribir(tmp)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, destino)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _sha1(ruta: Path) -> str:
+    h = hashlib.sha1()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def exportar_compacto(modelo, destino: Path, X, origen_sha1: str | None) -> dict:
+    """Escribe ``destino`` (.npz) solo si reproduce ``predict_proba`` del modelo sobre ``X``."""
+    compacto = exportar(modelo, origen_sha1=origen_sha1)
+    paridad = verificar_paridad(modelo, compacto, X)
+    if paridad["ok"]:
+        _escribir_atomico(Path(destino), lambda tmp: _guardar_npz(compacto, tmp))
+    else:
+        logger.warning("El modelo compacto no coincide con el original: %s", paridad)
+    return paridad
+
+
+def _guardar_npz(compacto, tmp) -> None:
+    # np.savez agrega ".npz" a rutas sin esa extensión; con un archivo abierto no
+    with open(tmp, "wb") as f:
+        compacto.guardar(f)
+
+
+def entrenar(
+    ruta: Path,
+    model_path: Path = MODEL_PATH,
+    meta_path: Path = META_PATH,
+    objetivo: str | None = None,
+    n_estimators: int = 100,
+    n_jobs: int = -1,
+    random_state: int = 42,
+    test_size: float = 0.2,
+) -> dict:
+    """Entrena el clasificador desde el CSV y escribe el par joblib/metadata.json.
+
+    Sin columna ``objetivo`` las etiquetas salen de las reglas de ``_calcular_saludable``.
+    Devuelve un reporte con tiempos, exactitud en validación y memoria pico.
+    """
+    from sklearn.model_selection import train_test_split
+
+    inicio = time.perf_counter()
+    X, y = leer_features(Path(ruta), objetivo)
+    if y is None:
+        y = etiquetas_por_reglas(X)
+    t_lectura = time.perf_counter() - inicio
+
+    estratificar = y if len(np.unique(y)) > 1 else None
+    X_tr, X_te, y_tr, y_te = train_test_split(
+        X, y, test_size=test_size, random_state=random_state, stratify=estratificar
+    )
+    modelo = construir_pipeline(n_estimators, n_jobs, random_state)
+    t0 = time.perf_counter()
+    modelo.fit(X_tr, y_tr)
+    t_entrenamiento = time.perf_counter() - t0
+    exactitud = float(modelo.score(X_te, y_te)) if len(y_te) else None
+
+    # en el servidor se predice de a una fila: paralelizar solo agrega latencia
+    modelo.set_params(clf__n_jobs=1)
+
+    _escribir_atomico(Path(model_path), lambda tmp: joblib.dump(modelo, tmp, compress=3))
+    meta = {
+        "features": FEATURES,
+        "num_cols": NUM_COLS,
+        "cat_cols": CAT_COLS,
+        "classes": [str(c) for c in modelo.classes_],
+        "objetivo": objetivo or "reglas",
+        "filas": int(len(X)),
+        "exactitud_validacion": exactitud,
+        "dataset_sha1": _sha1(Path(ruta)),
+        "model_sha1": _sha1(Path(model_path)),
+        "random_state": random_state,
+        # distribución de entrenamiento para el monitor de deriva
+        "deriva": referencia_deriva(X_tr),
+        "entrenado_en": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+    def _dump_meta(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    _escribir_atomico(Path(meta_path), _dump_meta)
+
+    compact_path = Path(model_path).with_suffix(".npz")
+    try:
+        paridad = exportar_compacto(modelo, compact_path, X_te.head(5000), meta["model_sha1"])
+    except ValueError as e:
+        logger.warning("No se exportó el modelo compacto: %s", e)
+        paridad = None
+
+    return {
+        "filas": int(len(X)),
+        "clases": meta["classes"],
+        "exactitud_validacion": exactitud,
+        "segundos_lectura": t_lectura,
+        "segundos_entrenamiento": t_entrenamiento,
+        "segundos_total": time.perf_counter() - inicio,
+        "memoria_pico_mb": _memoria_pico_mb(),
+        "model_path": str(model_path),
+        "meta_path": str(meta_path),
+        "compact_path": str(compact_path) if paridad and paridad["ok"] else None,
+        "paridad_compacto": paridad,
+    }
@@ -0,0 +1,112 @@
+from __future__ import annotations
+import threading, unicodedata
+import numpy as np
+import pandas as pd
+
+# campo del formulario -> nombres equivalentes (columna larga del CSV, nombre corto del modelo)
+_ALIAS = {
+    "edad": ("Edad",),
+    "genero": ("Genero",),
+    "peso": ("Peso (kg)", "Peso_kg"),
+    "altura": ("Altura (m)", "Altura_m"),
+    "promedio_latidos": ("Promedio_LATIDOS_POR_MINUTO", "Promedio_Latidos"),
+    "reposo_latidos": ("Reposo_LATIDOS_POR_MINUTO", "Reposo_Latidos"),
+    "duracion_sesion": ("Duracion_Sesion (horas)", "Duracion_Sesion_horas"),
+    "calorias_quemadas": ("Calorias_Quemadas",),
+    "tipo_entrenamiento": ("Tipo_Entrenamiento",),
+    "porcentaje_grasa": ("Porcentaje_Grasa",),
+    "agua_litros": ("Agua (litros)", "Agua_Litros"),
+    "frecuencia": ("Frecuencia (dias/semanal)", "Frecuencia"),
+    "nivel_experiencia": ("Nivel_Experiencia",),
+    "imc": ("Indice_De_Masa_Corporal", "IMC"),
+}
+_CATEGORICOS = {"genero", "tipo_entrenamiento", "nivel_experiencia"}
+
+_MAX_CLAVES_APRENDIDAS = 1024
+
+
+def _norm(s: str) -> str:
+    s = str(s)
+    s = "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
+    return "".join(ch for ch in s.lower() if ch.isalnum())
+
+
+class MapaFeatures:
+    """Tabla clave -> índice de columna compilada una sola vez a partir de la metadata.
+
+    Acepta los campos del formulario, las columnas del CSV (``Peso (kg)``) y los
+    nombres del modelo (``Peso_kg``) sin normalizar nada por solicitud.
+
+    ``indice`` no cambia después de construirse; las claves desconocidas que se
+    van resolviendo quedan en un diccionario aparte que se reemplaza completo.
+    """
+
+    def __init__(self, features, cat_cols=None):
+        self.features = list(features)
+        por_norm = {_norm(f): i for i, f in enumerate(self.features)}
+        self.indice: dict[str, int] = {}
+        categoricas = set(cat_cols or ())
+
+        for campo, alias in _ALIAS.items():
+            grupo = (campo,) + alias
+            idx = next((por_norm[_norm(g)] for g in grupo if _norm(g) in por_norm), None)
+            if idx is None:
+                continue
+            for g in grupo:
+                self.indice.setdefault(g, idx)
+                self.indice.setdefault(_norm(g), idx)
+            if not cat_cols and campo in _CATEGORICOS:
+                categoricas.add(self.features[idx])
+        for f, i in por_norm.items():
+            self.indice.setdefault(f, i)
+        for i, f in enumerate(self.features):
+            self.indice[f] = i
+
+        self.es_numerica = [f not in categoricas for f in self.features]
+        self.cat_cols = [f for f in self.features if f in categoricas]
+        self._columnas = pd.Index(self.features)
+        self._plantilla = [np.nan] * len(self.features)
+        self._aprendidas: dict = {}
+        self._lock = threading.Lock()
+
+    def columna(self, clave) -> int:
+        idx = self.indice.get(clave)
+        if idx is None:
+            idx = self._aprendidas.get(clave)
+        if idx is None:
+            # clave desconocida: se normaliza una vez y se recuerda
+            idx = self.indice.get(_norm(clave), -1)
+            with self._lock:
+                if len(self._aprendidas) < _MAX_CLAVES_APRENDIDAS:
+                    self._aprendidas = {**self._aprendidas, clave: idx}
+        return idx
+
+    def fila(self, data: dict) -> pd.DataFrame:
+        fila = self._plantilla.copy()
+        for k, v in data.items():
+            idx = self.columna(k)
+            if idx < 0 or v is None or v == "":
+                continue
+            if self.es_numerica[idx]:
+                try:
+                    fila[idx] = float(v)
+                except (TypeError, ValueError):
+                    pass
+            else:
+                fila[idx] = str(v)
+        return pd.DataFrame([fila], columns=self._columnas)
+
+    def frame(self, records: list[dict]) -> pd.DataFrame:
+        df = pd.DataFrame.from_records(records)
+        renombres = {}
+        for k in df.columns:
+            idx = self.columna(k)
+            if idx >= 0 and self.features[idx] not in renombres.values():
+                renombres[k] = self.features[idx]
+        df = df[list(renombres)].rename(columns=renombres).reindex(columns=self.features)
+        for f, numerica in zip(self.features, self.es_numerica):
+            if numerica:
+                df[f] = pd.to_numeric(df[f], errors="coerce").astype("float64")
+            else:
+                df[f] = df[f].astype("string")
+        return df
@@ -1,63 +1,258 @@
 from __future__ import annotations
+from dataclasses import dataclass, replace
 from pathlib import Path
-import json, unicodedata
+import json, logging, os, threading, time
 import numpy as np
 import pandas as pd
 from django.conf import settings
-import joblib
+
+from principal.metricas import REGISTRO as METRICAS, percentiles, span
+from .agrupador import AgrupadorPredicciones
+from .cache import cache_predicciones, canonizar, clave_prediccion
+from .cliente import ClienteInferencia, cliente_inferencia
+from .compacto import ModeloCompacto
+from .features import MapaFeatures
+from .reglas import calcular_saludable_lote
+
+logger = logging.getLogger(__name__)
 
 MODEL_DIR   = Path(settings.BASE_DIR) / "model"
 MODEL_PATH  = MODEL_DIR / "vida_saludable_clf.joblib"
 META_PATH   = MODEL_DIR / "metadata.json"
+COMPACT_PATH = MODEL_PATH.with_suffix(".npz")
 
-_MODEL = None
-_META  = None
-_META_FEATURES = None 
-
-def _norm(s: str) -> str:
-    s = str(s)
-    s = "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
-    return "".join(ch for ch in s.lower() if ch.isalnum())
-
-def _load_metadata():
-    global _META, _META_FEATURES
-    if META_PATH.exists():
-        with open(META_PATH, "r", encoding="utf-8") as f:
-            _META = json.load(f)
-        if "features" in _META and isinstance(_META["features"], list):
-            _META_FEATURES = list(_META["features"])
-        else:
-            num = _META.get("num_cols", []) or _META.get("numericas", [])
-            cat = _META.get("cat_cols", []) or _META.get("categoricas", [])
-            _META_FEATURES = list(num) + list(cat)
+
+@dataclass(frozen=True)
+class _Registro:
+    modelo: object = None
+    meta: dict | None = None
+    features: list | None = None
+    mapper: MapaFeatures | None = None
+    firma: tuple | None = None
+    backend: str | None = None
+    cargado_en: float | None = None
+    segundos_carga: float | None = None
+
+
+# Se reemplaza completo (nunca se muta) para que cada predicción vea un par modelo/metadata consistente.
+_REGISTRO = _Registro()
+_LOCK = threading.Lock()
+_ULTIMA_REVISION = float("-inf")
+# "pendiente" hasta que corre warm_up(); luego "listo", "sin_modelo" o "error"
+_CALENTAMIENTO = {"estado": "pendiente", "segundos": None, "en": None}
+_AGRUPADOR: AgrupadorPredicciones | None = None
+_LOCK_AGRUPADOR = threading.Lock()
+# True en los procesos de serve_model: evalúan el modelo aunque MODEL_SERVIDOR esté definido
+_SOLO_LOCAL = False
+
+
+def _intervalo_revision() -> float:
+    return float(getattr(settings, "MODEL_RELOAD_INTERVAL", 5.0))
+
+def _mtime(p: Path) -> int | None:
+    try:
+        return p.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def _firma_archivos() -> tuple:
+    return (_mtime(MODEL_PATH), _mtime(META_PATH), _mtime(COMPACT_PATH))
+
+def _backend() -> str:
+    return getattr(settings, "MODEL_BACKEND", "auto")
+
+def _mmap() -> bool:
+    return bool(getattr(settings, "MODEL_MMAP", True))
+
+def _remoto() -> ClienteInferencia | None:
+    return None if _SOLO_LOCAL else cliente_inferencia()
+
+def _load_metadata() -> tuple[dict | None, list | None, MapaFeatures | None]:
+    if not META_PATH.exists():
+        return (None, None, None)
+    with open(META_PATH, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if "features" in meta and isinstance(meta["features"], list):
+        features = list(meta["features"])
     else:
-        _META = None
-        _META_FEATURES = None
+        num = meta.get("num_cols", []) or meta.get("numericas", [])
+        cat = meta.get("cat_cols", []) or meta.get("categoricas", [])
+        features = list(num) + list(cat)
+    cat_cols = meta.get("cat_cols") or meta.get("categoricas")
+    return (meta, features, MapaFeatures(features, cat_cols))
 
-def model_loaded() -> bool:
-    global _MODEL
-    if _MODEL is not None and _META is not None:
-        return True
-    if not MODEL_PATH.exists():
-        return False
+def _cargar_modelo(meta: dict | None, firma: tuple) -> tuple[object, str]:
+    """El exportado compacto si está y corresponde al joblib; si no, el joblib."""
+    if _backend() != "sklearn" and firma[2] is not None:
+        compacto = ModeloCompacto.cargar(COMPACT_PATH, mmap=_mmap())
+        origen = compacto.config.get("origen_sha1")
+        esperado = (meta or {}).get("model_sha1")
+        if firma[0] is None or not esperado or origen == esperado:
+            return (compacto, "compacto")
+        logger.warning("%s no corresponde a %s; se usa el joblib.", COMPACT_PATH, MODEL_PATH)
+    if firma[0] is None:
+        raise FileNotFoundError(MODEL_PATH)
+    # joblib (y sklearn al deserializar) solo se importan si no hay exportado compacto
+    import joblib
+    return (joblib.load(MODEL_PATH), "sklearn")
+
+def _cargar(firma: tuple) -> None:
+    global _REGISTRO
+    if firma[0] is None and (firma[2] is None or _backend() == "sklearn"):
+        # sin modelo: se recuerda la firma y no se vuelve a intentar hasta que cambie
+        _REGISTRO = _Registro(firma=firma)
+        return
+    inicio = time.perf_counter()
+    try:
+        with span("carga_modelo"):
+            meta, features, mapper = _load_metadata()
+            modelo, backend = _cargar_modelo(meta, firma)
+    except Exception:
+        logger.exception("No se pudo cargar %s; se conserva el modelo anterior.", MODEL_PATH)
+        _REGISTRO = replace(_REGISTRO, firma=firma)
+        return
+    _REGISTRO = _Registro(
+        modelo=modelo, meta=meta, features=features, mapper=mapper, firma=firma,
+        backend=backend, cargado_en=time.time(), segundos_carga=time.perf_counter() - inicio,
+    )
+    logger.info("Modelo (%s) cargado en %.3fs", backend, _REGISTRO.segundos_carga)
+
+def _revisar(forzar: bool = False) -> None:
+    if not forzar and time.monotonic() - _ULTIMA_REVISION < _intervalo_revision():
+        return
+    # si otro hilo ya está recargando, se sigue sirviendo con el registro actual
+    if not _LOCK.acquire(blocking=forzar):
+        return
+    if forzar or _REGISTRO.firma is None:
+        # primera carga (no hay nada que servir mientras tanto) o warm_up: en este hilo
+        try:
+            _recargar(forzar)
+        finally:
+            _LOCK.release()
+        return
+    # la solicitud no espera el stat ni la carga: sigue con el registro anterior
+    try:
+        threading.Thread(target=_recargar_en_fondo, name="recarga-modelo", daemon=True).start()
+    except BaseException:
+        _LOCK.release()
+        raise
+
+def _recargar(forzar: bool) -> None:
+    """Compara la firma de los archivos y recarga si cambió; se llama con ``_LOCK`` tomado."""
+    global _ULTIMA_REVISION
+    ahora = time.monotonic()
+    if not forzar and ahora - _ULTIMA_REVISION < _intervalo_revision():
+        return
+    _ULTIMA_REVISION = ahora
+    firma = _firma_archivos()
+    if forzar or firma != _REGISTRO.firma:
+        _cargar(firma)
+
+def _recargar_en_fondo() -> None:
     try:
-        _MODEL = joblib.load(MODEL_PATH)
+        _recargar(False)
     except Exception:
-        _MODEL = None
+        logger.exception("Falló la revisión del modelo en segundo plano.")
+    finally:
+        _LOCK.release()
+
+def _reiniciar_lock() -> None:
+    # un hijo de fork no hereda el hilo de recarga: si tenía el lock, quedaría tomado
+    global _LOCK
+    _LOCK = threading.Lock()
+
+if hasattr(os, "register_at_fork"):  # no existe en Windows
+    os.register_at_fork(after_in_child=_reiniciar_lock)
+
+def _registro() -> _Registro:
+    _revisar()
+    return _REGISTRO
+
+def warm_up() -> bool:
+    """Carga el modelo de inmediato y ejecuta una predicción de prueba.
+
+    Con ``MODEL_SERVIDOR`` no se carga nada: el modelo vive en el servidor.
+    """
+    inicio = time.perf_counter()
+    if (cliente := _remoto()) is not None:
+        cliente.salud_cacheada()  # primera consulta al servidor, sin esperarla
+        _CALENTAMIENTO.update(estado="remoto", segundos=0.0, en=time.time())
         return False
-    _load_metadata()
-    return _MODEL is not None
+    _revisar(forzar=True)
+    reg = _REGISTRO
+    estado = "sin_modelo"
+    if reg.modelo is not None:
+        try:
+            _predecir(reg, _build_input_row({}, reg))
+            estado = "listo"
+        except Exception:
+            logger.exception("Falló la predicción de prueba del calentamiento.")
+            estado = "error"
+    _CALENTAMIENTO.update(estado=estado, segundos=time.perf_counter() - inicio, en=time.time())
+    return reg.modelo is not None
+
+def model_loaded() -> bool:
+    if (cliente := _remoto()) is not None:
+        return not cliente.caido()
+    return _registro().modelo is not None
+
+def model_version(reg: _Registro | None = None) -> str | None:
+    if reg is None and (cliente := _remoto()) is not None:
+        return cliente.version
+    reg = reg or _REGISTRO
+    if reg.modelo is None:
+        return None
+    if reg.meta and reg.meta.get("model_sha1"):
+        return str(reg.meta["model_sha1"])
+    return "-".join(str(x) for x in reg.firma if x is not None)
+
+def estadisticas_prediccion() -> dict:
+    """Conteos por fuente, tasa de respaldo por reglas y latencias recientes (ms)."""
+    conteos = METRICAS.contadores("salud_predicciones_total")
+    total = sum(conteos.values())
+    return {
+        "total": total,
+        "por_fuente": conteos,
+        "tasa_reglas": (conteos.get("reglas", 0) / total) if total else None,
+        "latencia_ms": {
+            fuente: percentiles("salud_prediccion_segundos", fuente)
+            for fuente in ("modelo", "cache", "remoto", "reglas", "lote")
+            if METRICAS.histograma("salud_prediccion_segundos", fuente).total
+        },
+    }
 
 def debug_ready() -> dict:
+    reg = _REGISTRO
     return {
         "model_path": str(MODEL_PATH),
         "meta_path": str(META_PATH),
         "exists_model": MODEL_PATH.exists(),
         "exists_meta": META_PATH.exists(),
-        "loaded": _MODEL is not None,
-        "meta_features": _META_FEATURES,
+        "exists_compact": COMPACT_PATH.exists(),
+        "loaded": reg.modelo is not None,
+        "backend": reg.backend,
+        # arreglos del .npz mapeados: compartidos con los demás workers vía page cache
+        "mmap": bool(getattr(reg.modelo, "mapeado", False)),
+        "meta_features": reg.features,
+        "model_version": model_version(reg),
+        "model_sha1": (reg.meta or {}).get("model_sha1"),
+        "dataset_sha1": (reg.meta or {}).get("dataset_sha1"),
+        "loaded_at": reg.cargado_en,
+        "load_seconds": reg.segundos_carga,
+        "warmup": dict(_CALENTAMIENTO),
+        "predicciones": estadisticas_prediccion(),
+        "microlote": _AGRUPADOR.estadisticas() if _AGRUPADOR is not None else None,
+        "cache": cache.estadisticas() if (cache := cache_predicciones()) else None,
+        "remoto": _estado_remoto(),
     }
 
+def _estado_remoto() -> dict | None:
+    cliente = _remoto()
+    if cliente is None:
+        return None
+    # /salud/ no espera al servidor: usa la última respuesta y la refresca aparte
+    return {**cliente.estadisticas(), "servidor": cliente.salud_cacheada()}
+
 _FORM_FIELDS = [
     "genero","peso","altura","promedio_latidos","reposo_latidos",
     "duracion_sesion","agua_litros","frecuencia","porcentaje_grasa",
@@ -80,46 +275,159 @@ def _coerce_types(d: dict) -> dict:
             out[k] = None if v is None else str(v)
     return out
 
-def _build_input_row(data: dict) -> pd.DataFrame | None:
-    if _META_FEATURES is None:
+def _build_input_row(data: dict, reg: _Registro | None = None) -> pd.DataFrame | None:
+    mapper = (reg or _REGISTRO).mapper
+    with span("features"):
+        if mapper is None:
+            return pd.DataFrame([_coerce_types(data)])
+        return mapper.fila(data)
 
-        return pd.DataFrame([_coerce_types(data)])
-    meta_norm = {_norm(feat): feat for feat in _META_FEATURES}
-    row = {}
-    d = _coerce_types(data)
+def _build_input_frame(records: list[dict], reg: _Registro | None = None) -> pd.DataFrame:
+    mapper = (reg or _REGISTRO).mapper
+    if mapper is None:
+        df = pd.DataFrame.from_records(records)
+        for k in df.columns:
+            if k in _NUM_CANDIDATES:
+                df[k] = pd.to_numeric(df[k], errors="coerce")
+        return df
+    return mapper.frame(records)
 
-    for fk, fv in d.items():
-        nk = _norm(fk)
-        if nk in meta_norm:
-            row[meta_norm[nk]] = fv
+def _predecir(reg: _Registro, X: pd.DataFrame) -> tuple[np.ndarray, np.ndarray | None]:
+    modelo = reg.modelo
+    if hasattr(modelo, "predict_proba"):
+        with span("predict_proba"):
+            proba = np.asarray(modelo.predict_proba(X))
+        idx = proba.argmax(axis=1)
+        classes = getattr(modelo, "classes_", None)
+        labels = np.asarray(classes)[idx] if classes is not None else idx
+        return (labels.astype(str), proba[np.arange(len(idx)), idx])
+    with span("predict_proba"):
+        return (np.asarray(modelo.predict(X)).astype(str), None)
 
-    for feat in _META_FEATURES:
-        if feat not in row:
-            row[feat] = np.nan
-    return pd.DataFrame([row], columns=_META_FEATURES)
+def _observar(fuente: str, inicio: float) -> None:
+    METRICAS.observar("salud_prediccion_segundos", fuente, time.perf_counter() - inicio)
+    METRICAS.incrementar("salud_predicciones_total", fuente)
 
 def predict_estado_salud(data: dict) -> tuple[str|None, float|None]:
-    if not model_loaded():
-        return (None, None)
-    X = _build_input_row(data)
+    inicio = time.perf_counter()
+    if (cliente := _remoto()) is not None:
+        with span("remoto"):
+            resultado = cliente.predecir(data)
+        fuente = "remoto" if resultado[0] is not None else "reglas"
+    else:
+        resultado, fuente = _predict_estado_salud(data)
+    # "reglas": quien llama responde con _calcular_saludable
+    _observar(fuente, inicio)
+    return resultado
+
+def _predict_estado_salud(data: dict) -> tuple[tuple[str|None, float|None], str]:
+    reg = _registro()
+    if reg.modelo is None:
+        return ((None, None), "reglas")
+    cache = cache_predicciones() if reg.mapper is not None else None
+    if cache is None:
+        resultado = _predict_uno(reg, data)
+        return (resultado, "modelo" if resultado[0] is not None else "reglas")
+
+    # el modelo ve los mismos valores redondeados que arman la clave
+    data = canonizar(data, reg.mapper)
+    clave = clave_prediccion(data, model_version(reg))
+    resultado = cache.get(clave)
+    if resultado is not None:
+        return (resultado, "cache")
+    resultado = _predict_uno(reg, data)
+    if resultado[0] is None:
+        return (resultado, "reglas")
+    cache.set(clave, resultado)
+    return (resultado, "modelo")
+
+def _predecir_registros(reg: _Registro, records: list[dict]):
+    if len(records) == 1:
+        # sin concurrencia: la fila preasignada es más barata que armar un frame
+        return _predecir(reg, _build_input_row(records[0], reg))
+    return _predecir(reg, _build_input_frame(records, reg))
+
+def _agrupador() -> AgrupadorPredicciones | None:
+    """Agrupador de predicciones concurrentes; ``None`` si PREDICCION_MICROLOTE_MS <= 0."""
+    global _AGRUPADOR
+    ventana_ms = float(getattr(settings, "PREDICCION_MICROLOTE_MS", 2.0))
+    if ventana_ms <= 0:
+        return None
+    if _AGRUPADOR is None:
+        with _LOCK_AGRUPADOR:
+            if _AGRUPADOR is None:
+                _AGRUPADOR = AgrupadorPredicciones(
+                    _predecir_registros,
+                    ventana=ventana_ms / 1000,
+                    maximo=int(getattr(settings, "PREDICCION_MICROLOTE_MAX", 64)),
+                )
+    return _AGRUPADOR
+
+def _predict_uno(reg: _Registro, data: dict) -> tuple[str|None, float|None]:
+    agrupador = _agrupador() if reg.mapper is not None else None
+    if agrupador is not None:
+        try:
+            with span("microlote"):
+                return agrupador.predecir(reg, data)
+        except Exception:
+            return (None, None)
+
+    X = _build_input_row(data, reg)
     if X is None:
         return (None, None)
-
-    if _META and ("cat_cols" in _META or "categoricas" in _META):
-        cat = _META.get("cat_cols") or _META.get("categoricas") or []
-        for c in cat:
-            if c in X.columns:
-                X[c] = X[c].astype("string")
     try:
+        labels, probas = _predecir(reg, X)
+    except Exception:
+        return (None, None)
+    return (str(labels[0]), None if probas is None else float(probas[0]))
 
-        if hasattr(_MODEL, "predict_proba"):
-            proba = _MODEL.predict_proba(X)[0]
-            classes = getattr(_MODEL, "classes_", None)
-            idx = int(np.argmax(proba))
-            label = classes[idx] if classes is not None else str(idx)
-            return (str(label), float(proba[idx]))
-        else:
-            label = _MODEL.predict(X)[0]
-            return (str(label), None)
+def _predict_modelo_lote(records: list[dict]) -> tuple[np.ndarray | None, np.ndarray | None]:
+    reg = _registro()
+    if reg.modelo is None:
+        return (None, None)
+    try:
+        return _predecir(reg, _build_input_frame(records, reg))
     except Exception:
-        return (None, None)
\ No newline at end of file
+        return (None, None)
+
+def predict_batch(records) -> list[dict]:
+    """Predice muchos registros con una sola llamada al modelo.
+
+    Los registros deben venir validados (``cleaned_data`` de ``PredictionForm``,
+    ver ``forms.validar_lote``): los campos faltantes se completan y no se avisa.
+
+    Cada resultado trae ``estado``, ``probabilidad``, ``puntos``, ``imc`` y
+    ``fuente`` (``"modelo"`` o ``"reglas"``; con ``MODEL_SERVIDOR``, la que
+    informa el servidor). Si no hay modelo cargado, o falla, se aplican las
+    reglas de ``_calcular_saludable`` vectorizadas.
+    """
+    records = list(records)
+    if not records:
+        return []
+
+    inicio = time.perf_counter()
+    if (cliente := _remoto()) is not None:
+        etiquetas, probas, fuente = cliente.predecir_lote(
+            records, float(getattr(settings, "MODEL_SERVIDOR_TIMEOUT_LOTE", 30.0))
+        )
+    else:
+        etiquetas, probas = _predict_modelo_lote(records)
+        fuente = "reglas" if etiquetas is None else "modelo"
+    estados, puntos, imc = calcular_saludable_lote(pd.DataFrame.from_records(records))
+    imc = [None if np.isnan(v) else float(v) for v in imc]
+    METRICAS.observar("salud_prediccion_segundos", "lote", time.perf_counter() - inicio)
+    METRICAS.incrementar("salud_predicciones_total", fuente, len(records))
+
+    if etiquetas is None:
+        return [
+            {"estado": str(e), "probabilidad": None, "puntos": int(p),
+             "imc": i, "fuente": "reglas"}
+            for e, p, i in zip(estados, puntos, imc)
+        ]
+    if probas is None:
+        probas = [None] * len(records)
+    return [
+        {"estado": str(e), "probabilidad": None if p is None else float(p),
+         "puntos": None, "imc": i, "fuente": fuente}
+        for e, p, i in zip(etiquetas, probas, imc)
+    ]
@@ -0,0 +1,40 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+_REGLAS_NUM = [
+    "peso", "altura", "reposo_latidos", "promedio_latidos",
+    "duracion_sesion", "agua_litros", "frecuencia", "porcentaje_grasa",
+]
+
+
+def calcular_saludable_lote(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Versión vectorizada de ``views._calcular_saludable``.
+
+    Recibe un DataFrame con los campos del formulario y devuelve
+    ``(estados, puntos, imc)``. Un valor faltante cuenta como regla no cumplida.
+    """
+    n = len(df)
+    col = {}
+    for k in _REGLAS_NUM:
+        if k in df.columns:
+            col[k] = pd.to_numeric(df[k], errors="coerce").to_numpy(dtype="float64")
+        else:
+            col[k] = np.full(n, np.nan)
+    genero = df["genero"].astype(str).to_numpy() if "genero" in df.columns else np.full(n, "")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        imc = col["peso"] / (col["altura"] ** 2)
+
+    limite = np.where(genero == "F", 32.0, 25.0)
+    puntos = (
+        ((imc >= 18.5) & (imc <= 29)).astype(np.int8)
+        + ((col["reposo_latidos"] >= 50) & (col["reposo_latidos"] <= 80))
+        + (col["agua_litros"] >= 1.5)
+        + (col["frecuencia"] >= 3)
+        + ((col["duracion_sesion"] >= 0.5)
+           & (col["promedio_latidos"] >= 90) & (col["promedio_latidos"] <= 160))
+        + (col["porcentaje_grasa"] <= limite)
+    )
+    estados = np.where(puntos >= 4, "Saludable", "No saludable")
+    return estados, puntos, imc
@@ -0,0 +1,204 @@
+"""Servidor de inferencia: el modelo en procesos propios, aparte de los workers web.
+
+Habla HTTP/1.1 con JSON sobre TCP o un socket Unix:
+
+* ``POST /predecir`` con ``{"registros": [...]}`` (campos de ``PredictionForm``)
+  responde ``{"version", "fuente", "resultados": [[etiqueta, probabilidad], ...]}``;
+  ``resultados`` es ``null`` si no hay modelo.
+* ``GET /salud`` responde el estado del modelo en el proceso que atendió.
+
+Cada conexión tiene su hilo y las predicciones individuales concurrentes se
+juntan con el agrupador de ``predictor``; con ``procesos`` > 1 se hace fork de
+varios procesos que aceptan del mismo socket (el ``.npz`` mapeado se comparte).
+"""
+from __future__ import annotations
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import json, logging, os, signal, socket, socketserver, threading, time
+
+from principal.apps import esperar_calentamiento
+
+from . import predictor
+from .cliente import destino
+
+logger = logging.getLogger(__name__)
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # libera el hilo de una conexión keep-alive que el cliente dejó de usar
+    timeout = 60
+    server_version = "salud-inferencia"
+
+    def setup(self):
+        # cabeceras y cuerpo van en dos write(): sin TCP_NODELAY el ACK retardado suma ~40 ms
+        self.disable_nagle_algorithm = self.request.family != getattr(socket, "AF_UNIX", None)
+        super().setup()
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, formato, *args):
+        logger.debug("%s %s", self.address_string(), formato % args)
+
+    def _responder(self, estado: int, datos) -> None:
+        cuerpo = json.dumps(datos).encode("utf-8")
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        if self.path != "/salud":
+            return self._responder(404, {"error": "no encontrado"})
+        reg = predictor._registro()
+        self._responder(200, {
+            "estado": "ok" if reg.modelo is not None else "sin_modelo",
+            "pid": os.getpid(),
+            "version": predictor.model_version(reg),
+            "backend": reg.backend,
+            "mmap": bool(getattr(reg.modelo, "mapeado", False)),
+        })
+
+    def do_POST(self):
+        if self.path != "/predecir":
+            return self._responder(404, {"error": "no encontrado"})
+        try:
+            largo = int(self.headers.get("Content-Length") or 0)
+            registros = json.loads(self.rfile.read(largo) or b"null").get("registros")
+        except (ValueError, AttributeError, UnicodeDecodeError):
+            registros = None
+        if not isinstance(registros, list) or not all(isinstance(r, dict) for r in registros):
+            return self._responder(400, {"error": "Se espera {\"registros\": [objetos]}."})
+        self._responder(200, predecir(registros))
+
+
+def predecir(registros: list[dict]) -> dict:
+    """Predicción local: una fila pasa por caché y agrupador, varias van en un solo lote."""
+    if len(registros) == 1:
+        inicio = time.perf_counter()
+        (etiqueta, proba), fuente = predictor._predict_estado_salud(registros[0])
+        predictor._observar(fuente, inicio)
+        resultados = None if etiqueta is None else [[etiqueta, proba]]
+    else:
+        etiquetas, probas = predictor._predict_modelo_lote(registros)
+        fuente = "modelo"
+        resultados = None
+        if etiquetas is not None:
+            probas = [None] * len(registros) if probas is None else probas
+            resultados = [[str(e), None if p is None else float(p)] for e, p in zip(etiquetas, probas)]
+    version = predictor.model_version(predictor._registro())
+    return {"version": version, "fuente": fuente, "resultados": resultados}
+
+
+class _ServidorTCP(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _ServidorUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def crear_servidor(url: str) -> socketserver.BaseServer:
+    """Servidor escuchando en ``url`` (ver ``cliente.destino``), sin atender todavía."""
+    tipo, direccion = destino(url)
+    if tipo == "unix":
+        ruta = Path(direccion)
+        if ruta.is_socket():
+            # un socket que sobró de una corrida anterior; si hay alguien escuchando, se avisa
+            prueba = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                prueba.connect(str(ruta))
+            except OSError:
+                ruta.unlink()
+            else:
+                raise OSError(f"Ya hay un servidor escuchando en {ruta}")
+            finally:
+                prueba.close()
+        return _ServidorUnix(str(ruta), _Manejador)
+    return _ServidorTCP(direccion, _Manejador)
+
+
+def _cerrar(servidor) -> None:
+    servidor.server_close()
+    if isinstance(servidor, socketserver.UnixStreamServer):
+        Path(servidor.server_address).unlink(missing_ok=True)
+
+
+def servir(url: str, procesos: int = 1) -> None:
+    """Carga el modelo y atiende en ``url`` hasta SIGINT/SIGTERM.
+
+    Con ``procesos`` > 1 (solo donde hay ``fork``) el proceso padre solo vigila
+    a los hijos y relanza los que terminen.
+    """
+    servidor = crear_servidor(url)
+    esperar_calentamiento()
+    predictor._SOLO_LOCAL = True
+    predictor.warm_up()
+
+    def terminar(signum, frame):
+        raise SystemExit(0)
+
+    anterior = signal.signal(signal.SIGTERM, terminar)
+    if procesos <= 1 or not hasattr(os, "fork"):
+        try:
+            servidor.serve_forever()
+        except (KeyboardInterrupt, SystemExit):
+            pass
+        finally:
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            _cerrar(servidor)
+            signal.signal(signal.SIGTERM, anterior)
+        return
+
+    hijos: dict[int, float] = {}
+
+    def lanzar():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            codigo = 0
+            try:
+                servidor.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            except BaseException:
+                logger.exception("El proceso de inferencia %s terminó con error", os.getpid())
+                codigo = 1
+            finally:
+                os._exit(codigo)
+        hijos[pid] = time.monotonic()
+
+    try:
+        for _ in range(procesos):
+            lanzar()
+        while True:
+            pid, estado = os.wait()
+            inicio = hijos.pop(pid, None)
+            if inicio is None:
+                continue
+            logger.warning("El proceso de inferencia %s terminó (%s); se relanza", pid, estado)
+            # si muere al arrancar, no se relanza en un bucle apretado
+            if time.monotonic() - inicio < 1:
+                time.sleep(1)
+            lanzar()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        # un segundo SIGTERM no debe cortar la limpieza
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        for pid in hijos:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in hijos:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        _cerrar(servidor)
+        signal.signal(signal.SIGTERM, anterior)
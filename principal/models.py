@@ -1,3 +1,141 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class Trabajo(models.Model):
+    INGESTA = "ingesta"
+    ENTRENAMIENTO = "entrenamiento"
+    TIPOS = [
+        (INGESTA, "Ingesta de dataset"),
+        (ENTRENAMIENTO, "Reentrenamiento del modelo"),
+    ]
+
+    PENDIENTE = "pendiente"
+    EN_CURSO = "en_curso"
+    COMPLETADO = "completado"
+    ERROR = "error"
+    ESTADOS = [
+        (PENDIENTE, "Pendiente"),
+        (EN_CURSO, "En curso"),
+        (COMPLETADO, "Completado"),
+        (ERROR, "Error"),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE, db_index=True)
+    origen = models.CharField(max_length=500, blank=True)
+    filas = models.PositiveIntegerField(default=0)
+    columnas = models.PositiveIntegerField(null=True, blank=True)
+    resultado = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    terminado = models.DateTimeField(null=True, blank=True)
+    # latido del proceso que lo tiene en cola o en curso; si se detiene, el trabajo quedó huérfano
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-creado"]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.pk} ({self.estado})"
+
+    @property
+    def finalizado(self) -> bool:
+        return self.estado in (self.COMPLETADO, self.ERROR)
+
+    def como_dict(self) -> dict:
+        return {
+            "id": self.pk,
+            "tipo": self.tipo,
+            "estado": self.estado,
+            "filas": self.filas,
+            "columnas": self.columnas,
+            "resultado": self.resultado,
+            "error": self.error,
+            "creado": self.creado.isoformat() if self.creado else None,
+            "iniciado": self.iniciado.isoformat() if self.iniciado else None,
+            "terminado": self.terminado.isoformat() if self.terminado else None,
+            "finalizado": self.finalizado,
+        }
+
+
+class MensajeContacto(models.Model):
+    nombre = models.CharField(max_length=100)
+    correo = models.EmailField()
+    asunto = models.CharField(max_length=120)
+    mensaje = models.TextField()
+    # se fija al recibir el mensaje, no cuando el lote llega a la BD
+    creado = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ["creado"]
+        verbose_name = "mensaje de contacto"
+        verbose_name_plural = "mensajes de contacto"
+
+    def __str__(self):
+        return f"{self.nombre} <{self.correo}>: {self.asunto}"
+
+
+class Prediccion(models.Model):
+    MODELO = "modelo"
+    REGLAS = "reglas"
+    FUENTES = [
+        (MODELO, "Modelo"),
+        (REGLAS, "Reglas"),
+    ]
+
+    # se fija al predecir, no cuando el lote llega a la BD
+    creado = models.DateTimeField(default=timezone.now, db_index=True)
+    entrada = models.JSONField()
+    etiqueta = models.CharField(max_length=20)
+    probabilidad = models.FloatField(null=True, blank=True)
+    fuente = models.CharField(max_length=10, choices=FUENTES)
+    version_modelo = models.CharField(max_length=64, blank=True)
+    latencia_ms = models.FloatField()
+    # copiados de ``entrada`` para poder filtrar y agrupar con índice
+    genero = models.CharField(max_length=1, blank=True)
+    tipo_entrenamiento = models.CharField(max_length=20, blank=True)
+
+    class Meta:
+        ordering = ["-creado"]
+        verbose_name = "predicción"
+        verbose_name_plural = "predicciones"
+        indexes = [
+            models.Index(fields=["etiqueta", "creado"], name="prediccion_etiqueta_idx"),
+            models.Index(fields=["version_modelo", "creado"], name="prediccion_version_idx"),
+            models.Index(fields=["tipo_entrenamiento", "creado"], name="prediccion_tipo_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.etiqueta} ({self.fuente}) {self.creado:%Y-%m-%d %H:%M}"
+
+
+class ResumenPredicciones(models.Model):
+    """Totales de ``Prediccion`` por día, tipo de entrenamiento y versión del modelo.
+
+    Se actualiza en la misma transacción que cada lote del historial, así las
+    consultas de tendencia no recorren las predicciones una por una.
+    """
+    dia = models.DateField()
+    tipo_entrenamiento = models.CharField(max_length=20, blank=True)
+    version_modelo = models.CharField(max_length=64, blank=True)
+    total = models.PositiveIntegerField(default=0)
+    saludables = models.PositiveIntegerField(default=0)
+    con_probabilidad = models.PositiveIntegerField(default=0)
+    suma_probabilidad = models.FloatField(default=0.0)
+    suma_latencia_ms = models.FloatField(default=0.0)
+
+    class Meta:
+        ordering = ["dia"]
+        verbose_name = "resumen diario de predicciones"
+        verbose_name_plural = "resúmenes diarios de predicciones"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dia", "tipo_entrenamiento", "version_modelo"],
+                name="resumen_predicciones_unico",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} {self.tipo_entrenamiento or '-'} {self.version_modelo or '-'}: {self.total}"
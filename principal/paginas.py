@@ -0,0 +1,130 @@
+"""Caché de páginas que no dependen de datos (inicio, consejos).
+
+La página se renderiza una vez por variante y se guarda en memoria del
+proceso; las siguientes solicitudes arman la respuesta desde esos bytes,
+con ``ETag``/``Last-Modified`` para que el navegador revalide con un 304.
+Se vacía sola al vencer ``PAGINAS_CACHE_TTL`` y, con ``runserver``, cuando
+cambia una plantilla.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import wraps
+import hashlib, threading, time
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .metricas import REGISTRO as METRICAS
+
+_PAGINAS: dict[tuple, "Pagina"] = {}
+_LOCK = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Pagina:
+    cuerpo: bytes
+    content_type: str
+    etag: str
+    modificada: int
+    last_modified: str
+    vence: float
+
+
+def _activa() -> bool:
+    return bool(getattr(settings, "PAGINAS_CACHE", True))
+
+
+def _guardar(request, clave: tuple, respuesta) -> Pagina | None:
+    # solo respuestas 200 completas, sin cookies y sin token CSRF (es de cada usuario)
+    if respuesta.status_code != 200 or respuesta.streaming or respuesta.cookies:
+        return None
+    if request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+        return None
+    ahora = time.time()
+    etag = '"%s"' % hashlib.blake2b(respuesta.content, digest_size=12).hexdigest()
+    anterior = _PAGINAS.get(clave)
+    # si al vencer se renderiza igual, el navegador sigue recibiendo 304
+    modificada = anterior.modificada if anterior and anterior.etag == etag else int(ahora)
+    pagina = Pagina(
+        cuerpo=respuesta.content,
+        content_type=respuesta["Content-Type"],
+        etag=etag,
+        modificada=modificada,
+        last_modified=http_date(modificada),
+        vence=ahora + float(getattr(settings, "PAGINAS_CACHE_TTL", 3600)),
+    )
+    with _LOCK:
+        _PAGINAS[clave] = pagina
+    return pagina
+
+
+def _responder(request, pagina: Pagina, privada: bool) -> HttpResponse:
+    respuesta = HttpResponse(pagina.cuerpo, content_type=pagina.content_type)
+    respuesta["ETag"] = pagina.etag
+    respuesta["Last-Modified"] = pagina.last_modified
+    if privada:
+        # cambia con la sesión: nadie más la guarda y el navegador revalida siempre
+        respuesta["Cache-Control"] = "private, no-cache"
+    else:
+        respuesta["Cache-Control"] = "max-age=%d" % int(getattr(settings, "PAGINAS_MAX_AGE", 60))
+    return get_conditional_response(
+        request, etag=pagina.etag, last_modified=pagina.modificada, response=respuesta
+    )
+
+
+def pagina_en_cache(variante=None, privada: bool = False):
+    """Decorador de vistas GET cuyo HTML solo depende de ``variante(request)``.
+
+    ``variante`` debe devolver pocos valores posibles (cada uno es una entrada);
+    sin ella la página es una sola. Con ``privada`` (la variante sale de la
+    sesión) se responde ``Cache-Control: private, no-cache`` en vez de ``max-age``.
+    """
+    def decorador(vista):
+        nombre = f"{vista.__module__}.{vista.__qualname__}"
+
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD") or not _activa():
+                return vista(request, *args, **kwargs)
+            clave = (nombre, variante(request) if variante else None)
+            pagina = _PAGINAS.get(clave)
+            if pagina is None or pagina.vence < time.time():
+                METRICAS.incrementar("salud_paginas_cache_total", "fallo")
+                respuesta = vista(request, *args, **kwargs)
+                pagina = _guardar(request, clave, respuesta)
+                if pagina is None:
+                    return respuesta
+            else:
+                METRICAS.incrementar("salud_paginas_cache_total", "acierto")
+            respuesta = _responder(request, pagina, privada)
+            if respuesta.status_code == 304:
+                METRICAS.incrementar("salud_paginas_cache_total", "no_modificada")
+            return respuesta
+        return envoltura
+    return decorador
+
+
+def vaciar_paginas() -> None:
+    """Descarta las páginas y los fragmentos de plantilla guardados."""
+    from django.core.cache import caches
+
+    with _LOCK:
+        _PAGINAS.clear()
+    if "template_fragments" in settings.CACHES:
+        caches["template_fragments"].clear()
+
+
+def estado_paginas() -> dict:
+    return {
+        "activa": _activa(),
+        "paginas": len(_PAGINAS),
+        "resultados": METRICAS.contadores("salud_paginas_cache_total"),
+    }
+
+
+def plantilla_cambiada(sender, file_path, **kwargs) -> None:
+    # runserver: al editar una plantilla se vuelve a renderizar todo
+    if file_path.suffix == ".html":
+        vaciar_paginas()
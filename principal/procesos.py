@@ -0,0 +1,16 @@
+"""Arranque de los procesos del pool de trabajos.
+
+Va aparte de ``trabajos`` porque con ``spawn``/``forkserver`` el proceso hijo
+importa este módulo antes de ``django.setup()``: no puede tocar los modelos.
+"""
+import os
+
+
+def inicializar_worker(settings_module: str) -> None:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+    from django.conf import settings
+
+    # los trabajos no predicen: no hace falta cargar el modelo en cada proceso
+    settings.MODEL_WARMUP = False
+    django.setup()
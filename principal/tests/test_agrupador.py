@@ -0,0 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading, time
+
+from django.test import SimpleTestCase
+
+from principal.ml.agrupador import AgrupadorPredicciones
+
+
+def _eco(reg, registros):
+    # cada fila vuelve con su propio "id" como etiqueta
+    return ([r["id"] for r in registros], [r["id"] / 100 for r in registros])
+
+
+class AgrupadorTests(SimpleTestCase):
+    def _en_paralelo(self, agrupador, n: int, reg="reg"):
+        listos = threading.Barrier(n)
+
+        def llamar(i):
+            listos.wait()
+            return agrupador.predecir(reg, {"id": i}, timeout=5)
+
+        with ThreadPoolExecutor(n) as pool:
+            return list(pool.map(llamar, range(n)))
+
+    def test_cada_llamador_recibe_su_fila(self):
+        agrupador = AgrupadorPredicciones(_eco, ventana=0.05, maximo=64)
+        resultados = self._en_paralelo(agrupador, 20)
+        self.assertEqual(resultados, [(str(i), i / 100) for i in range(20)])
+        self.assertEqual(agrupador.filas, 20)
+        self.assertLess(agrupador.lotes, 20)
+
+    def test_respeta_el_maximo_por_lote(self):
+        tamanos = []
+
+        def registrar(reg, registros):
+            tamanos.append(len(registros))
+            return _eco(reg, registros)
+
+        agrupador = AgrupadorPredicciones(registrar, ventana=0.2, maximo=4)
+        self._en_paralelo(agrupador, 10)
+        self.assertEqual(sum(tamanos), 10)
+        self.assertLessEqual(max(tamanos), 4)
+
+    def test_no_espera_mas_que_la_ventana(self):
+        agrupador = AgrupadorPredicciones(_eco, ventana=0.05, maximo=64)
+        inicio = time.perf_counter()
+        self.assertEqual(agrupador.predecir("reg", {"id": 7}), ("7", 0.07))
+        segundos = time.perf_counter() - inicio
+        self.assertGreaterEqual(segundos, 0.04)
+        self.assertLess(segundos, 1.0)
+
+    def test_un_lote_con_error_no_deja_esperando(self):
+        def falla(reg, registros):
+            if any(r["id"] == 3 for r in registros):
+                raise ValueError("modelo roto")
+            return _eco(reg, registros)
+
+        agrupador = AgrupadorPredicciones(falla, ventana=0.01, maximo=64)
+        with self.assertRaises(ValueError):
+            agrupador.predecir("reg", {"id": 3}, timeout=2)
+        # el hilo sigue vivo para los lotes siguientes
+        self.assertEqual(agrupador.predecir("reg", {"id": 1}, timeout=2), ("1", 0.01))
+
+    def test_resultado_mal_formado_no_deja_esperando(self):
+        agrupador = AgrupadorPredicciones(lambda reg, registros: (None, None), ventana=0.01)
+        inicio = time.perf_counter()
+        with self.assertRaises(TypeError):
+            agrupador.predecir("reg", {"id": 1}, timeout=5)
+        self.assertLess(time.perf_counter() - inicio, 1.0)
+
+    def test_registros_distintos_van_en_grupos_distintos(self):
+        vistos = []
+
+        def registrar(reg, registros):
+            vistos.append((reg, len(registros)))
+            return _eco(reg, registros)
+
+        agrupador = AgrupadorPredicciones(registrar, ventana=0.1, maximo=64)
+        listos = threading.Barrier(4)
+
+        def llamar(i):
+            listos.wait()
+            return agrupador.predecir("viejo" if i % 2 else "nuevo", {"id": i}, timeout=5)
+
+        with ThreadPoolExecutor(4) as pool:
+            resultados = list(pool.map(llamar, range(4)))
+        self.assertEqual(resultados, [(str(i), i / 100) for i in range(4)])
+        self.assertEqual({reg for reg, _ in vistos}, {"viejo", "nuevo"})
@@ -0,0 +1,64 @@
+from unittest import mock
+import threading
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from principal.benchmarks import generar_dataset
+from principal.datos import analitica as modulo
+from principal.datos.analitica import BINS, VARIABLES, Analitica, analitica_dataset
+from principal.datos.columnar import cargar_dataset
+from .utiles import DirectorioTemporal
+
+
+def _esperar_analitica() -> None:
+    for hilo in threading.enumerate():
+        if hilo.name == "analitica":
+            hilo.join(30)
+
+
+class AnaliticaTests(DirectorioTemporal, SimpleTestCase):
+    def test_cuantiles_cerca_de_numpy(self):
+        df = cargar_dataset(generar_dataset(self.dir / "datos.csv", 5000, seed=12))
+        analitica = Analitica().agregar(df.iloc[:2000]).combinar(Analitica().agregar(df.iloc[2000:]))
+        for variable, (_, (lo, hi)) in VARIABLES.items():
+            valores = modulo._valores(df, variable)
+            valores = valores[~np.isnan(valores)]
+            ancho = (hi - lo) / BINS
+            cuantiles = analitica.cuantiles(variable)
+            for q, esperado in zip((10, 25, 50, 75, 90), np.percentile(valores, [10, 25, 50, 75, 90])):
+                # el error del histograma no pasa de un bin
+                self.assertAlmostEqual(cuantiles[f"p{q}"], esperado, delta=ancho, msg=(variable, q))
+
+            mediana = float(np.median(valores))
+            p = analitica.percentil(variable, mediana)
+            self.assertAlmostEqual(p["percentil"], 50.0, delta=2.0)
+            self.assertEqual(p["n"], len(valores))
+
+    def test_vieja_se_recalcula_en_segundo_plano(self):
+        ruta = generar_dataset(self.dir / "datos.csv", 500, seed=13)
+        anterior = analitica_dataset(ruta, esperar=True)
+        self.assertEqual(anterior.filas, 500)
+
+        generar_dataset(ruta, 800, seed=14)
+        hilos = []
+        construir = modulo.construir_analitica
+
+        def registrar(r):
+            hilos.append(threading.current_thread().name)
+            return construir(r)
+
+        with mock.patch.object(modulo, "construir_analitica", side_effect=registrar):
+            # la solicitud no espera: sigue con la anterior mientras se recalcula
+            self.assertIs(analitica_dataset(ruta), anterior)
+            _esperar_analitica()
+            self.assertEqual(analitica_dataset(ruta).filas, 800)
+        self.assertEqual(hilos, ["analitica"])
+
+    def test_sin_analitica_previa(self):
+        ruta = generar_dataset(self.dir / "otros.csv", 300, seed=15)
+        modulo._ruta(ruta).unlink(missing_ok=True)
+        self.assertIsNone(analitica_dataset(ruta))
+        _esperar_analitica()
+        self.assertEqual(analitica_dataset(ruta).filas, 300)
+        self.assertTrue(modulo._ruta(ruta).exists())
@@ -0,0 +1,40 @@
+from unittest import mock
+import json, threading, time
+
+from django.apps import apps
+from django.test import TestCase, override_settings
+
+from principal.benchmarks import _modelo_de_prueba, generar_dataset, registros_sinteticos
+from .utiles import DirectorioTemporal
+
+
+class CalentamientoTests(DirectorioTemporal, TestCase):
+    @override_settings(MODEL_WARMUP="fondo")
+    def test_ready_no_espera_al_calentamiento(self):
+        from principal.apps import esperar_calentamiento
+
+        soltar = threading.Event()
+        with mock.patch("principal.apps._calentar", side_effect=lambda: soltar.wait(10)):
+            inicio = time.perf_counter()
+            apps.get_app_config("principal").ready()
+            self.assertLess(time.perf_counter() - inicio, 0.5)
+            self.assertTrue(any(h.name == "calentamiento" for h in threading.enumerate()))
+            soltar.set()
+            esperar_calentamiento()
+        self.assertFalse(any(h.name == "calentamiento" for h in threading.enumerate()))
+
+    @override_settings(HISTORIAL_PREDICCIONES=False)
+    def test_primera_prediccion_tras_calentar_no_carga_el_modelo(self):
+        from principal.ml import predictor
+
+        dataset = generar_dataset(self.dir / "datos.csv", 1000, seed=8)
+        with _modelo_de_prueba(self.dir, dataset):
+            with mock.patch.object(predictor, "_cargar", wraps=predictor._cargar) as cargar:
+                inicio = time.perf_counter()
+                r = self.client.post("/api/prediccion/", json.dumps(registros_sinteticos(1, seed=9)[0]),
+                                     content_type="application/json")
+                segundos = time.perf_counter() - inicio
+        self.assertEqual(r.status_code, 200)
+        self.assertIn(r.json()["fuente"], ("modelo", "cache"))
+        cargar.assert_not_called()
+        self.assertLess(segundos, 0.5)
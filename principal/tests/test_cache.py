@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from principal.benchmarks import _modelo_de_prueba, generar_dataset, registros_sinteticos
+from principal.ml import cache as cache_mod
+from principal.ml.cache import (
+    CacheDjango, CacheLocal, CachePredicciones, canonizar, clave_prediccion,
+)
+from principal.ml.features import MapaFeatures
+from .utiles import DirectorioTemporal
+
+_FEATURES = ["Edad", "Genero", "Peso_kg", "Altura_m"]
+
+
+class ClavePrediccionTests(TestCase):
+    def setUp(self):
+        self.mapper = MapaFeatures(_FEATURES, cat_cols=["Genero"])
+
+    def clave(self, data, version="v1"):
+        return clave_prediccion(canonizar(data, self.mapper), version)
+
+    def test_entradas_equivalentes_comparten_clave(self):
+        base = self.clave({"edad": 30, "genero": "M", "peso": 70.0, "altura": 1.75})
+        # mismo valor al paso del formulario, otro tipo u otro nombre de campo
+        self.assertEqual(base, self.clave({"Edad": "30", "peso": "70.04", "altura": 1.754,
+                                           "Genero": "M", "extra": 1}))
+        self.assertNotEqual(base, self.clave({"edad": 30, "genero": "M", "peso": 70.1,
+                                              "altura": 1.75}))
+        self.assertNotEqual(base, self.clave({"edad": 30, "genero": "M", "peso": 70.0,
+                                              "altura": 1.75}, version="v2"))
+
+    def test_canonizar_redondea_y_usa_los_nombres_del_modelo(self):
+        self.assertEqual(
+            canonizar({"peso": "70.04", "altura": 1.754, "genero": "M", "edad": ""}, self.mapper),
+            {"Genero": "M", "Peso_kg": 70.0, "Altura_m": 1.75},
+        )
+
+    def test_cache_django_no_conoce_sus_entradas(self):
+        self.assertIsNone(CachePredicciones(CacheDjango(60)).estadisticas()["entradas"])
+        local = CachePredicciones(CacheLocal(10, 60))
+        local.set("a", ("Saludable", 0.9))
+        self.assertEqual(local.estadisticas()["entradas"], 1)
+
+
+class CachePrediccionesTests(DirectorioTemporal, TestCase):
+    def test_predice_sobre_los_valores_de_la_clave(self):
+        from principal.ml import predictor
+
+        registro = registros_sinteticos(1, seed=3)[0]
+        casi_igual = {**registro, "peso": float(registro["peso"]) + 0.04}
+        with _modelo_de_prueba(self.dir, generar_dataset(self.dir / "datos.csv", 1000, seed=3)), \
+                mock.patch.object(cache_mod, "_CACHE", CachePredicciones(CacheLocal(100, 60))), \
+                mock.patch.object(predictor, "_predict_uno", wraps=predictor._predict_uno) as uno:
+            resultado, fuente = predictor._predict_estado_salud(casi_igual)
+            self.assertEqual(fuente, "modelo")
+            visto = uno.call_args.args[1]
+            self.assertEqual(visto, canonizar(registro, predictor._REGISTRO.mapper))
+
+            self.assertEqual(predictor._predict_estado_salud(registro), (resultado, "cache"))
+
+            # otra versión del modelo no reutiliza lo guardado
+            with mock.patch.object(predictor, "model_version", return_value="otra"):
+                self.assertEqual(predictor._predict_estado_salud(registro)[1], "modelo")
+        self.assertEqual(uno.call_count, 2)
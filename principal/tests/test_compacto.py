@@ -0,0 +1,27 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from principal.benchmarks import generar_dataset
+from .utiles import DirectorioTemporal
+
+
+class ParidadCompactoTests(DirectorioTemporal, SimpleTestCase):
+    def test_compacto_reproduce_predict_proba(self):
+        from principal.ml.compacto import ModeloCompacto
+        from principal.ml.entrenamiento import (
+            construir_pipeline, etiquetas_por_reglas, exportar_compacto, leer_features,
+        )
+
+        X, _ = leer_features(generar_dataset(self.dir / "datos.csv", 2000, seed=3))
+        modelo = construir_pipeline(n_estimators=15, n_jobs=1).fit(X, etiquetas_por_reglas(X))
+        destino = self.dir / "clf.npz"
+        paridad = exportar_compacto(modelo, destino, X, None)
+        self.assertTrue(paridad["ok"], paridad)
+
+        esperado = modelo.predict_proba(X)
+        for mmap in (False, True):
+            with self.subTest(mmap=mmap):
+                compacto = ModeloCompacto.cargar(destino, mmap=mmap)
+                self.assertEqual(compacto.mapeado, mmap)
+                np.testing.assert_allclose(compacto.predict_proba(X), esperado, atol=1e-9)
+                np.testing.assert_array_equal(compacto.predict(X), modelo.predict(X))
@@ -0,0 +1,127 @@
+from datetime import datetime
+import csv, io, time
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from principal import lotes
+from principal.lotes import EscritorPorLotes
+from principal.models import MensajeContacto
+from .utiles import DirectorioTemporal
+
+
+def _mensaje(n: int, **campos) -> MensajeContacto:
+    return MensajeContacto(nombre=f"Persona {n}", correo=f"p{n}@correo.com",
+                           asunto="Consulta", mensaje=f"Mensaje {n}", **campos)
+
+
+def _esperar(condicion, segundos: float = 5.0) -> bool:
+    limite = time.monotonic() + segundos
+    while not condicion():
+        if time.monotonic() > limite:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+# el hilo del escritor usa su propia conexión: necesita ver lo que ya se confirmó
+class EscritorPorLotesTests(TransactionTestCase):
+    def setUp(self):
+        # la migración 0003 ya importó data/contacto.csv a la BD de prueba
+        MensajeContacto.objects.all().delete()
+
+    def test_escribe_al_llenar_el_lote(self):
+        escritor = EscritorPorLotes(MensajeContacto, tamano=3, intervalo=60)
+        for n in range(3):
+            escritor.agregar(_mensaje(n))
+        self.assertTrue(_esperar(lambda: escritor.escritos == 3))
+        self.assertEqual((MensajeContacto.objects.count(), escritor.lotes), (3, 1))
+
+        escritor.agregar(_mensaje(3))
+        time.sleep(0.1)
+        self.assertEqual((escritor.pendientes, MensajeContacto.objects.count()), (1, 3))
+        escritor.flush()
+
+    def test_escribe_cada_intervalo(self):
+        escritor = EscritorPorLotes(MensajeContacto, tamano=100, intervalo=0.05)
+        escritor.agregar(_mensaje(0))
+        escritor.agregar(_mensaje(1))
+        self.assertTrue(_esperar(lambda: MensajeContacto.objects.count() == 2))
+        self.assertEqual((escritor.escritos, escritor.lotes), (2, 1))
+
+    def test_flush_al_salir(self):
+        escritor = lotes.registrar(EscritorPorLotes(MensajeContacto, tamano=100, intervalo=60))
+        self.addCleanup(lotes._ESCRITORES.remove, escritor)
+        escritor.agregar(_mensaje(0))
+        self.assertEqual(MensajeContacto.objects.count(), 0)
+        lotes._flush_todos()
+        self.assertEqual((escritor.pendientes, MensajeContacto.objects.count()), (0, 1))
+
+
+class MigracionContactoTests(DirectorioTemporal, TransactionTestCase):
+    antes = [("principal", "0002_mensajecontacto")]
+    importar = [("principal", "0003_importar_contacto_csv")]
+
+    def _migrar(self, destino):
+        executor = MigrationExecutor(connection)
+        executor.migrate(destino)
+        return executor.loader.project_state(destino[0]).apps.get_model(
+            "principal", "MensajeContacto")
+
+    def setUp(self):
+        super().setUp()
+        (self.dir / "data").mkdir()
+        with open(self.dir / "data" / "contacto.csv", "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["nombre", "correo", "asunto", "mensaje"])
+            w.writerow(["Ana", "ana@correo.com", "Hola", "Primer mensaje"])
+            w.writerow(["Luis " + "x" * 120, "luis@correo.com", "Plan", "Segundo mensaje"])
+        self.addCleanup(lambda: MigrationExecutor(connection).migrate(
+            MigrationExecutor(connection).loader.graph.leaf_nodes("principal")))
+        self._migrar(self.antes)
+
+    def test_importa_el_csv_una_sola_vez(self):
+        with override_settings(BASE_DIR=self.dir):
+            modelo = self._migrar(self.importar)
+            self.assertEqual(modelo.objects.count(), 2)
+            self.assertEqual(len(modelo.objects.get(correo="luis@correo.com").nombre), 100)
+
+            # la reversa no borra nada; volver a aplicarla no duplica
+            self._migrar(self.antes)
+            modelo = self._migrar(self.importar)
+        self.assertEqual(modelo.objects.count(), 2)
+
+    def test_sin_csv_no_hace_nada(self):
+        (self.dir / "data" / "contacto.csv").unlink()
+        with override_settings(BASE_DIR=self.dir):
+            modelo = self._migrar(self.importar)
+        self.assertEqual(modelo.objects.count(), 0)
+
+
+class ExportarContactosTests(DirectorioTemporal, TestCase):
+    def setUp(self):
+        super().setUp()
+        MensajeContacto.objects.all().delete()
+        for n, dia in enumerate((1, 2, 3)):
+            _mensaje(n, creado=timezone.make_aware(datetime(2024, 5, dia, 12))).save()
+
+    def _exportar(self, **opciones) -> list[list[str]]:
+        salida = self.dir / "contactos.csv"
+        call_command("export_contacts", salida=str(salida), stderr=io.StringIO(), **opciones)
+        with open(salida, newline="", encoding="utf-8") as f:
+            return list(csv.reader(f))
+
+    def test_desde_filtra_por_fecha(self):
+        filas = self._exportar(desde="2024-05-02")
+        self.assertEqual(filas[0], ["nombre", "correo", "asunto", "mensaje", "creado"])
+        self.assertEqual([f[0] for f in filas[1:]], ["Persona 1", "Persona 2"])
+        self.assertEqual([f[0] for f in self._exportar(desde="2024-05-02T13:00:00")[1:]],
+                         ["Persona 2"])
+        self.assertEqual(len(self._exportar()), 4)
+
+    def test_desde_invalida(self):
+        with self.assertRaises(CommandError):
+            self._exportar(desde="ayer")
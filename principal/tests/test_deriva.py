@@ -0,0 +1,29 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from principal.benchmarks import registros_sinteticos
+
+
+class DerivaTests(TestCase):
+    def test_tomar_reinicia_solo_con_muestra_suficiente(self):
+        from principal.ml.deriva import MonitorDeriva
+
+        m = MonitorDeriva(capacidad=16, seed=0)
+        for r in registros_sinteticos(5, seed=6):
+            m.observar(r)
+        self.assertEqual(m.tomar(reiniciar_desde=10)[0], 5)
+        self.assertEqual(m.vistas, 5)
+        self.assertEqual(m.tomar(reiniciar_desde=5)[0], 5)
+        self.assertEqual(m.vistas, 0)
+
+    def test_recalcular_solo_staff_por_post(self):
+        from django.contrib.auth.models import User
+
+        with mock.patch("principal.ml.evaluar_deriva") as evaluar:
+            self.assertEqual(self.client.get("/api/deriva/?recalcular=1").status_code, 200)
+            self.assertEqual(self.client.post("/api/deriva/").status_code, 403)
+            evaluar.assert_not_called()
+            self.client.force_login(User.objects.create_user("admin", is_staff=True))
+            self.assertEqual(self.client.post("/api/deriva/").status_code, 200)
+            evaluar.assert_called_once()
@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+import math
+
+from django.test import SimpleTestCase
+
+from principal.ml import features
+from principal.ml.features import MapaFeatures
+
+_FEATURES = ["Edad", "Genero", "Peso_kg", "Altura_m", "Tipo_Entrenamiento", "IMC"]
+
+
+class MapaFeaturesTests(SimpleTestCase):
+    def setUp(self):
+        self.mapa = MapaFeatures(_FEATURES)
+
+    def test_acepta_los_tres_nombres(self):
+        for clave in ("peso", "Peso (kg)", "Peso_kg", "PESO kg"):
+            self.assertEqual(self.mapa.columna(clave), 2, clave)
+        self.assertEqual(self.mapa.columna("Indice_De_Masa_Corporal"), 5)
+        self.assertEqual(self.mapa.columna("Género"), 1)
+        self.assertEqual(self.mapa.columna("no_existe"), -1)
+        # sin cat_cols se infieren los categóricos del formulario
+        self.assertEqual(self.mapa.cat_cols, ["Genero", "Tipo_Entrenamiento"])
+        self.assertEqual(self.mapa.es_numerica, [True, False, True, True, False, True])
+
+    def test_claves_aprendidas_no_tocan_el_indice(self):
+        indice = dict(self.mapa.indice)
+        for i in range(features._MAX_CLAVES_APRENDIDAS + 50):
+            self.assertEqual(self.mapa.columna(f"desconocida {i}"), -1)
+        self.assertEqual(self.mapa.columna("EDAD!"), 0)
+        self.assertEqual(self.mapa.indice, indice)
+        self.assertEqual(len(self.mapa._aprendidas), features._MAX_CLAVES_APRENDIDAS)
+
+    def test_columna_desde_varios_hilos(self):
+        claves = [f"campo_{i % 300}" for i in range(5000)] + ["peso (KG)"] * 100
+
+        with ThreadPoolExecutor(8) as pool:
+            resultados = list(pool.map(self.mapa.columna, claves))
+        self.assertEqual(resultados, [-1] * 5000 + [2] * 100)
+        self.assertLessEqual(len(self.mapa._aprendidas), 301)
+
+    def test_fila(self):
+        df = self.mapa.fila({
+            "edad": "30", "genero": "M", "Peso (kg)": 70.5, "altura": "x",
+            "tipo_entrenamiento": "", "otra": 1, "IMC": None,
+        })
+        self.assertEqual(list(df.columns), _FEATURES)
+        fila = df.iloc[0].tolist()
+        self.assertEqual(fila[:3], [30.0, "M", 70.5])
+        # lo que no se puede leer, falta o no existe queda como NaN
+        self.assertTrue(all(isinstance(v, float) and math.isnan(v) for v in fila[3:]))
+
+    def test_fila_igual_que_frame(self):
+        registro = {"edad": 41, "genero": "F", "peso": 62.0, "altura": 1.65,
+                    "tipo_entrenamiento": "Cardio", "imc": 22.8}
+        fila = self.mapa.fila(registro)
+        frame = self.mapa.frame([registro])
+        self.assertEqual(fila.iloc[0].tolist(), frame.iloc[0].tolist())
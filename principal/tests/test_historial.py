@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+from unittest import mock
+import json, time
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from principal import historial, lotes
+from principal.benchmarks import registros_sinteticos
+from principal.historial import (
+    acumular_resumen, deriva_por_tipo, reconstruir_resumen, saludables_por_dia,
+)
+from principal.models import Prediccion, ResumenPredicciones
+
+_COLUMNAS = ("dia", "tipo_entrenamiento", "version_modelo", "total", "saludables",
+             "con_probabilidad", "suma_probabilidad", "suma_latencia_ms")
+
+
+def _prediccion(dias_atras: int, tipo: str, etiqueta: str, probabilidad=None, version="v1"):
+    creado = timezone.make_aware(datetime.combine(timezone.localdate(), datetime.min.time())
+                                 + timedelta(hours=12) - timedelta(days=dias_atras))
+    return Prediccion(creado=creado, entrada={}, etiqueta=etiqueta, probabilidad=probabilidad,
+                      fuente=Prediccion.MODELO if version else Prediccion.REGLAS,
+                      version_modelo=version, latencia_ms=2.0, tipo_entrenamiento=tipo)
+
+
+class ResumenPrediccionesTests(TestCase):
+    def setUp(self):
+        self.predicciones = [
+            _prediccion(0, "Cardio", "Saludable", 0.9),
+            _prediccion(0, "Cardio", "No saludable", 0.6),
+            _prediccion(0, "Fuerza", "Saludable", 0.8),
+            _prediccion(1, "Cardio", "Saludable"),
+            _prediccion(8, "Cardio", "No saludable", 0.7),
+            _prediccion(8, "Cardio", "No saludable", 0.7, version=""),
+        ]
+
+    def _resumen(self):
+        return sorted(ResumenPredicciones.objects.values_list(*_COLUMNAS))
+
+    def test_acumular_por_lotes_igual_que_reconstruir(self):
+        # dos lotes que caen en el mismo grupo se suman a la misma fila
+        acumular_resumen(self.predicciones[:2])
+        acumular_resumen(self.predicciones[2:])
+        acumulado = self._resumen()
+        Prediccion.objects.bulk_create(self.predicciones)
+        self.assertEqual(reconstruir_resumen(), len(acumulado))
+        self.assertEqual(self._resumen(), acumulado)
+
+        hoy = ResumenPredicciones.objects.get(dia=timezone.localdate(), tipo_entrenamiento="Cardio")
+        self.assertEqual((hoy.total, hoy.saludables, hoy.con_probabilidad), (2, 1, 2))
+        self.assertAlmostEqual(hoy.suma_probabilidad, 1.5)
+
+    def test_consultas_por_dia_y_por_tipo(self):
+        acumular_resumen(self.predicciones)
+        por_dia = {f["dia"]: f for f in saludables_por_dia(30)}
+        hoy = por_dia[timezone.localdate().isoformat()]
+        self.assertEqual((hoy["total"], hoy["saludables"]), (3, 2))
+        self.assertAlmostEqual(hoy["probabilidad_media"], (0.9 + 0.6 + 0.8) / 3)
+        self.assertEqual(sum(f["total"] for f in por_dia.values()), 6)
+        self.assertEqual(sum(f["total"] for f in saludables_por_dia(30, "v1")), 5)
+
+        cardio, fuerza = deriva_por_tipo(7)
+        self.assertEqual(cardio["tipo_entrenamiento"], "Cardio")
+        self.assertEqual((cardio["reciente"]["total"], cardio["anterior"]["total"]), (3, 2))
+        self.assertAlmostEqual(cardio["cambio"], 2 / 3)
+        self.assertIsNone(fuerza["anterior"])
+        self.assertIsNone(fuerza["cambio"])
+
+
+# el escritor guarda desde su hilo: lo escrito tiene que confirmarse para verse
+@override_settings(HISTORIAL_PREDICCIONES=True, HISTORIAL_LOTE=200, HISTORIAL_INTERVALO=0.3)
+class HistorialApiTests(TransactionTestCase):
+    def setUp(self):
+        parche = mock.patch.object(historial, "_ESCRITOR", None)
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.addCleanup(lambda: historial._ESCRITOR in lotes._ESCRITORES
+                        and lotes._ESCRITORES.remove(historial._ESCRITOR))
+
+    def test_aparece_tras_el_flush_asincrono(self):
+        estados = []
+        for registro in registros_sinteticos(3, seed=11):
+            r = self.client.post("/api/prediccion/", json.dumps(registro),
+                                 content_type="application/json")
+            self.assertEqual(r.status_code, 200)
+            estados.append(r.json()["estado"])
+
+        datos = self.client.get("/api/historial/").json()
+        self.assertEqual(datos["por_dia"], [])
+        self.assertEqual(datos["escritor"]["pendientes"], 3)
+
+        escritor = historial.escritor_historial()
+        limite = time.monotonic() + 5
+        while escritor.escritos < 3 and time.monotonic() < limite:
+            time.sleep(0.05)
+        datos = self.client.get("/api/historial/").json()
+        (hoy,) = datos["por_dia"]
+        self.assertEqual(hoy["dia"], timezone.localdate().isoformat())
+        self.assertEqual((hoy["total"], hoy["saludables"]), (3, estados.count("Saludable")))
+        self.assertEqual(datos["escritor"]["escritos"], 3)
+        self.assertEqual(Prediccion.objects.count(), 3)
+        self.assertEqual(sum(t["reciente"]["total"] for t in datos["deriva_por_tipo"]), 3)
@@ -0,0 +1,118 @@
+from unittest import mock
+import threading
+
+from django.test import SimpleTestCase, TestCase
+
+from principal.benchmarks import generar_dataset
+from .utiles import DirectorioTemporal
+
+
+class IngestaTests(DirectorioTemporal, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        from principal.datos import ingerir
+
+        self.a = generar_dataset(self.dir / "a.csv", 3000, seed=1)
+        self.b = generar_dataset(self.dir / "b.csv", 2000, seed=2)
+        self.destino = self.dir / "Final_data.csv"
+        ingerir(self.a, self.destino)
+
+    def test_anexar_publica_particion(self):
+        from principal.datos import anexar, cargar_dataset, manifest_particiones
+
+        r = anexar(self.b, self.destino)
+        self.assertEqual((r.filas, r.total), (2000, 5000))
+        self.assertEqual(len(manifest_particiones(self.destino)["particiones"]), 2)
+        self.assertEqual(len(cargar_dataset(self.destino)), 5000)
+
+    def test_anexar_falla_al_publicar_y_recorta_el_csv(self):
+        from principal.datos import anexar, cargar_dataset, manifest_particiones
+
+        antes = self.destino.read_bytes()
+        with mock.patch("principal.datos.ingesta.agregar_particion", side_effect=OSError("disco lleno")):
+            with self.assertRaises(OSError):
+                anexar(self.b, self.destino)
+        self.assertEqual(self.destino.read_bytes(), antes)
+        self.assertEqual(len(cargar_dataset(self.destino)), 3000)
+        self.assertEqual(len(manifest_particiones(self.destino)["particiones"]), 1)
+
+    def test_ingerir_falla_al_publicar_y_restaura_el_csv(self):
+        from principal.datos import cargar_dataset, ingerir
+
+        antes = self.destino.read_bytes()
+        with mock.patch("principal.datos.ingesta.guardar_analitica", side_effect=OSError("disco lleno")):
+            with self.assertRaises(OSError):
+                ingerir(self.b, self.destino)
+        self.assertEqual(self.destino.read_bytes(), antes)
+        self.assertFalse(any(p.name.endswith(".anterior") for p in self.dir.iterdir()))
+        self.assertEqual(len(cargar_dataset(self.destino)), 3000)
+
+    def test_lectura_durante_anexar_no_toca_las_copias(self):
+        from principal.datos import anexar, cargar_dataset, manifest_particiones, resumen_dataset
+
+        vistos = []
+
+        def leer():
+            vistos.append(resumen_dataset(self.destino).filas)
+            manifest_particiones(self.destino)
+            cargar_dataset(self.destino)
+
+        def progreso(filas):
+            if filas and not vistos:
+                hilo = threading.Thread(target=leer)
+                hilo.start()
+                hilo.join()
+
+        r = anexar(self.b, self.destino, chunksize=500, progreso=progreso)
+        self.assertEqual(len(vistos), 1)
+        self.assertEqual(r.total, 5000)
+        self.assertEqual(len(cargar_dataset(self.destino)), 5000)
+        self.assertEqual(len(manifest_particiones(self.destino)["particiones"]), 2)
+
+
+class ParticionesVistaTests(DirectorioTemporal, TestCase):
+    def test_verificar_solo_staff(self):
+        from django.contrib.auth.models import User
+        from principal.datos import ingerir
+
+        ingerir(generar_dataset(self.dir / "a.csv", 500, seed=7), self.dir / "Final_data.csv")
+        with self.settings(DATA_DIR=self.dir):
+            self.assertNotIn("verificacion", self.client.get("/api/dataset/particiones/").json())
+            self.assertEqual(self.client.get("/api/dataset/particiones/?verificar=1").status_code, 403)
+            self.client.force_login(User.objects.create_user("admin", is_staff=True))
+            r = self.client.get("/api/dataset/particiones/?verificar=1")
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(all(p["ok"] for p in r.json()["verificacion"]))
+
+    def test_lectura_no_crea_el_manifest(self):
+        from principal.datos import anexar, ingerir, manifest_particiones
+
+        destino = self.dir / "Final_data.csv"
+        ingerir(generar_dataset(self.dir / "a.csv", 500, seed=8), destino)
+        with open(destino, "a", encoding="utf-8") as f:
+            f.write(destino.read_text(encoding="utf-8").splitlines()[1] + "\n")  # editado a mano
+        antes = (self.dir / "Final_data.particiones.json").read_bytes()
+
+        with self.settings(DATA_DIR=self.dir), \
+                mock.patch("principal.datos.particiones.sha1_rango") as sha1:
+            self.assertIsNone(manifest_particiones(destino))
+            self.assertEqual(self.client.get("/api/dataset/particiones/").status_code, 404)
+            self.assertEqual(self.client.get("/dataset/").status_code, 200)
+        sha1.assert_not_called()
+        self.assertEqual((self.dir / "Final_data.particiones.json").read_bytes(), antes)
+
+        # la escritura sí lo rehace antes de agregar la partición
+        anexar(generar_dataset(self.dir / "b.csv", 100, seed=9), destino)
+        self.assertEqual(len(manifest_particiones(destino)["particiones"]), 2)
+
+    def test_migracion_crea_el_manifest(self):
+        import importlib
+        from principal.datos import manifest_particiones
+
+        destino = generar_dataset(self.dir / "Final_data.csv", 300, seed=10)
+        migracion = importlib.import_module("principal.migrations.0006_manifest_particiones")
+        with self.settings(DATA_DIR=self.dir):
+            migracion.crear_manifest(None, None)
+        manifest = manifest_particiones(destino)
+        self.assertEqual(len(manifest["particiones"]), 1)
+        self.assertEqual(manifest["bytes"], destino.stat().st_size)
@@ -0,0 +1,75 @@
+import re
+
+from django.test import TestCase
+
+from principal.metricas import REGISTRO, span
+
+# una muestra del formato de texto de Prometheus: nombre{etiquetas} valor
+_MUESTRA = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$')
+_ETIQUETA = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"(?:,|$)')
+
+
+def _parsear(texto: str) -> tuple[dict, list]:
+    """``({familia: tipo}, [(nombre, {etiquetas}, valor)])``; falla si una línea no es válida."""
+    tipos, muestras = {}, []
+    for linea in texto.splitlines():
+        if linea.startswith("# TYPE "):
+            _, _, familia, tipo = linea.split(" ")
+            assert tipo in ("counter", "gauge", "histogram"), linea
+            tipos[familia] = tipo
+        elif linea.startswith("# HELP ") or not linea:
+            continue
+        else:
+            m = _MUESTRA.match(linea)
+            assert m, f"línea inválida: {linea!r}"
+            etiquetas = dict(_ETIQUETA.findall(m.group(2) or ""))
+            muestras.append((m.group(1), etiquetas, float(m.group(3))))
+    return tipos, muestras
+
+
+class InstrumentacionTests(TestCase):
+    def test_cabecera_server_timing(self):
+        r = self.client.get("/dataset/")
+        partes = [p.strip() for p in r["Server-Timing"].split(",")]
+        duraciones = {}
+        for parte in partes:
+            m = re.fullmatch(r"([\w-]+);dur=(\d+\.\d+)", parte)
+            self.assertIsNotNone(m, parte)
+            duraciones[m.group(1)] = float(m.group(2))
+        self.assertEqual(partes[-1].split(";")[0], "total")
+        self.assertIn("dataset", duraciones)
+        self.assertLessEqual(duraciones["dataset"], duraciones["total"])
+
+    def test_metrics_en_formato_prometheus(self):
+        with span("sin_solicitud"):
+            pass  # fuera de una solicitud no se mide nada
+        REGISTRO.observar("salud_etapa_segundos", 'rara "etapa"', 0.003)
+        self.client.get("/dataset/")
+        r = self.client.get("/metrics")
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r["Content-Type"].startswith("text/plain; version=0.0.4"))
+        tipos, muestras = _parsear(r.content.decode("utf-8"))
+
+        for nombre, _, _ in muestras:
+            familia = re.sub(r"_(bucket|sum|count)$", "", nombre)
+            self.assertTrue(nombre in tipos or familia in tipos, nombre)
+        self.assertEqual(tipos["salud_solicitud_segundos"], "histogram")
+        self.assertEqual(tipos["salud_predicciones_total"], "counter")
+
+        # buckets acumulados, con +Inf igual al _count de cada serie
+        series = {}
+        for nombre, etiquetas, valor in muestras:
+            if nombre == "salud_solicitud_segundos_bucket":
+                series.setdefault(etiquetas["vista"], []).append((etiquetas["le"], valor))
+        self.assertIn("principal:subir_dataset", series)
+        for vista, buckets in series.items():
+            valores = [v for _, v in buckets]
+            self.assertEqual(valores, sorted(valores))
+            self.assertEqual(buckets[-1][0], "+Inf")
+            (total,) = [v for n, e, v in muestras
+                        if n == "salud_solicitud_segundos_count" and e["vista"] == vista]
+            self.assertEqual(valores[-1], total)
+
+        etapas = {e["etapa"] for n, e, _ in muestras if n == "salud_etapa_segundos_count"}
+        self.assertIn('rara \\"etapa\\"', etapas)
+        self.assertNotIn("sin_solicitud", etapas)
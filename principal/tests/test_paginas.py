@@ -0,0 +1,27 @@
+from django.test import TestCase
+
+
+class PaginasEnCacheTests(TestCase):
+    def setUp(self):
+        from principal.paginas import vaciar_paginas
+
+        vaciar_paginas()
+        self.addCleanup(vaciar_paginas)
+
+    def test_revalidacion_con_etag(self):
+        r = self.client.get("/")
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r["Cache-Control"].startswith("max-age="))
+        r2 = self.client.get("/", HTTP_IF_NONE_MATCH=r["ETag"])
+        self.assertEqual(r2.status_code, 304)
+        self.assertEqual(r2.content, b"")
+        r3 = self.client.get("/", HTTP_IF_NONE_MATCH='"otro"')
+        self.assertEqual(r3.status_code, 200)
+        self.assertEqual(r3.content, r.content)
+
+    def test_consejos_es_privada(self):
+        r = self.client.get("/consejos/")
+        self.assertEqual(r["Cache-Control"], "private, no-cache")
+        otra = self.client.get("/consejos/?estado=No saludable")
+        self.assertNotEqual(otra["ETag"], r["ETag"])
+        self.assertEqual(self.client.get("/consejos/", HTTP_IF_NONE_MATCH=r["ETag"]).status_code, 304)
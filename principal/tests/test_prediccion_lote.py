@@ -0,0 +1,94 @@
+import json
+import threading
+import time
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from principal import ejecutor
+from principal.benchmarks import registros_sinteticos
+from principal.forms import PredictionForm, validar_lote
+
+
+class PrediccionLoteTests(TestCase):
+    def test_predict_batch(self):
+        from principal.ml import predict_batch
+
+        resultados = predict_batch(registros_sinteticos(20, seed=4))
+        self.assertEqual(len(resultados), 20)
+        for r in resultados:
+            self.assertIn(r["estado"], ("Saludable", "No saludable"))
+            self.assertIn(r["fuente"], ("modelo", "reglas"))
+        self.assertEqual(predict_batch([]), [])
+
+    def test_validar_lote_igual_que_el_formulario(self):
+        registros = registros_sinteticos(6, seed=7)
+        registros[1]["peso"] = "x"
+        registros[2]["genero"] = None
+        registros[3].update(promedio_latidos=50, reposo_latidos=60)
+        registros.append({})
+        validos, errores = validar_lote(registros)
+        esperados = [PredictionForm(data=r) for r in registros]
+        self.assertEqual(validos, [f.cleaned_data for f in esperados if f.is_valid()])
+        self.assertEqual(errores, {
+            i: f.errors.get_json_data() for i, f in enumerate(esperados) if not f.is_valid()
+        })
+        self.assertEqual(sorted(errores), [1, 2, 3, 6])
+
+    def test_filas_invalidas_no_se_predicen(self):
+        registros = registros_sinteticos(3, seed=5)
+        registros.insert(1, {"peso": "x"})
+        r = self.client.post("/api/prediccion/lote/", json.dumps(registros),
+                             content_type="application/json")
+        self.assertEqual(r.status_code, 200)
+        datos = r.json()
+        self.assertEqual((datos["total"], datos["invalidos"]), (4, 1))
+        self.assertEqual(datos["resultados"][1]["fila"], 1)
+        self.assertIn("peso", datos["resultados"][1]["errores"])
+        for i in (0, 2, 3):
+            self.assertIn("estado", datos["resultados"][i])
+
+    def test_lote_sin_filas_validas(self):
+        r = self.client.post("/api/prediccion/lote/", json.dumps([{"peso": "x"}]),
+                             content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+        self.assertNotIn("estado", r.json()["resultados"][0])
+
+
+@override_settings(INFERENCIA_HILOS=1, INFERENCIA_COLA=0, HISTORIAL_PREDICCIONES=False)
+class ContrapresionTests(TestCase):
+    def setUp(self):
+        # un pool propio de un solo cupo, sin tocar el del resto de la suite
+        parche = mock.patch.multiple(ejecutor, _EJECUTOR=None, _CUPOS=None,
+                                     _CAPACIDAD=0, _EN_USO=0)
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.addCleanup(lambda: ejecutor._EJECUTOR and ejecutor._EJECUTOR.shutdown())
+
+    def test_pool_lleno_responde_503(self):
+        soltar = threading.Event()
+
+        def lento(registros):
+            soltar.wait(5)
+            return [], 0, False
+
+        cuerpo = json.dumps(registros_sinteticos(1, seed=6))
+        primera = {}
+        with mock.patch("principal.views._predecir_lote", lento):
+            hilo = threading.Thread(target=lambda: primera.update(r=self.client.post(
+                "/api/prediccion/lote/", cuerpo, content_type="application/json")))
+            hilo.start()
+            limite = time.monotonic() + 5
+            while ejecutor.ocupacion()["en_uso"] < 1 and time.monotonic() < limite:
+                time.sleep(0.01)
+            self.assertEqual(ejecutor.ocupacion(), {"en_uso": 1, "capacidad": 1})
+
+            r = self.client.post("/api/prediccion/lote/", cuerpo,
+                                 content_type="application/json")
+            self.assertEqual(r.status_code, 503)
+            self.assertEqual(r["Retry-After"], "1")
+
+            soltar.set()
+            hilo.join(5)
+        self.assertEqual(primera["r"].status_code, 200)
+        self.assertEqual(ejecutor.ocupacion()["en_uso"], 0)
@@ -0,0 +1,82 @@
+from unittest import mock
+import os, threading
+
+from django.test import TestCase, override_settings
+
+from principal.benchmarks import generar_dataset
+from principal.ml import predictor
+from principal.ml.entrenamiento import entrenar
+from .utiles import DirectorioTemporal
+
+
+def _esperar_recarga() -> None:
+    for hilo in threading.enumerate():
+        if hilo.name == "recarga-modelo":
+            hilo.join(10)
+
+
+@override_settings(MODEL_RELOAD_INTERVAL=0)
+class RecargaModeloTests(DirectorioTemporal, TestCase):
+    def setUp(self):
+        super().setUp()
+        # rutas y registro propios; el del resto de la suite se restaura al final
+        parche = mock.patch.multiple(
+            predictor,
+            MODEL_PATH=self.dir / "clf.joblib", META_PATH=self.dir / "metadata.json",
+            COMPACT_PATH=self.dir / "clf.npz", _REGISTRO=predictor._Registro(),
+            _ULTIMA_REVISION=float("-inf"),
+        )
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.addCleanup(_esperar_recarga)
+
+    def _entrenar(self):
+        dataset = generar_dataset(self.dir / "datos.csv", 500, seed=2)
+        entrenar(dataset, predictor.MODEL_PATH, predictor.META_PATH, n_estimators=10)
+
+    def test_cambio_de_mtime_recarga_en_segundo_plano(self):
+        self._entrenar()
+        viejo = predictor._registro()
+        self.assertIsNotNone(viejo.modelo)
+
+        t = predictor.META_PATH.stat().st_mtime_ns + 10**9
+        os.utime(predictor.META_PATH, ns=(t, t))
+        soltar = threading.Event()
+        cargar = predictor._cargar
+        with mock.patch.object(predictor, "_cargar",
+                               side_effect=lambda f: (soltar.wait(10), cargar(f))):
+            # mientras se recarga, las solicitudes siguen con el registro anterior
+            self.assertIs(predictor._registro(), viejo)
+            self.assertIs(predictor._registro(), viejo)
+            soltar.set()
+            _esperar_recarga()
+        nuevo = predictor._REGISTRO
+        self.assertIsNot(nuevo, viejo)
+        self.assertIsNotNone(nuevo.modelo)
+        self.assertEqual(nuevo.firma, predictor._firma_archivos())
+
+    def test_sin_modelo_no_se_reintenta(self):
+        with mock.patch.object(predictor, "_cargar_modelo") as cargar_modelo:
+            self.assertIsNone(predictor._registro().modelo)
+            for _ in range(3):
+                predictor._registro()
+                _esperar_recarga()
+        cargar_modelo.assert_not_called()
+        self.assertEqual(predictor._REGISTRO.firma, (None, None, None))
+
+    def test_modelo_roto_se_intenta_una_sola_vez(self):
+        predictor.MODEL_PATH.write_bytes(b"no es un joblib")
+        with mock.patch.object(predictor, "_cargar_modelo",
+                               wraps=predictor._cargar_modelo) as cargar_modelo, \
+                self.assertLogs(predictor.logger, "ERROR"):
+            self.assertIsNone(predictor._registro().modelo)
+            for _ in range(3):
+                predictor._registro()
+                _esperar_recarga()
+        self.assertEqual(cargar_modelo.call_count, 1)
+
+        # al cambiar el archivo se vuelve a intentar, ya con un modelo válido
+        self._entrenar()
+        predictor._registro()
+        _esperar_recarga()
+        self.assertIsNotNone(predictor._REGISTRO.modelo)
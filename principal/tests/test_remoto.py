@@ -0,0 +1,60 @@
+from unittest import mock
+import json, threading, time
+
+from django.test import TestCase, override_settings
+
+from principal.benchmarks import registros_sinteticos
+from principal.ml import cliente as cliente_mod, predict_batch
+from .utiles import DirectorioTemporal
+
+
+class ServidorRemotoTests(DirectorioTemporal, TestCase):
+    def setUp(self):
+        super().setUp()
+        # nadie escucha en este socket: cada conexión falla enseguida
+        self.url = f"unix:{self.dir / 'inferencia.sock'}"
+        ajustes = override_settings(MODEL_SERVIDOR=self.url, HISTORIAL_PREDICCIONES=False)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.addCleanup(lambda: cliente_mod._CLIENTES.pop(self.url, None))
+
+    def test_servidor_inalcanzable_responde_con_reglas(self):
+        registros = registros_sinteticos(3, seed=4)
+        with self.assertLogs(cliente_mod.logger, "WARNING"):
+            r = self.client.post("/api/prediccion/lote/", json.dumps(registros),
+                                 content_type="application/json")
+        self.assertEqual(r.status_code, 200)
+        self.assertFalse(r.json()["modelo"])
+        self.assertEqual({f["fuente"] for f in r.json()["resultados"]}, {"reglas"})
+
+        r = self.client.post("/api/prediccion/", json.dumps(registros[0]),
+                             content_type="application/json")
+        self.assertEqual((r.status_code, r.json()["fuente"]), (200, "reglas"))
+        self.assertEqual(cliente_mod.cliente_inferencia().fallos, 1)
+
+    def test_fuente_del_servidor_en_el_lote(self):
+        cliente = cliente_mod.cliente_inferencia()
+        respuesta = {"version": "v1", "fuente": "cache", "resultados": [["Saludable", 0.9]]}
+        with mock.patch.object(cliente, "pedir", return_value=respuesta):
+            (fila,) = predict_batch(registros_sinteticos(1, seed=5))
+        self.assertEqual((fila["estado"], fila["fuente"]), ("Saludable", "cache"))
+
+    def test_salud_no_espera_al_servidor(self):
+        cliente = cliente_mod.cliente_inferencia()
+
+        def lento(*args, **kwargs):
+            time.sleep(1)
+            raise OSError("sin respuesta")
+
+        with mock.patch.object(cliente, "pedir", side_effect=lento):
+            inicio = time.perf_counter()
+            r = self.client.get("/api/salud/")
+            self.assertLess(time.perf_counter() - inicio, 0.5)
+            # la consulta sigue en su hilo; al fallar marca caído al cliente
+            with self.assertLogs(cliente_mod.logger, "WARNING"):
+                for hilo in threading.enumerate():
+                    if hilo.name == "salud-inferencia":
+                        hilo.join(5)
+        self.assertTrue(cliente.caido())
+        self.assertEqual(r.json()["estado"], "reglas")
+        self.assertIsNone(r.json()["modelo"]["remoto"]["servidor"])
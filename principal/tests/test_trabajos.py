@@ -0,0 +1,60 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from principal import trabajos
+from principal.benchmarks import generar_dataset
+from principal.models import Trabajo
+from .utiles import DirectorioTemporal
+
+
+class TrabajosTests(DirectorioTemporal, TestCase):
+    def test_pool_sin_fork(self):
+        with mock.patch.object(trabajos, "_POOL", None), \
+                mock.patch.object(trabajos, "ProcessPoolExecutor") as pool:
+            trabajos._pool()
+        self.assertEqual(pool.call_args.kwargs["mp_context"].get_start_method(), "spawn")
+
+    @override_settings(TRABAJOS_WORKERS=0)
+    def test_ingesta_en_linea(self):
+        origen = generar_dataset(self.dir / "subido.csv", 300, seed=1)
+        with self.settings(DATA_DIR=self.dir):
+            t = trabajos.encolar_ingesta(origen)
+        t.refresh_from_db()
+        self.assertEqual((t.estado, t.filas), (Trabajo.COMPLETADO, 300))
+        self.assertNotIn(t.pk, trabajos._ACTIVOS)
+
+    @override_settings(TRABAJOS_WORKERS=0)
+    def test_subidas_con_el_mismo_nombre(self):
+        contenido = generar_dataset(self.dir / "origen.csv", 50, seed=2).read_bytes()
+        with self.settings(DATA_DIR=self.dir, MEDIA_ROOT=str(self.dir / "media")):
+            for _ in range(2):
+                r = self.client.post("/dataset/", {
+                    "archivo": SimpleUploadedFile("datos.csv", contenido), "modo": "reemplazar",
+                })
+                self.assertEqual(r.status_code, 302)
+        a, b = Trabajo.objects.order_by("pk")
+        self.assertNotEqual(a.origen, b.origen)
+        self.assertEqual((a.estado, b.estado), (Trabajo.COMPLETADO, Trabajo.COMPLETADO))
+        # la copia subida se borra al terminar la ingesta
+        self.assertEqual(list((self.dir / "media" / "datasets").iterdir()), [])
+
+    def test_recuperar_trabajos_sin_latido(self):
+        viejo = Trabajo.objects.create(tipo=Trabajo.INGESTA, estado=Trabajo.EN_CURSO)
+        pendiente = Trabajo.objects.create(tipo=Trabajo.INGESTA)
+        vivo = Trabajo.objects.create(tipo=Trabajo.INGESTA, estado=Trabajo.EN_CURSO)
+        hace_rato = timezone.now() - timedelta(hours=1)
+        Trabajo.objects.filter(pk__in=[viejo.pk, pendiente.pk]).update(actualizado=hace_rato)
+
+        self.assertEqual(trabajos.recuperar_trabajos(), 2)
+        for t in (viejo, pendiente):
+            t.refresh_from_db()
+            self.assertEqual(t.estado, Trabajo.ERROR)
+            self.assertTrue(t.error)
+        vivo.refresh_from_db()
+        self.assertEqual(vivo.estado, Trabajo.EN_CURSO)
+        # el sondeo del estado también los resuelve
+        self.assertEqual(self.client.get(f"/dataset/trabajos/{vivo.pk}/").status_code, 200)
@@ -0,0 +1,11 @@
+from pathlib import Path
+import shutil, tempfile
+
+
+class DirectorioTemporal:
+    """Mezcla para ``TestCase``: ``self.dir`` es un directorio que se borra al terminar."""
+
+    def setUp(self):
+        super().setUp()
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
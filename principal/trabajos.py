@@ -0,0 +1,214 @@
+from __future__ import annotations
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+import logging, multiprocessing, os, threading, time, traceback
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .apps import esperar_calentamiento
+from .models import Trabajo
+from .procesos import inicializar_worker
+
+logger = logging.getLogger(__name__)
+
+_POOL: ProcessPoolExecutor | None = None
+_POOL_LOCK = threading.Lock()
+# trabajos que este proceso tiene en cola o en curso; el hilo de latido los mantiene vivos
+_ACTIVOS: set[int] = set()
+_LATIDO: threading.Thread | None = None
+
+
+def _num_workers() -> int:
+    return int(getattr(settings, "TRABAJOS_WORKERS", 2))
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            # sin fork: el proceso web ya tiene hilos (calentamiento, agrupador, escritores)
+            # y un hijo podría heredar un lock tomado, p. ej. el de importación
+            contexto = multiprocessing.get_context(getattr(settings, "TRABAJOS_INICIO", "spawn"))
+            if contexto.get_start_method() == "fork":
+                esperar_calentamiento()
+            _POOL = ProcessPoolExecutor(
+                max_workers=_num_workers(),
+                mp_context=contexto,
+                initializer=inicializar_worker,
+                initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", "vida_saludable.settings"),),
+            )
+        return _POOL
+
+
+def _marcar(pk: int, **campos) -> None:
+    Trabajo.objects.filter(pk=pk).update(actualizado=timezone.now(), **campos)
+
+
+def _latir() -> None:
+    while True:
+        time.sleep(float(getattr(settings, "TRABAJOS_LATIDO", 30)))
+        activos = list(_ACTIVOS)
+        if not activos:
+            continue
+        close_old_connections()
+        try:
+            Trabajo.objects.filter(pk__in=activos).update(actualizado=timezone.now())
+        except Exception:
+            logger.exception("No se pudo actualizar el latido de los trabajos")
+
+
+def _activar(pk: int) -> None:
+    global _LATIDO
+    _ACTIVOS.add(pk)
+    with _POOL_LOCK:
+        if _LATIDO is None or not _LATIDO.is_alive():
+            _LATIDO = threading.Thread(target=_latir, name="trabajos-latido", daemon=True)
+            _LATIDO.start()
+
+
+def recuperar_trabajos() -> int:
+    """Da por fallidos los trabajos sin latido en ``TRABAJOS_TIMEOUT`` segundos.
+
+    Quedan así si el proceso que los tenía murió o se reinició el servidor;
+    devuelve cuántos se marcaron.
+    """
+    limite = timezone.now() - timedelta(seconds=float(getattr(settings, "TRABAJOS_TIMEOUT", 300)))
+    return Trabajo.objects.filter(
+        estado__in=(Trabajo.PENDIENTE, Trabajo.EN_CURSO), actualizado__lt=limite,
+    ).update(
+        estado=Trabajo.ERROR, terminado=timezone.now(),
+        error="El trabajo se interrumpió (se reinició o cayó el proceso); vuelve a enviarlo.",
+    )
+
+
+def _borrar_temporal(trabajo: Trabajo) -> None:
+    # las subidas se copian a media/datasets solo para el trabajo; no se conservan
+    if (trabajo.resultado or {}).get("temporal"):
+        Path(trabajo.origen).unlink(missing_ok=True)
+
+
+def _ingesta(trabajo: Trabajo) -> dict:
+    from principal.datos import anexar, ingerir, registrar_resumen
+
+    destino = Path(settings.DATA_DIR) / "Final_data.csv"
+    modo = (trabajo.resultado or {}).get("modo", "reemplazar")
+
+    def progreso(n: int) -> None:
+        _marcar(trabajo.pk, filas=n)
+
+    try:
+        if modo == "reemplazar":
+            r = ingerir(trabajo.origen, destino, progreso=progreso)
+        else:
+            r = anexar(trabajo.origen, destino, modo=modo,
+                       clave=getattr(settings, "DATASET_CLAVE", None), progreso=progreso)
+    finally:
+        _borrar_temporal(trabajo)
+    registrar_resumen(destino, r.total, r.columnas, r.preview, sha1=r.huella)
+    _marcar(trabajo.pk, filas=r.filas, columnas=r.cols)
+    return {
+        "ruta": r.ruta, "modo": modo, "filas": r.filas, "total": r.total, "columnas": r.cols,
+        "descartadas": r.descartadas, "duplicadas": r.duplicadas,
+    }
+
+
+def _entrenamiento(trabajo: Trabajo) -> dict:
+    from principal.ml.entrenamiento import entrenar
+
+    reporte = entrenar(Path(trabajo.origen))
+    _marcar(trabajo.pk, filas=reporte["filas"])
+    return reporte
+
+
+_EJECUTORES = {
+    Trabajo.INGESTA: _ingesta,
+    Trabajo.ENTRENAMIENTO: _entrenamiento,
+}
+
+
+def ejecutar(pk: int) -> str:
+    """Corre el trabajo ``pk`` (en un proceso del pool o en línea) y deja su estado en la BD."""
+    trabajo = Trabajo.objects.get(pk=pk)
+    _marcar(pk, estado=Trabajo.EN_CURSO, iniciado=timezone.now())
+    try:
+        resultado = _EJECUTORES[trabajo.tipo](trabajo)
+    except Exception as e:
+        logger.error("Trabajo %s falló:\n%s", pk, traceback.format_exc())
+        _marcar(pk, estado=Trabajo.ERROR, error=str(e), terminado=timezone.now())
+        return Trabajo.ERROR
+    _marcar(pk, estado=Trabajo.COMPLETADO, terminado=timezone.now(),
+            resultado={**(trabajo.resultado or {}), **resultado})
+    return Trabajo.COMPLETADO
+
+
+def _encolar(trabajo: Trabajo, al_terminar=None) -> Trabajo:
+    _activar(trabajo.pk)
+    if _num_workers() <= 0:
+        try:
+            estado = ejecutar(trabajo.pk)
+        finally:
+            _ACTIVOS.discard(trabajo.pk)
+        if al_terminar is not None:
+            al_terminar(estado)
+        return trabajo
+
+    def terminado(f: Future) -> None:
+        _ACTIVOS.discard(trabajo.pk)
+        estado = Trabajo.ERROR if f.exception() else f.result()
+        if f.exception() is not None:
+            # el proceso del pool murió: ejecutar() no alcanzó a dejar el estado
+            _marcar(trabajo.pk, estado=Trabajo.ERROR, terminado=timezone.now(),
+                    error=f"El proceso del trabajo terminó con error: {f.exception()}")
+            _borrar_temporal(trabajo)
+        if al_terminar is not None:
+            al_terminar(estado)
+
+    try:
+        futuro: Future = _pool().submit(ejecutar, trabajo.pk)
+    except BaseException:
+        _ACTIVOS.discard(trabajo.pk)
+        raise
+    futuro.add_done_callback(terminado)
+    return trabajo
+
+
+def encolar_entrenamiento(ruta: Path | None = None) -> Trabajo:
+    ruta = ruta or Path(settings.DATA_DIR) / "Final_data.csv"
+    return _encolar(Trabajo.objects.create(tipo=Trabajo.ENTRENAMIENTO, origen=str(ruta)))
+
+
+def encolar_ingesta(origen: Path, reentrenar: bool = False, modo: str = "reemplazar",
+                    temporal: bool = False) -> Trabajo:
+    """Registra la ingesta de ``origen`` y la envía al pool; devuelve enseguida.
+
+    ``modo`` es ``"reemplazar"``, ``"agregar"`` o ``"fusionar"`` (ver
+    ``principal.datos.anexar``). Con ``reentrenar`` se crea también el trabajo
+    de reentrenamiento (su id queda en ``resultado["entrenamiento_id"]``) y se
+    lanza solo si la ingesta termina bien. Con ``temporal`` el archivo
+    ``origen`` se borra al terminar la ingesta, bien o mal.
+    """
+    parametros = {"modo": modo, **({"temporal": True} if temporal else {})}
+    if not reentrenar:
+        return _encolar(Trabajo.objects.create(
+            tipo=Trabajo.INGESTA, origen=str(origen), resultado=parametros,
+        ))
+
+    entrenamiento = Trabajo.objects.create(
+        tipo=Trabajo.ENTRENAMIENTO, origen=str(Path(settings.DATA_DIR) / "Final_data.csv")
+    )
+    trabajo = Trabajo.objects.create(
+        tipo=Trabajo.INGESTA, origen=str(origen),
+        resultado={**parametros, "entrenamiento_id": entrenamiento.pk},
+    )
+
+    def _despues(estado: str) -> None:
+        if estado == Trabajo.COMPLETADO:
+            _encolar(entrenamiento)
+        else:
+            _marcar(entrenamiento.pk, estado=Trabajo.ERROR, terminado=timezone.now(),
+                    error="La ingesta del dataset falló; no se reentrenó.")
+
+    return _encolar(trabajo, _despues)
@@ -7,7 +7,16 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('probar-dataset/', views.probar_dataset, name='probar_dataset'),
     path('dataset/', views.subir_dataset, name='subir_dataset'),
+    path('api/dataset/analitica/', views.analitica_dataset, name='analitica_dataset'),
+    path('api/dataset/particiones/', views.particiones_dataset, name='particiones_dataset'),
+    path('dataset/trabajos/<int:pk>/', views.estado_trabajo, name='estado_trabajo'),
     path('prediccion/', views.prediccion, name='prediccion'),
+    path('api/prediccion/', views.prediccion_api, name='prediccion_api'),
+    path('api/prediccion/lote/', views.prediccion_lote, name='prediccion_lote'),
+    path('api/salud/', views.salud, name='salud'),
+    path('api/historial/', views.historial, name='historial'),
+    path('api/deriva/', views.deriva, name='deriva'),
+    path('metrics', views.metrics, name='metrics'),
     path('consejos/', views.consejos, name='consejos'),
     path('contacto/', views.contacto, name='contacto'),
 ]
@@ -1,42 +1,45 @@
 from pathlib import Path
-import pandas as pd
+import json, time, uuid
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib import messages
-from django.http import HttpResponse
-from django.shortcuts import render, redirect
-
-from principal.ml import predict_estado_salud, model_loaded
-from .forms import DatasetUploadForm, PredictionForm, ContactForm
-
-
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, render, redirect
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods, require_POST
+
+# principal.ml y principal.datos cargan numpy/pandas recién al primer uso
+from principal import datos, ml
+from principal.metricas import exposicion_prometheus, memoria_proceso, span
+from .forms import DatasetUploadForm, PredictionForm, ContactForm, validar_lote
+from .contacto import guardar_mensaje
+from .ejecutor import ColaLlena, fuera_del_loop, ocupacion
+from .historial import deriva_por_tipo, estado_historial, registrar_prediccion, saludables_por_dia
+from .paginas import estado_paginas, pagina_en_cache
+from .models import Trabajo
+from .trabajos import encolar_ingesta, recuperar_trabajos
+
+
+@pagina_en_cache()
 def home(request):
     return render(request, 'principal/home.html')
 
 
-def _leer_csv_con_fallback(ruta: Path) -> pd.DataFrame:
-    df = pd.read_csv(ruta)
-    if df.shape[1] == 1:
-        df = pd.read_csv(ruta, sep=';')
-    return df
-
-
 def probar_dataset(request):
     ruta = settings.DATA_DIR / 'Final_data.csv'
-    if not ruta.exists():
-        return HttpResponse("No hay data/Final_data.csv aún.")
     try:
-        df = _leer_csv_con_fallback(ruta)
+        resumen = datos.resumen_dataset(ruta)
     except Exception as e:
         return HttpResponse(f"No se pudo leer el CSV: {e}")
+    if resumen is None:
+        return HttpResponse("No hay data/Final_data.csv aún.")
 
-    filas, cols = df.shape
-    cols_str = ", ".join(map(str, df.columns.tolist()[:15]))
-    preview = df.head(5).to_string(index=False)
     html = (
         f"OK ✅ {ruta.name}<br>"
-        f"Filas: {filas} | Columnas: {cols}<br>"
-        f"Columnas: {cols_str}<br><br>"
-        f"<pre>{preview}</pre>"
+        f"Filas: {resumen.filas} | Columnas: {resumen.cols}<br>"
+        f"Columnas: {resumen.cols_str}<br><br>"
+        f"<pre>{resumen.preview_texto}</pre>"
     )
     return HttpResponse(html)
 
@@ -45,7 +48,6 @@ def subir_dataset(request):
     form = DatasetUploadForm()
     info = None
     preview_html = None
-    just_uploaded = False
 
     if request.method == 'POST':
         form = DatasetUploadForm(request.POST, request.FILES)
@@ -54,71 +56,94 @@ def subir_dataset(request):
 
             hist_dir = Path(settings.MEDIA_ROOT) / 'datasets'
             hist_dir.mkdir(parents=True, exist_ok=True)
-            hist_path = hist_dir / f.name
+            # prefijo único: dos subidas con el mismo nombre no se pisan
+            hist_path = hist_dir / f"{uuid.uuid4().hex}-{Path(f.name).name}"
             with open(hist_path, 'wb+') as dest:
                 for chunk in f.chunks():
                     dest.write(chunk)
 
-            try:
-                nombre = f.name.lower()
-                if nombre.endswith('.csv'):
-                    df = _leer_csv_con_fallback(hist_path)
-                else:
-                    df = pd.read_excel(hist_path)
-
-                Path(settings.DATA_DIR).mkdir(parents=True, exist_ok=True)
-                out = Path(settings.DATA_DIR) / 'Final_data.csv'
-                df.to_csv(out, index=False)
-
-                info = {
-                    "filas": df.shape[0],
-                    "cols": df.shape[1],
-                    "nombres": ", ".join(map(str, df.columns[:15])),
-                    "ruta": str(out),
-                }
-                preview_html = df.head(10).to_html(
-                    classes="table table-sm table-striped", index=False
-                )
-                just_uploaded = True
-                messages.success(
-                    request,
-                    f"Dataset cargado: {df.shape[0]} filas, {df.shape[1]} columnas."
-                )
-            except Exception as e:
-                messages.error(request, f"Error leyendo el archivo: {e}")
+            trabajo = encolar_ingesta(
+                hist_path,
+                reentrenar=form.cleaned_data['reentrenar'],
+                modo=form.cleaned_data['modo'] or 'reemplazar',
+                temporal=True,
+            )
+            messages.info(
+                request,
+                f"Archivo recibido. Se está procesando en segundo plano (trabajo #{trabajo.pk})."
+            )
+            return redirect(f"{reverse('principal:subir_dataset')}?trabajo={trabajo.pk}")
 
         return render(
             request,
             'principal/subir_dataset.html',
-            {
-                "form": form,
-                "info": info,
-                "preview_html": preview_html,
-                "just_uploaded": just_uploaded
-            }
+            {"form": form, "info": info, "preview_html": preview_html}
         )
 
+    trabajo = None
+    if request.GET.get('trabajo', '').isdigit():
+        recuperar_trabajos()
+        trabajo = Trabajo.objects.filter(pk=int(request.GET['trabajo'])).first()
+
     actual = Path(settings.DATA_DIR) / 'Final_data.csv'
-    if actual.exists():
-        try:
-            df = _leer_csv_con_fallback(actual)
+    try:
+        with span("dataset"):
+            resumen = datos.resumen_dataset(actual)
+        if resumen is not None:
             info = {
-                "filas": df.shape[0],
-                "cols": df.shape[1],
-                "nombres": ", ".join(map(str, df.columns[:15])),
-                "ruta": str(actual),
+                "filas": resumen.filas,
+                "cols": resumen.cols,
+                "nombres": resumen.cols_str,
+                "ruta": resumen.ruta,
             }
-            preview_html = df.head(10).to_html(
-                classes="table table-sm table-striped", index=False
-            )
-        except Exception:
-            info = {"error": "No se pudo leer el CSV actual."}
+            preview_html = resumen.preview_html
+    except Exception:
+        info = {"error": "No se pudo leer el CSV actual."}
+
+    with span("plantilla"):
+        return render(
+            request,
+            'principal/subir_dataset.html',
+            {"form": form, "info": info, "preview_html": preview_html, "trabajo": trabajo}
+        )
+
+
+def analitica_dataset(request):
+    actual = settings.DATA_DIR / 'Final_data.csv'
+    analitica = datos.analitica_dataset(actual)
+    if analitica is None:
+        if not actual.exists():
+            return JsonResponse({"error": "No hay data/Final_data.csv aún."}, status=404)
+        # se está calculando en segundo plano
+        respuesta = JsonResponse({"error": "La analítica del dataset se está calculando."}, status=503)
+        respuesta["Retry-After"] = "5"
+        return respuesta
+    return JsonResponse(analitica.resumen())
+
+
+def particiones_dataset(request):
+    actual = settings.DATA_DIR / 'Final_data.csv'
+    if not actual.exists():
+        return JsonResponse({"error": "No hay data/Final_data.csv aún."}, status=404)
+    manifest = datos.manifest_particiones(actual)
+    if manifest is None:
+        # leer no lo crea: eso relee el CSV entero (ver datos.asegurar_particiones)
+        return JsonResponse(
+            {"error": "El CSV cambió sin pasar por la ingesta; el manifest se rehace al subir un dataset."},
+            status=404,
+        )
+    if request.GET.get('verificar'):
+        # vuelve a leer todo el CSV: no puede quedar al alcance de cualquiera
+        if not request.user.is_staff:
+            return JsonResponse({"error": "Solo el staff puede verificar las particiones."}, status=403)
+        manifest = {**manifest, "verificacion": datos.verificar_particiones(actual)}
+    return JsonResponse(manifest)
 
-    return render(
-        request,
-        'principal/subir_dataset.html',
-        {"form": form, "info": info, "preview_html": preview_html}
-    )
+
+def estado_trabajo(request, pk):
+    recuperar_trabajos()
+    trabajo = get_object_or_404(Trabajo, pk=pk)
+    return JsonResponse(trabajo.como_dict())
 
 
 def _calcular_saludable(data):
@@ -161,66 +186,245 @@ def _calcular_saludable(data):
     return estado, puntos, razones, imc
 
 
-def prediccion(request):
-    df_info = None
+def _info_dataset():
     try:
-        csv = settings.DATA_DIR / 'Final_data.csv'
-        if csv.exists():
-            dft = pd.read_csv(csv)
-            if dft.shape[1] == 1:
-                dft = pd.read_csv(csv, sep=';')
-            df_info = {
-                "filas": int(dft.shape[0]),
-                "cols": int(dft.shape[1]),
-                "cols_str": ", ".join(map(str, dft.columns[:15])),
-            }
+        with span("dataset"):
+            resumen = datos.resumen_dataset(settings.DATA_DIR / 'Final_data.csv')
     except Exception:
-        df_info = None
+        return None
+    if resumen is None:
+        return None
+    return {
+        "filas": resumen.filas,
+        "cols": resumen.cols,
+        "cols_str": resumen.cols_str,
+    }
+
+
+def _poblacion(data):
+    try:
+        with span("poblacion"):
+            return datos.posicion_poblacion(data, settings.DATA_DIR / 'Final_data.csv')
+    except Exception:
+        return []
+
+
+def _evaluar(data, fila=None):
+    """(resultado, puntaje, razones, imc, fuente, poblacion) con el modelo o, si no hay, con las reglas.
 
+    Con ``fila`` (``PredictionForm.to_dataset_row()``) la predicción queda en el
+    historial y la entrada en el monitor de deriva.
+    """
+    inicio = time.perf_counter()
+    with span("prediccion"):
+        etiqueta, proba = ml.predict_estado_salud(data)
+    if etiqueta is None:
+        etiqueta, puntaje, razones, imc = _calcular_saludable(data)
+        fuente = "reglas"
+    else:
+        imc = (
+            (data.get('peso') or 0)
+            / ((data.get('altura') or 1) ** 2)
+            if data.get('peso') and data.get('altura')
+            else None
+        )
+        puntaje = round(proba * 100) if proba is not None else None
+        razones = []
+        fuente = "modelo"
+    if fila is not None:
+        registrar_prediccion(fila, etiqueta, proba, fuente, time.perf_counter() - inicio)
+        ml.observar_deriva(data)
+    return (etiqueta, puntaje, razones, imc, fuente, _poblacion(data))
+
+
+def _ocupado(como_json=False):
+    mensaje = "Servicio ocupado, intenta de nuevo en unos segundos."
+    if como_json:
+        respuesta = JsonResponse({"error": mensaje}, status=503)
+    else:
+        respuesta = HttpResponse(mensaje, status=503)
+    respuesta["Retry-After"] = "1"
+    return respuesta
+
+
+async def prediccion(request):
     resultado = None
     razones = []
     imc = None
     puntaje = 0
+    poblacion = []
 
-    if request.method == 'POST':
-        form = PredictionForm(request.POST)
-        if form.is_valid():
-            data = form.cleaned_data
-
-            etiqueta, proba = predict_estado_salud(data)
-            if etiqueta is not None:
-                resultado = etiqueta
-                puntaje = round(proba * 100) if proba is not None else None
-                razones = []
-                imc = (
-                    (data.get('peso') or 0)
-                    / ((data.get('altura') or 1) ** 2)
-                    if data.get('peso') and data.get('altura')
-                    else None
+    try:
+        df_info = await fuera_del_loop(_info_dataset)
+
+        if request.method == 'POST':
+            form = PredictionForm(request.POST)
+            if form.is_valid():
+                resultado, puntaje, razones, imc, _, poblacion = await fuera_del_loop(
+                    _evaluar, form.cleaned_data, form.to_dataset_row()
                 )
-            else:
-                resultado, puntaje, razones, imc = _calcular_saludable(data)
+                await request.session.aset('ultimo_resultado_salud', resultado)
+        else:
+            form = PredictionForm()
+    except ColaLlena:
+        return _ocupado()
+
+    with span("plantilla"):
+        return await sync_to_async(render)(
+            request,
+            'principal/prediccion.html',
+            {
+                "form": form,
+                "resultado": resultado,
+                "razones": razones,
+                "imc": imc,
+                "puntaje": puntaje,
+                "poblacion": poblacion,
+                "df_info": df_info,
+            }
+        )
+
+
+@csrf_exempt
+@require_POST
+async def prediccion_api(request):
+    try:
+        payload = json.loads(request.body or b"null")
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({"error": "JSON inválido."}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({"error": "Se espera un objeto JSON."}, status=400)
+    form = PredictionForm(payload)
+    if not form.is_valid():
+        return JsonResponse({"errores": form.errors.get_json_data()}, status=400)
+    try:
+        estado, puntaje, razones, imc, fuente, poblacion = await fuera_del_loop(
+            _evaluar, form.cleaned_data, form.to_dataset_row()
+        )
+    except ColaLlena:
+        return _ocupado(como_json=True)
+    return JsonResponse({
+        "estado": estado,
+        "puntaje": puntaje,
+        "razones": razones,
+        "imc": imc,
+        "fuente": fuente,
+        "poblacion": poblacion,
+    })
+
+
+def _predecir_lote(registros):
+    # las filas inválidas no se predicen: en su lugar van sus errores
+    validos, errores = validar_lote(registros)
+    predichos = iter(ml.predict_batch(validos))
+    resultados = [
+        {"fila": i, "errores": errores[i]} if i in errores else next(predichos)
+        for i in range(len(registros))
+    ]
+    # se consulta aquí y no en la vista: model_loaded puede cargar el modelo
+    return resultados, len(errores), ml.model_loaded()
+
+
+@csrf_exempt
+@require_POST
+async def prediccion_lote(request):
+    try:
+        payload = json.loads(request.body or b"null")
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({"error": "JSON inválido."}, status=400)
+
+    registros = payload.get("registros") if isinstance(payload, dict) else payload
+    if not isinstance(registros, list) or not all(isinstance(r, dict) for r in registros):
+        return JsonResponse(
+            {"error": "Se espera una lista de registros (objetos JSON)."}, status=400
+        )
+    maximo = getattr(settings, "PREDICCION_LOTE_MAX", 50000)
+    if len(registros) > maximo:
+        return JsonResponse(
+            {"error": f"Máximo {maximo} registros por solicitud."}, status=413
+        )
+
+    try:
+        resultados, invalidos, modelo = await fuera_del_loop(_predecir_lote, registros)
+    except ColaLlena:
+        return _ocupado(como_json=True)
+    return JsonResponse({
+        "total": len(resultados),
+        "invalidos": invalidos,
+        "modelo": modelo,
+        "resultados": resultados,
+    }, status=400 if resultados and invalidos == len(resultados) else 200)
+
+
+def historial(request):
+    try:
+        dias = min(max(int(request.GET.get('dias', 30)), 1), 365)
+        ventana = min(max(int(request.GET.get('ventana', 7)), 1), 180)
+    except ValueError:
+        return JsonResponse({"error": "dias y ventana deben ser enteros."}, status=400)
+    return JsonResponse({
+        "por_dia": saludables_por_dia(dias, request.GET.get('version') or None),
+        "deriva_por_tipo": deriva_por_tipo(ventana, request.GET.get('version') or None),
+        "escritor": estado_historial(),
+    })
+
+
+@require_http_methods(["GET", "POST"])
+def deriva(request):
+    # recalcular reinicia la ventana: solo con POST y desde una cuenta de staff
+    if request.method == "POST":
+        if not request.user.is_staff:
+            return JsonResponse({"error": "Solo el staff puede recalcular la deriva."}, status=403)
+        ml.evaluar_deriva()
+    return JsonResponse(ml.estado_deriva())
+
+
+def metrics(request):
+    return HttpResponse(
+        exposicion_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
-            request.session['ultimo_resultado_salud'] = resultado
-    else:
-        form = PredictionForm()
 
-    return render(
-        request,
-        'principal/prediccion.html',
+def _estado_servicio(modelo: dict) -> str:
+    if modelo["remoto"] is not None:
+        # sin servidor se responde con las reglas: el worker sigue sirviendo
+        servidor = modelo["remoto"]["servidor"]
+        return "ok" if servidor and servidor["estado"] == "ok" else "reglas"
+    if not (modelo["exists_model"] or modelo["exists_compact"]):
+        return "reglas"
+    if modelo["loaded"] and modelo["warmup"]["estado"] != "error":
+        return "ok"
+    if modelo["warmup"]["estado"] == "pendiente":
+        return "frio"
+    return "degradado"
+
+
+def salud(request):
+    modelo = ml.debug_ready()
+    estado = _estado_servicio(modelo)
+    return JsonResponse(
         {
-            "form": form,
-            "resultado": resultado,
-            "razones": razones,
-            "imc": imc,
-            "puntaje": puntaje,
-            "df_info": df_info,
-        }
+            "estado": estado,
+            "modelo": modelo,
+            "memoria": memoria_proceso(),
+            "inferencia": ocupacion(),
+            "dataset": datos.estado_resumen(settings.DATA_DIR / 'Final_data.csv'),
+            "historial": estado_historial(),
+            "paginas": estado_paginas(),
+        },
+        status=503 if estado in ("frio", "degradado") else 200,
     )
 
 
-def consejos(request):
+def _estado_consejos(request):
     estado = request.GET.get('estado') or request.session.get('ultimo_resultado_salud', 'Saludable')
+    # la plantilla solo distingue estas dos: cualquier otro valor se ve como "Saludable"
+    return 'No saludable' if estado == 'No saludable' else 'Saludable'
+
+
+@pagina_en_cache(variante=_estado_consejos, privada=True)
+def consejos(request):
+    estado = _estado_consejos(request)
 
     if estado == 'No saludable':
         tips = [
@@ -246,25 +450,7 @@ def contacto(request):
     if request.method == "POST":
         form = ContactForm(request.POST)
         if form.is_valid():
-            data_dir = Path(settings.BASE_DIR) / "data"
-            data_dir.mkdir(parents=True, exist_ok=True)
-            out = data_dir / "contacto.csv"
-
-            campos = ["nombre", "correo", "asunto", "mensaje"]
-            fila = [
-                form.cleaned_data["nombre"],
-                form.cleaned_data["correo"],
-                form.cleaned_data["asunto"],
-                form.cleaned_data["mensaje"].replace("\n", " ").strip(),
-            ]
-
-            nueva_linea = ",".join(['"{}"'.format(x.replace('"', "'")) for x in fila]) + "\n"
-            if not out.exists():
-                encabezados = ",".join(campos) + "\n"
-                out.write_text(encabezados, encoding="utf-8")
-
-            with out.open("a", encoding="utf-8") as f:
-                f.write(nueva_linea)
+            guardar_mensaje(form.cleaned_data)
 
             messages.success(request, "¡Gracias! Recibimos tu mensaje y te contactaremos pronto.")
             return redirect("principal:contacto")
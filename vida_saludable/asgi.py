@@ -3,6 +3,10 @@ ASGI config for vida_saludable project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server, e.g. ``uvicorn vida_saludable.asgi:application``;
+the async views in ``principal.views`` run inference on a bounded thread pool
+(INFERENCIA_HILOS / INFERENCIA_COLA) so the event loop is never blocked.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "principal.middleware.InstrumentacionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -51,8 +52,14 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # plantillas compiladas una vez por proceso; runserver las recarga al editarlas
+            "loaders": [
+                ("django.template.loaders.cached.Loader", [
+                    "django.template.loaders.filesystem.Loader",
+                    "django.template.loaders.app_directories.Loader",
+                ]),
+            ],
             "context_processors": [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
@@ -64,10 +71,29 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "vida_saludable.wsgi.application"
 
+# "template_fragments" la usa {% cache %} (nav de base.html); se vacía al cambiar una plantilla
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "template_fragments": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "fragmentos",
+    },
+}
+
+# WAL: lectores y escritor no se bloquean; NORMAL hace fsync solo en checkpoints.
+# Queda grabado en el archivo de la base, así que se activa al desplegar
+# (SQLITE_WAL=1) y no cambia el db.sqlite3 del repositorio en cada manage.py.
+SQLITE_WAL = os.environ.get("SQLITE_WAL", "") == "1"
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            **({"init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;"}
+               if SQLITE_WAL else {}),
+        },
     }
 }
 
@@ -87,5 +113,79 @@ STATIC_URL = "/static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Comparte el resumen de data/Final_data.csv entre workers vía el backend de caché de Django
+DATASET_RESUMEN_CACHE = False
+# Columnas que identifican una fila al subir en modo "fusionar" (None = la fila entera)
+DATASET_CLAVE = None
+
+# Carga el modelo al arrancar (True), en un hilo sin bloquear el arranque ("fondo") o al
+# primer uso (False); y revisa cada N segundos si cambió en disco
+MODEL_WARMUP = "fondo"
+MODEL_RELOAD_INTERVAL = 5.0
+# "auto" usa model/vida_saludable_clf.npz (solo NumPy) si corresponde al joblib; "sklearn" lo ignora
+MODEL_BACKEND = "auto"
+# Mapea (mmap) los arreglos del .npz en vez de copiarlos: todos los workers comparten las páginas
+MODEL_MMAP = True
+# Servidor de inferencia (manage.py serve_model): con una URL ("127.0.0.1:8765" o
+# "unix:/ruta.sock") los workers web no cargan el modelo y le piden las predicciones.
+# Si no responde en MODEL_SERVIDOR_TIMEOUT s se usan las reglas y no se reintenta por
+# MODEL_SERVIDOR_REINTENTO s
+MODEL_SERVIDOR = None
+MODEL_SERVIDOR_CONEXIONES = 8
+MODEL_SERVIDOR_TIMEOUT = 1.0
+MODEL_SERVIDOR_TIMEOUT_LOTE = 30.0
+MODEL_SERVIDOR_REINTENTO = 5.0
+
+# Procesos para ingesta/reentrenamiento en segundo plano (0 = en la misma solicitud)
+TRABAJOS_WORKERS = 2
+# Cómo se crean: "spawn" o "forkserver"; "fork" puede colgarse con los hilos del proceso web
+TRABAJOS_INICIO = "spawn"
+# El proceso web marca sus trabajos cada TRABAJOS_LATIDO s; sin latido por TRABAJOS_TIMEOUT s
+# (proceso caído o reiniciado) el trabajo pasa a error
+TRABAJOS_LATIDO = 30
+TRABAJOS_TIMEOUT = 300
+
+# Caché de predicciones: "local" (por proceso), "django" (backend de caché) o None
+PREDICCION_CACHE_BACKEND = "local"
+PREDICCION_CACHE_MAX = 2048
+PREDICCION_CACHE_TTL = 600
+
+# Mensajes de contacto: se guardan en lotes de N o cada X segundos (1 = uno por uno)
+CONTACTO_LOTE = 50
+CONTACTO_INTERVALO = 1.0
+# Historial de predicciones (principal.Prediccion): se guarda por lotes con bulk_create
+HISTORIAL_PREDICCIONES = True
+HISTORIAL_LOTE = 200
+HISTORIAL_INTERVALO = 2.0
+
+# Monitor de deriva de las entradas del formulario: muestra fija de N filas por proceso,
+# comparada contra la distribución de entrenamiento cada X segundos
+DERIVA_ACTIVA = True
+DERIVA_MUESTRA = 1024
+DERIVA_INTERVALO = 300
+DERIVA_MIN_MUESTRAS = 100
+
+# Predicciones individuales concurrentes se juntan en un lote: ventana en ms (0 = apagado) y filas máximas
+PREDICCION_MICROLOTE_MS = 2.0
+PREDICCION_MICROLOTE_MAX = 64
+
+# Máximo de registros aceptados por /api/prediccion/lote/
+PREDICCION_LOTE_MAX = 50000
+
+# Pool de hilos de las vistas async: hilos ejecutando + solicitudes en espera (más allá, 503)
+INFERENCIA_HILOS = 16
+INFERENCIA_COLA = 64
+
+# Páginas sin datos (inicio, consejos) renderizadas una vez por proceso y servidas con
+# ETag/Last-Modified; se vuelven a renderizar cada PAGINAS_CACHE_TTL s. El navegador las
+# reutiliza PAGINAS_MAX_AGE s antes de revalidar
+PAGINAS_CACHE = True
+PAGINAS_CACHE_TTL = 3600
+PAGINAS_MAX_AGE = 60
+
+# Tiempos por etapa (Server-Timing, /metrics); percentiles sobre las últimas N muestras
+METRICAS_ACTIVAS = True
+METRICAS_VENTANA = 1024
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")